@@ -1,5 +1,3 @@
-from random import randrange
-
 import game.board as board
 from game import Player, Game
 from game.actions import *
@@ -17,8 +15,8 @@ class CFActionEvalAI(CFBaseAI):
     Threat_Action_Weight = 0  # weight when combined with other cost
     gui_debug = False
 
-    def __init__(self, name):
-        CFBaseAI.__init__(self, name)
+    def __init__(self, name, seed=None):
+        CFBaseAI.__init__(self, name, seed)
         self.remaining_edge_score = 0
         self.threatened_edges = []
         self.threatened_edges_score = []
@@ -1,6 +1,5 @@
 from ai.cf_ai.cf_action_eval_ai import CFActionEvalAI
 from game.methods import *
-from random import randrange
 from game import Player, Game
 
 
@@ -10,13 +9,14 @@ class AdversarialAI(CFActionEvalAI):
     quite mean >:-{)
     """
 
-    def __init__(self, name):
-        CFActionEvalAI.__init__(self, name)
+    def __init__(self, name, seed=None):
+        CFActionEvalAI.__init__(self, name, seed)
         self.sort_method = lambda path: path.cost
 
     def take_turn(self, game):
-        info = game.get_player_info(self)
-        steal_edges = get_threatened_edges(self.opponent_name[0], game.get_edge_claims())
+        view = game.get_view()
+        info = view.get_player_info(self)
+        steal_edges = get_threatened_edges(self.opponent_name[0], view.get_edge_claims())
         original_action = CFActionEvalAI.take_turn(self, game)
         actions = []
 
@@ -40,6 +40,6 @@ class AdversarialAI(CFActionEvalAI):
                 return original_action
             else:
                 # print 'returning action'
-                return actions[randrange(0, len(actions))]
+                return actions[self.rng.randrange(0, len(actions))]
         else:
             return original_action
@@ -1,10 +1,11 @@
-from random import randrange
-
 import game.board as board
 from game import Player, Game
 from game.actions import *
 from game.classes import Colors
-from game.methods import find_paths_for_destinations, connected
+from game.events import EventType
+from game.methods import add_destination, find_paths_for_destinations
+from game.path_cache import PathCache
+from game.steiner import find_steiner_networks, MAX_TERMINALS
 import copy
 from collections import namedtuple, Counter
 from gui.gui import GUI
@@ -32,17 +33,24 @@ class CFBaseAI(Player):
     Wild_Card_Value = 8  # used when selecting the best cards to evaluate how much a wild card values
     Ticket_Score_Multiplier = 0.5  # used when selecting ticket
     Draw_Ticket_Threshold = 15  # the threshold of number of cars to draw ticket cards
+    Paths_Per_Ticket = 10  # the number of cheapest paths for each ticket combined when planning
+    Prune_Dominated_Paths = False  # only combine paths that aren't dominated, which may miss some cheaper paths
+    Use_Steiner_Networks = False  # plan with the cheapest networks for all tickets instead of combining paths
+    Num_Steiner_Networks = 5  # the number of networks to choose from when planning with them
+    Path_Cache_Size = 128  # the number of sets of tickets whose paths are remembered until a claim changes them
     gui_debug = False
 
-    def __init__(self, name):
-        Player.__init__(self, name)
+    def __init__(self, name, seed=None):
+        Player.__init__(self, name, seed=seed)
         self.city_edges, self.edges = board.create_board()
+        self.compiled_board = board.compile_board(self.city_edges)
         self.path = None
         self.path_costs = {}
-        self.edge_costs = {}
+        self.edge_costs = []
         self.all_paths = []
         self.info = None
         self.edge_claims = None
+        self.claims = None
         self.action_history = []
         self.cards_needed = Counter()
         self.remaining_edge = []
@@ -52,12 +60,20 @@ class CFBaseAI(Player):
         self.player_cars_count = {}
         self.possible_cards = []
         self.bug_showed = False
+        self.path_cache = None
+        self.planned_destinations = []
 
     def initialize_game(self, game):
         # if self.gui_debug:
         #     self.gui = GUI()
         self.opponent_name = game.get_opponents_name(self)
         self.face_up_cards = game.get_face_up_cards()
+        # Use the game's board, so edge ids always agree with the game's claims.
+        self.compiled_board = game.get_board()
+        # Remember the paths found for tickets, dropping them when claims change them.
+        self.path_cache = PathCache(self.Path_Cache_Size)
+        game.subscribe(EventType.edge_claimed, self.path_cache.edge_claimed)
+        game.subscribe(EventType.edge_unclaimed, self.path_cache.edge_unclaimed)
 
     def take_turn(self, game):
         """
@@ -66,11 +82,13 @@ class CFBaseAI(Player):
         :return:
         """
         # Update game state first
-        self.info = game.get_player_info(self)
-        self.edge_claims = game.get_edge_claims()
+        view = game.get_view()
+        self.info = view.get_player_info(self)
+        self.edge_claims = view.get_edge_claims()
+        self.claims = view.get_claims()
         self.available_actions = game.get_available_actions(self)
-        self.face_up_cards = game.get_face_up_cards()
-        self.action_remaining = game.get_remaining_actions(self)
+        self.face_up_cards = view.get_face_up_cards()
+        self.action_remaining = view.get_remaining_actions(self)
         self.player_cars_count = game.get_player_car_counts()
 
         # possible cards include hand cards and face-up-cards
@@ -97,34 +115,41 @@ class CFBaseAI(Player):
         :param game:
         :return:
         """
-        edge_claims = self.edge_claims
+        claims = self.claims
         info = self.info
+        edges = self.compiled_board.edges
         # Get the costs for all edges.
-        for edge in edge_claims:
-            if edge_claims[edge] == self.name:
-                self.edge_costs[edge] = 0
-            else:
-                self.edge_costs[edge] = self.eval_edge(edge, self.all_paths, game)
+        self.edge_costs = [0 if owner == self.name else self.eval_edge(edges[edge_id], self.all_paths, game)
+                           for edge_id, owner in enumerate(claims)]
 
         # Make sure that none of the edges in the path have been taken by an opponent.
         self.path_clear = True
 
         if self.path is not None:
-            for edge in self.path.edges:
-                if edge_claims[edge] != self.name and edge_claims[edge] is not None:
+            for edge_id in self.path.edge_ids:
+                if claims[edge_id] != self.name and claims[edge_id] is not None:
                     self.path_clear = False
                     # pass
 
         # Get the path to work with only if it either does not exist or one of the old path's routes has been taken.
         # if we have destination cards, plan a path based on them
         if info.destinations:
-            if self.path is not None:
-                if self.path_clear:
-                    self.re_eval_path(game)
-                else:
-                    self.path, self.all_paths = self.find_best_path(game, info.destinations)
+            new_destinations = [destination for destination in info.destinations
+                                if destination not in self.planned_destinations]
+            if self.path is not None and self.path_clear and not new_destinations:
+                # Destinations completed since the paths were planned stay planned until the paths are planned again.
+                self.re_eval_path(game)
             else:
-                self.path, self.all_paths = self.find_best_path(game, info.destinations)
+                self.path = None
+                # Only plan for the new destinations, extending the paths for the ones already planned, unless the
+                # paths also connect destinations completed since.
+                if self.path_clear and self.all_paths and \
+                        all(destination in info.destinations for destination in self.planned_destinations):
+                    self.path, self.all_paths = self.add_to_best_path(game, new_destinations)
+                # The paths may not be extendable to every new destination.
+                if self.path is None:
+                    self.path, self.all_paths = self.find_best_path(game, info.destinations)
+                self.planned_destinations = list(info.destinations)
         else:  # else we don't have path
             self.path = None
 
@@ -179,7 +204,7 @@ class CFBaseAI(Player):
                 actions = self.on_cant_select_edge(game)
 
         # Randomly select the action from available actions.
-        action = actions[randrange(0, len(actions))]
+        action = actions[self.rng.randrange(0, len(actions))]
 
         return action
 
@@ -199,11 +224,31 @@ class CFBaseAI(Player):
             return path, all_paths
 
         info = self.info
-        edge_claims = self.edge_claims
 
         # Get all paths.
-        all_paths = find_paths_for_destinations(destinations, self.city_edges, info.num_cars, player=self,
-                                                edge_claims=edge_claims, sort_paths=False)
+        if self.path_cache is not None:
+            all_paths = self.path_cache.get(destinations, self.name, info.num_cars)
+        else:
+            all_paths = None
+
+        if all_paths is None:
+            cities = set(city for destination in destinations for city in (destination.city1, destination.city2))
+            if self.Use_Steiner_Networks and len(cities) <= MAX_TERMINALS:
+                all_paths, candidate_mask = find_steiner_networks(destinations, self.city_edges, info.num_cars,
+                                                                  player=self, edge_claims=self.claims,
+                                                                  board=self.compiled_board,
+                                                                  num_networks=self.Num_Steiner_Networks,
+                                                                  candidate_mask=True)
+            else:
+                all_paths, candidate_mask = find_paths_for_destinations(destinations, self.city_edges, info.num_cars,
+                                                                        player=self, edge_claims=self.claims,
+                                                                        sort_paths=False, board=self.compiled_board,
+                                                                        num_paths=self.Paths_Per_Ticket,
+                                                                        prune_dominated=self.Prune_Dominated_Paths,
+                                                                        candidate_mask=True)
+
+            if self.path_cache is not None:
+                self.path_cache.put(destinations, self.name, info.num_cars, all_paths, candidate_mask)
         path_costs = {}
         # Get the costs for all paths.
         for path in all_paths:
@@ -216,6 +261,31 @@ class CFBaseAI(Player):
 
         return path, all_paths
 
+    def add_to_best_path(self, game, destinations):
+        """
+        Extend the paths planned for the current destinations to new destinations, instead of finding paths for every
+        destination again.  Edges already in the paths cost nothing more.
+        :param game: the game
+        :param destinations: the new destination cards
+        :return: return the best path and all of the extended paths
+        """
+        all_paths = self.all_paths
+        for destination in destinations:
+            all_paths = add_destination(all_paths, destination, self.city_edges, self.info.num_cars, player=self,
+                                        edge_claims=self.claims, board=self.compiled_board,
+                                        num_paths=self.Paths_Per_Ticket, prune_dominated=self.Prune_Dominated_Paths)
+
+        path_costs = {}
+        # Get the costs for all paths.
+        for path in all_paths:
+            path_costs[path] = self.eval_path(path, all_paths, self.edge_costs, game)
+
+        all_paths.sort(key=lambda path: path_costs[path])
+
+        path = all_paths[0] if all_paths else None
+
+        return path, all_paths
+
     def re_eval_path(self, game):
         """
         re-evaluate the path of all_paths to accommodate the changes in the game
@@ -255,19 +325,11 @@ class CFBaseAI(Player):
         :param path: the path to check
         :return: bool, True if a path can complete the destination card
         """
-        pseudo_claims = copy.copy(self.edge_claims)
-        for edges in path.edges:
-            pseudo_claims[edges] = self.name
-
-        success = True
-        for destination in self.info.destinations:
-            if connected(destination.city1, destination.city2, self.city_edges, pseudo_claims, self):
-                continue
-            else:
-                success = False
-                break
+        city_ids = self.compiled_board.city_ids
+        destinations = [(city_ids[destination.city1], city_ids[destination.city2])
+                        for destination in self.info.destinations]
 
-        return success
+        return game.get_connectivity(self).all_connected_with(destinations, path.edge_ids)
 
     def game_ended(self, game):
         pass
@@ -280,8 +342,8 @@ class CFBaseAI(Player):
 
         :param path: The path to calculate cost for.
         :param all_paths: The list of all paths.
-        :param edge_costs: A dictionary containing the costs of all edges.  The key is an edge and the value is it's
-        cost.  Edges claimed by the player will have 0 cost.
+        :param edge_costs: A list containing the costs of all edges, indexed by edge id in the compiled board.  Edges
+        claimed by the player will have 0 cost.
         :param game: The game object.
         :return: An integer for the cost of the path.  Lower numbers mean the path is more likely to be selected.
         """
@@ -344,7 +406,8 @@ class CFBaseAI(Player):
         will call `on_cant_select_edge`.
         """
         # Default: Select random edge that is playable.
-        edge_claims = self.edge_claims
+        claims = self.claims
+        edges = self.compiled_board.edges
         info = self.info
 
         all_connection_actions = []
@@ -352,11 +415,11 @@ class CFBaseAI(Player):
         cards_needed = self.get_cards_needed(self.path)
 
         # get all the connection action first
-        for edge in self.path.edges:
+        for edge_id in self.path.edge_ids:
 
-            # if edge_claims[edge] != self.name:
-            if edge_claims[edge] is None:
-                connection_actions = Game.all_connection_actions(edge, info.hand.cards, info.num_cars)
+            # if claims[edge_id] != self.name:
+            if claims[edge_id] is None:
+                connection_actions = Game.all_connection_actions(edges[edge_id], info.hand.cards, info.num_cars)
 
                 # Using the first possible action means we will try the action that uses the least wilds.
                 if connection_actions:
@@ -526,11 +589,12 @@ class CFBaseAI(Player):
         # cards_needed = {i: 0 for i in range(9)}
         cards_needed = Counter()
         if path is not None:
-            for edge in path.edges:
+            compiled_board = self.compiled_board
+            for edge_id in path.edge_ids:
                 # if we already have this edge, we don't need this card anymore
-                if self.edge_claims[edge] == self.name:
+                if self.claims[edge_id] == self.name:
                     continue
-                cards_needed[edge.color] += edge.cost
+                cards_needed[compiled_board.edge_color[edge_id]] += compiled_board.edge_cost[edge_id]
         return cards_needed
 
     def get_extra_hand_cards(self, game):
@@ -619,13 +683,29 @@ class CFBaseAI(Player):
         # TODO: Consider possibility of taking more than one.
         # TODO: Consider the current hand card in cost function
         destination_cost = []
-
-        for destination in destinations:
-            path, all_path = self.find_best_path(game, [destination])
-            if path is None:
-                destination_cost.append(float("inf"))
-            else:
-                destination_cost.append(path.cost)
+        shortest_paths = game.get_shortest_paths(self)
+        city_ids = self.compiled_board.city_ids
+
+        # With a path planned, each destination costs the cars it adds to the planned paths.  Without one, the cheapest
+        # path for each destination is looked up, instead of searching for all of its paths.
+        if self.path is not None and self.all_paths and \
+                all(destination in self.info.destinations for destination in self.planned_destinations):
+            planned_cost = sum(self.get_cards_needed(self.path).itervalues())
+            for destination in destinations:
+                paths = add_destination(self.all_paths, destination, self.city_edges, self.info.num_cars,
+                                        player=self, edge_claims=self.claims, board=self.compiled_board,
+                                        num_paths=self.Paths_Per_Ticket, prune_dominated=self.Prune_Dominated_Paths)
+                if paths:
+                    destination_cost.append(min(path.cost for path in paths) - planned_cost)
+                else:
+                    destination_cost.append(float("inf"))
+        else:
+            for destination in destinations:
+                cost = shortest_paths.distance(city_ids[destination.city1], city_ids[destination.city2])
+                if cost > self.info.num_cars:
+                    destination_cost.append(float("inf"))
+                else:
+                    destination_cost.append(cost)
 
         index = destination_cost.index(min(destination_cost))
         selected_destinations = destinations[index]
@@ -642,8 +722,10 @@ class CFBaseAI(Player):
         :return: A sub-list of the destinations passed in with at least one element.
         """
         # selecting the best combination of ticket cards by using cost - K * score
-        self.info = game.get_player_info(self)
-        self.edge_claims = game.get_edge_claims()
+        view = game.get_view()
+        self.info = view.get_player_info(self)
+        self.edge_claims = view.get_edge_claims()
+        self.claims = view.get_claims()
         combinations = [[0, 1], [1, 2], [0, 2], [0, 1, 2]]
         possible_destination_comb = []
         costs = []
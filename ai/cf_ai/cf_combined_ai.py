@@ -1,5 +1,3 @@
-from random import randrange
-
 import game.board as board
 from game import Player, Game
 from game.actions import *
@@ -20,8 +18,8 @@ class CFCombinedAI(CFActionEvalAI):
     T_Multi_Edge_Penalty = 20  # the penalty of having multiple threaten edge
     gui_debug = False
 
-    def __init__(self, name):
-        CFActionEvalAI.__init__(self, name)
+    def __init__(self, name, seed=None):
+        CFActionEvalAI.__init__(self, name, seed)
 
     def eval_threatened_edges(self):
         """
@@ -1,5 +1,3 @@
-from random import randrange
-
 import game.board as board
 from game import Player, Game
 from game.actions import *
@@ -14,9 +12,9 @@ class CFOpponentEstimation(CFActionEvalAI):
     Destination_Threshold = 15
     Wild_Card_Value = 2
     Wild_Card_Cost = 7
-    def __init__(self, name):
-        CFActionEvalAI.__init__(self, name)
-        self.all_destination = shuffle_destinations()
+    def __init__(self, name, seed=None):
+        CFActionEvalAI.__init__(self, name, seed)
+        self.all_destination = shuffle_destinations(self.rng)
 
 
     def make_decision(self,game):
@@ -41,4 +39,4 @@ class CFOpponentEstimation(CFActionEvalAI):
         return action
 
     def estimation_destination_card(self,game):
-        self.history = game.get_history()
+        self.history = game.get_view().get_history()
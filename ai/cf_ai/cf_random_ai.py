@@ -1,5 +1,3 @@
-from random import randrange
-
 import game.board as board
 from game import Player, Game
 from game.actions import *
@@ -21,8 +19,8 @@ class CFRandomAI(CFBaseAI):
     be overridden, and correspond to the behavior under certain conditions when taking an edge is not possible.
     """
 
-    def __init__(self, name):
-        CFBaseAI.__init__(self, name)
+    def __init__(self, name, seed=None):
+        CFBaseAI.__init__(self, name, seed)
 
 
     def eval_path(self, path, all_paths, edge_costs, game):
@@ -31,8 +29,8 @@ class CFRandomAI(CFBaseAI):
 
         :param path: The path to calculate cost for.
         :param all_paths: The list of all paths.
-        :param edge_costs: A dictionary containing the costs of all edges.  The key is an edge and the value is it's
-        cost.  Edges claimed by the player will have 0 cost.
+        :param edge_costs: A list containing the costs of all edges, indexed by edge id in the compiled board.  Edges
+        claimed by the player will have 0 cost.
         :param game: The game object.
         :return: An integer for the cost of the path.  Lower numbers mean the path is more likely to be selected.
         """
@@ -65,18 +63,19 @@ class CFRandomAI(CFBaseAI):
         actions = []
         best_action =[]
 
-        edge_claims = self.edge_claims
+        claims = self.claims
+        edges = self.compiled_board.edges
         info = self.info
 
-        for edge in self.path.edges:
-            if edge_claims[edge] != self.name:
-                connection_actions = Game.all_connection_actions(edge, info.hand.cards, info.num_cars)
+        for edge_id in self.path.edge_ids:
+            if claims[edge_id] != self.name:
+                connection_actions = Game.all_connection_actions(edges[edge_id], info.hand.cards, info.num_cars)
 
                 # Using the first possible action means we will try the action that uses the least wilds.
                 if connection_actions:
                     actions.append(connection_actions[0])
         if actions:
-            best_action.append(actions[randrange(0, len(actions))])
+            best_action.append(actions[self.rng.randrange(0, len(actions))])
 
         # return actions
         return best_action
@@ -1,4 +1,3 @@
-from random import randrange
 from time import sleep
 
 from game import Player, FailureCause
@@ -9,7 +8,7 @@ class RandomAI(Player):
         actions = game.get_available_actions(self)
 
         # Randomly select the action from available actions.
-        action_to_perform = actions[randrange(0, len(actions))]
+        action_to_perform = actions[self.rng.randrange(0, len(actions))]
         return action_to_perform
 
     def game_ended(self, game):
@@ -0,0 +1,60 @@
+"""
+Measures how many games per second are played by random players, with Game and RandomAI and with BatchGame.
+
+Run from the root of the repository with `python -m benchmarks.batch_throughput`.
+"""
+import argparse
+from time import time
+
+import numpy as np
+
+from ai.random_ai import RandomAI
+from drivers.driver import Driver
+from game import Game
+from game.batch import BatchGame
+
+
+def game_throughput(num_games, seed=0, maximum_rounds=5000):
+    """
+    Play games with Game and 2 RandomAI players.
+
+    :param num_games: The number of games to play.
+    :param seed: The seed of the first game.  Games are seeded with consecutive seeds.
+    :param maximum_rounds: The maximum number of rounds of every game.
+    :return: The number of games played per second.
+    """
+    players = [RandomAI("Random 1"), RandomAI("Random 2")]
+    driver = Driver(players, use_gui=False, print_debug=False, exception_on_bad_action=False)
+
+    start = time()
+    for i in range(num_games):
+        driver.play_turns_headless(Game(players, maximum_rounds, seed=seed + i))
+
+    return num_games / (time() - start)
+
+
+def batch_throughput(num_games, seed=0, maximum_rounds=5000):
+    """
+    Play games with BatchGame, choosing actions uniformly at random.
+
+    :param num_games: The number of games to play at once.
+    :param seed: The seed of the first game.  Games are seeded with consecutive seeds.
+    :param maximum_rounds: The maximum number of rounds of every game.
+    :return: The number of games played per second.
+    """
+    start = time()
+    batch = BatchGame(range(seed, seed + num_games), maximum_rounds=maximum_rounds)
+    batch.play_random(np.random.RandomState(seed))
+
+    return num_games / (time() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure games per second with random players.")
+    parser.add_argument("--games", type=int, default=50, help="Games to play with Game.")
+    parser.add_argument("--batch", type=int, default=1000, help="Games to play at once with BatchGame.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first game.")
+    args = parser.parse_args()
+
+    print "Game:      %8.1f games/sec" % game_throughput(args.games, args.seed)
+    print "BatchGame: %8.1f games/sec" % batch_throughput(args.batch, args.seed)
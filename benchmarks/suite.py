@@ -0,0 +1,225 @@
+"""
+Benchmarks for the engine, pathfinding and AI decisions.  Every benchmark uses fixed seeds, so runs on the same machine
+measure the same work, and results are saved as JSON to compare against a baseline.
+
+Run from the root of the repository with:
+
+    python -m benchmarks.suite run --output baseline.json
+    python -m benchmarks.suite run --output current.json --only find_paths
+    python -m benchmarks.suite compare baseline.json current.json
+"""
+import argparse
+import json
+import re
+import sys
+from itertools import combinations_with_replacement, islice
+from random import Random
+from timeit import Timer
+
+from ai.cf_ai.cf_action_eval_ai import CFActionEvalAI
+from ai.cf_ai.cf_adversarial_ai import AdversarialAI
+from ai.cf_ai.cf_base_ai import CFBaseAI
+from ai.cf_ai.cf_combined_ai import CFCombinedAI
+from ai.cf_ai.cf_random_ai import CFRandomAI
+from ai.random_ai import RandomAI
+from drivers.driver import Driver
+from game import Game, create_board
+from game.board import compile_board, get_scoring
+from game.cards import shuffle_destinations
+from game.methods import find_paths, find_paths_for_destinations, get_threatened_edges, iter_cheapest_paths
+
+SEED = 0
+MAXIMUM_ROUNDS = 1000
+
+# The number of turns played before benchmarking decisions in the middle of a game.
+MID_GAME_TURNS = 30
+
+AIS = [("Random", RandomAI), ("CFRandom", CFRandomAI), ("CFBase", CFBaseAI), ("CFActionEval", CFActionEvalAI),
+       ("Adversarial", AdversarialAI), ("CFCombined", CFCombinedAI)]
+
+
+def play_turns(game, turns):
+    """
+    Let the players of a game take turns.
+
+    :param game: The game.
+    :param turns: The number of turns to play.
+    :return: The game.
+    """
+    while not game.is_game_over()[0] and game.get_rounds_played() < turns:
+        player = game.get_current_player()
+        game.perform_action(player, player.take_turn(game))
+
+    return game
+
+
+def mid_game(players, seed=SEED):
+    """
+    :param players: The players.
+    :param seed: The seed of the game.
+    :return: A game with MID_GAME_TURNS turns played, where it is the first player's turn.
+    """
+    game = play_turns(Game(players, MAXIMUM_ROUNDS, seed=seed), MID_GAME_TURNS)
+    while not game.is_game_over()[0] and game.get_current_player() is not players[0]:
+        player = game.get_current_player()
+        game.perform_action(player, player.take_turn(game))
+
+    return game
+
+
+def find_paths_case(num_destinations):
+    city_edges, edges = create_board()
+    board = compile_board(city_edges)
+    destinations = shuffle_destinations(Random(SEED))[:num_destinations]
+
+    if num_destinations == 1:
+        return lambda: find_paths(destinations[0].city1, destinations[0].city2, city_edges, Game.DEFAULT_NUM_CARS,
+                                  get_scoring(), board=board)
+
+    return lambda: find_paths_for_destinations(destinations, city_edges, Game.DEFAULT_NUM_CARS, get_scoring(),
+                                               board=board)
+
+
+def cheapest_paths_case(num_paths):
+    city_edges, edges = create_board()
+    board = compile_board(city_edges)
+    destination = shuffle_destinations(Random(SEED))[0]
+
+    return lambda: list(islice(iter_cheapest_paths(destination.city1, destination.city2, city_edges, get_scoring(),
+                                                   board=board, max_cost=Game.DEFAULT_NUM_CARS), num_paths))
+
+
+def threatened_edges_case():
+    players = [RandomAI("Random 1"), RandomAI("Random 2")]
+    game = mid_game(players)
+    edge_claims = game.get_edge_claims()
+
+    return lambda: get_threatened_edges(players[1].name, edge_claims)
+
+
+def available_actions_case():
+    players = [RandomAI("Random 1"), RandomAI("Random 2")]
+    game = mid_game(players)
+
+    return lambda: game.get_available_actions(players[0])
+
+
+def take_turn_case():
+    players = [CFBaseAI("CF Base"), RandomAI("Random")]
+    game = mid_game(players)
+
+    return lambda: players[0].take_turn(game)
+
+
+def game_case(ai1, ai2):
+    driver = Driver([], use_gui=False, print_debug=False, exception_on_bad_action=False)
+
+    def play():
+        players = [ai1[1](ai1[0] + " 1"), ai2[1](ai2[0] + " 2")]
+        driver.play_turns_headless(Game(players, MAXIMUM_ROUNDS, seed=SEED))
+
+    return play
+
+
+def cases():
+    """
+    :return: A list of tuples with the name of every benchmark, a function that sets it up and returns the function to
+    time, and the number of times to call that function per repeat.
+    """
+    result = [("find_paths", lambda: find_paths_case(1), 1),
+              ("find_paths_for_destinations.2", lambda: find_paths_case(2), 1),
+              ("find_paths_for_destinations.3", lambda: find_paths_case(3), 1),
+              ("iter_cheapest_paths.10", lambda: cheapest_paths_case(10), 10),
+              ("get_threatened_edges", threatened_edges_case, 100),
+              ("get_available_actions", available_actions_case, 100),
+              ("CFBaseAI.take_turn", take_turn_case, 1)]
+
+    for ai1, ai2 in combinations_with_replacement(AIS, 2):
+        result.append(("game.%s_vs_%s" % (ai1[0], ai2[0]), lambda ai1=ai1, ai2=ai2: game_case(ai1, ai2), 1))
+
+    return result
+
+
+def run(only=None, repeat=3):
+    """
+    Run the benchmarks.
+
+    :param only: An optional regular expression.  Only benchmarks with names it matches are run.
+    :param repeat: The number of times to repeat every benchmark.  The fastest repeat is kept.
+    :return: A dictionary with the results, which can be saved as JSON.
+    """
+    results = {}
+    for name, setup, number in cases():
+        if only is not None and not re.search(only, name):
+            continue
+
+        seconds = min(Timer(setup()).repeat(repeat, number)) / number
+        results[name] = {"seconds": seconds, "number": number, "repeat": repeat}
+        print "%-40s %12.6f s" % (name, seconds)
+
+    return {"python": sys.version.split()[0], "seed": SEED, "results": results}
+
+
+def compare(baseline, current, threshold=0.1):
+    """
+    Compare the results of 2 runs, printing the change of every benchmark.
+
+    :param baseline: The results of the baseline run.
+    :param current: The results of the current run.
+    :param threshold: How much slower a benchmark has to be, as a fraction, to be flagged as a regression.
+    :return: A list of the names of the benchmarks that regressed.
+    """
+    regressions = []
+    print "%-40s %12s %12s %9s" % ("Benchmark", "Baseline", "Current", "Change")
+
+    for name in sorted(set(baseline["results"]) | set(current["results"])):
+        if name not in baseline["results"] or name not in current["results"]:
+            print "%-40s %s" % (name, "only in current" if name in current["results"] else "only in baseline")
+            continue
+
+        before = baseline["results"][name]["seconds"]
+        after = current["results"][name]["seconds"]
+        change = after / before - 1 if before > 0 else 0.0
+
+        flag = ""
+        if change > threshold:
+            flag = "REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "improved"
+
+        print "%-40s %12.6f %12.6f %+8.1f%% %s" % (name, before, after, change * 100, flag)
+
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the engine, pathfinding and AI decisions.")
+    subparsers = parser.add_subparsers(dest="command")
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks and save the results as JSON.")
+    run_parser.add_argument("--output", help="The file to save the results to.")
+    run_parser.add_argument("--only", help="Only run benchmarks with names matching this regular expression.")
+    run_parser.add_argument("--repeat", type=int, default=3, help="Times to repeat every benchmark.")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare results against a baseline.")
+    compare_parser.add_argument("baseline", help="The JSON file with the baseline results.")
+    compare_parser.add_argument("current", help="The JSON file with the current results.")
+    compare_parser.add_argument("--threshold", type=float, default=0.1,
+                                help="Fraction a benchmark has to slow down by to be a regression.")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        results = run(args.only, args.repeat)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+
+        if compare(baseline, current, args.threshold):
+            sys.exit(1)
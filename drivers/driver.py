@@ -1,11 +1,13 @@
+from random import Random
 from time import time, sleep
 from game import Game
 from game.classes import FailureCause
+from game.latency import LatencyRecorder, Phase
 
 
 class Driver:
     def __init__(self, players, use_gui=True, print_debug=True, exception_on_bad_action=True, pause_between_turns=0,
-                 maximum_rounds=1000):
+                 maximum_rounds=1000, seed=None, record_latency=False):
         self.players = players
         self.use_gui = use_gui
         self.print_debug = print_debug
@@ -17,6 +19,12 @@ class Driver:
         self.game = None
         self.game_start_time = 0
 
+        # Seeds for the games are drawn from here, so a driver with a seed always plays the same games.
+        self.rng = Random(seed)
+
+        # Times how long players take to decide, if enabled.  Shared by every game the driver plays.
+        self.latency = LatencyRecorder() if record_latency else None
+
         # Enable or Turn off player's debug
         for player in self.players:
             player.print_debug = print_debug
@@ -26,7 +34,8 @@ class Driver:
         self.play_game(self.game)
 
     def create_game(self):
-        return Game(self.players, self.maximum_rounds, self.print_debug)
+        return Game(self.players, self.maximum_rounds, self.print_debug, seed=self.rng.getrandbits(32),
+                    latency=self.latency)
 
     def play_game(self, game):
         self.game_start_time = time()
@@ -36,48 +45,90 @@ class Driver:
             self.game_gui = gui.GUI()
             game.gui = self.game_gui  # I thought this would not be too terrible
 
-        # Main game loop.  Tells players when to take their turn.
+        # Main game loop.  Without anything to show or wait for, skip straight to the players.
+        if self.use_gui or self.print_debug or self.pause_between_turns > 0:
+            self.play_turns(game)
+        else:
+            self.play_turns_headless(game)
+
+        self.game_over(game)
+        if self.use_gui:
+            self.game_gui.close()
+
+    def play_turns(self, game):
+        """
+        Tells players when to take their turn until the game is over, updating the GUI and printing debug information
+        along the way.
+
+        :param game: The game.
+        """
         while not game.is_game_over()[0]:
-            for player in self.players:
-                if game.is_turn(player):
-                    action_to_perform = player.take_turn(game)
+            player = game.get_current_player()
+            action_to_perform = self.take_turn(game, player)
 
-                    player_info = game.get_player_info(player)
-                    if self.use_gui:
-                        self.game_gui.update(game)
+            player_info = game.get_view().get_player_info(player)
+            if self.use_gui:
+                self.game_gui.update(game)
 
+            # Perform action.
+            action_result = game.perform_action(player, action_to_perform)
 
-                    # Perform action.
-                    action_result = game.perform_action(player, action_to_perform)
+            player.on_action_complete(game, action_result)
 
-                    player.on_action_complete(game, action_result)
+            # Print results.  This happens after the action is performed so the timing is correct when drawing
+            # destinations.
+            if self.print_debug:
+                game.print_face_up_cards()
+                print "Player %s: %s\nDoing Action: %s" % \
+                      (player.name, player_info, action_to_perform)
 
-                    # Print results.  This happens after the action is performed so the timing is correct when drawing
-                    # destinations.
-                    if self.print_debug:
-                        game.print_face_up_cards()
-                        print "Player %s: %s\nDoing Action: %s" % \
-                              (player.name, player_info, action_to_perform)
+                debug_print = player.debug_print(game)
 
-                        debug_print = player.debug_print(game)
+                if debug_print != "":
+                    print debug_print
 
-                        if debug_print != "":
-                            print debug_print
+                print ""
 
-                        print ""
+            # If the action fails, raise an exception indicating what went wrong.
+            if not action_result[0] and self.exception_on_bad_action:
+                raise Exception("Failure", FailureCause.str(action_result[1]))
 
-                    # If the action fails, raise an exception indicating what went wrong.
-                    if not action_result[0] and self.exception_on_bad_action:
-                        raise Exception("Failure", FailureCause.str(action_result[1]))
+            if self.pause_between_turns > 0:
+                sleep(self.pause_between_turns)
 
-                    if self.pause_between_turns > 0:
-                        sleep(self.pause_between_turns)
+    def play_turns_headless(self, game):
+        """
+        Tells players when to take their turn until the game is over, doing nothing else.
 
-                    break
+        :param game: The game.
+        """
+        while not game.is_game_over()[0]:
+            player = game.get_current_player()
+            action_result = game.perform_action(player, self.take_turn(game, player))
 
-        self.game_over(game)
-        if self.use_gui:
-            self.game_gui.close()
+            player.on_action_complete(game, action_result)
+
+            # If the action fails, raise an exception indicating what went wrong.
+            if not action_result[0] and self.exception_on_bad_action:
+                raise Exception("Failure", FailureCause.str(action_result[1]))
+
+    def take_turn(self, game, player):
+        """
+        Ask a player for its action, timing how long it takes if latencies are recorded.
+
+        :param game: The game.
+        :param player: The player whose turn it is.
+        :return: The action the player chose.
+        """
+        if self.latency is None:
+            return player.take_turn(game)
+
+        start = time()
+        action = player.take_turn(game)
+        self.latency.record(player.name, "take_turn: %s" % action.__class__.__name__,
+                            Phase.from_cars(game.get_player_car_counts()[player.name]), time() - start)
+
+        return action
 
     def game_over(self, game):
         # Game's over.  Tell the players and print out some results.
@@ -1,21 +1,120 @@
-from collections import deque, Counter
-from copy import copy, deepcopy
+from collections import deque, Counter, namedtuple
+from copy import deepcopy
+from multiprocessing import Pool
+import numpy as np
 from drivers.driver import Driver
-from game import init_decks, Game, create_board
+from drivers.memory_report import MemoryReport
+from game import Game, create_board
+from game.events import EventType
 from logging.csv_log import CSVLog
+from logging.npy_log import NpyLog
+
+
+class LogLevel:
+    """
+    Used as an enum to hold how much a LogDriver logs.  Every level also logs everything the levels before it do.
+    """
+
+    def __init__(self):
+        pass
+
+    # One row per game, and also one row per turn in a separate log.
+    games, turns = range(2)
+
+
+class ResultsFormat:
+    """
+    Used as an enum to hold the formats a LogDriver can log the results of games in.
+    """
+
+    def __init__(self):
+        pass
+
+    # A CSV file, or NumPy arrays saved by an NpyLog.  In the arrays, players are referred to by their index in the
+    # 'players' array, and every column with a value per player is in seat order.
+    csv, npy = range(2)
+
+# The seeds of a game to play, and how many times the original players are rotated for it.  deck_seed and
+# destinations_seed are None if the game only uses its own seed.
+PlannedGame = namedtuple("PlannedGame", "number rotation seed deck_seed destinations_seed")
+
+# The results of a game.  Apart from the seed and winner, every field is a list in seat order.
+GameResult = namedtuple("GameResult", "seed players scores draws connects cars route_points destination_points "
+                                      "destination_deductions winner")
+
+
+def _play_games(args):
+    """
+    Play some planned games in a worker process.  The players are built by the player factory, so nothing but the
+    settings has to be pickled.
+
+    :param args: A tuple of the keyword arguments for the LogDriver, the player factory and a list of PlannedGames.
+    :return: A tuple of a list of tuples of the GameResult and the rows for the turn and memory logs of every game, in
+    the same order as the planned games, and the LatencyRecorder of the worker's driver, or None.
+    """
+    settings, player_factory, planned_games = args
+    driver = LogDriver(player_factory(), write_logs=False, **settings)
+    driver.copy_players = True
+
+    return [(driver.play_planned_game(planned), driver.turn_rows, driver.memory_rows)
+            for planned in planned_games], driver.latency
 
 
 class LogDriver(Driver):
     def __init__(self, players, use_gui, iterations=1, switch_order=True, replay_deck=True, replay_destinations=True,
-                 print_debug=False, exception_on_bad_action=True, pause_between_turns=0, maximum_rounds=1000):
+                 print_debug=False, exception_on_bad_action=True, pause_between_turns=0, maximum_rounds=1000,
+                 seed=None, processes=1, player_factory=None, log_level=LogLevel.games, flush_every=100,
+                 write_logs=True, results_format=ResultsFormat.csv, shard_size=10000, record_latency=False,
+                 memory_report=False):
+        """
+        :param processes: The number of processes to play the games in.  With more than 1, the games are sharded
+        across a process pool and the results are merged in the order the games would be played in 1 process.
+        :param player_factory: A function that takes no parameters and returns a new list of players like `players`.
+        Needed with more than 1 process, since every worker builds its own players.  It has to be picklable, e.g. a
+        module level function.
+        :param log_level: How much to log, from LogLevel.
+        :param flush_every: The number of rows appended to a log between flushes to disk, or 0 to only flush when the
+        buffer fills up.
+        :param write_logs: False to play the games without creating any logs.
+        :param results_format: The format to log the results of games in, from ResultsFormat.  The turn log is always
+        a CSV file.
+        :param shard_size: The number of games in every shard of the results, if they're saved by an NpyLog.
+        :param record_latency: True to time every decision of the players, and log histograms of the latencies by
+        player, decision and phase of the game once all games are played.
+        :param memory_report: True to measure the memory used by every game and count calls to deepcopy, and log them
+        next to the results.  See MemoryReport.  This slows games down considerably.
+        """
         Driver.__init__(self, players, use_gui, print_debug, exception_on_bad_action, pause_between_turns,
-                        maximum_rounds)
+                        maximum_rounds, seed, record_latency)
+
+        if processes > 1 and player_factory is None:
+            raise ValueError("A player factory is needed to play games in more than 1 process.")
+        if processes > 1 and use_gui:
+            raise ValueError("Games played in more than 1 process can't use the GUI.")
 
         self.iterations = iterations
         self.switch_order = switch_order
         self.replay_deck = replay_deck
         self.replay_destinations = replay_destinations
+        self.processes = processes
+        self.player_factory = player_factory
         self.original_players = deepcopy(self.players)
+        # True to start every game with fresh copies of the original players, so the results don't depend on which
+        # games were played before it in the same process.  Games in a process pool always do, and games with the
+        # players rotated always get copies.  Otherwise the same players play every game.
+        self.copy_players = False
+        self.log_level = log_level
+        self.write_logs = write_logs
+        self.results_format = results_format
+        self.player_indices = {player.name: i for i, player in enumerate(self.players)}
+
+        # The results of the last game played, and the rows for the turn and memory logs kept while playing it.
+        self.result = None
+        self.game_number = 0
+        self.turn_rows = []
+        self.turn_actions = []
+        self.memory_report = MemoryReport() if memory_report else None
+        self.memory_rows = []
 
         self.wins = Counter({player.name: 0 for player in self.players})
 
@@ -37,78 +136,275 @@ class LogDriver(Driver):
         # Create a name for the log file created.
         name = "i%d_s%s_deck%s_dest%s" % (iterations, "T" if switch_order else "F", "T" if replay_deck else "F",
                                           "T" if replay_destinations else "F")
+        self.log_name = name
+
+        self.csv_log = None
+        self.npy_log = None
+        self.turn_log = None
+        self.memory_log = None
+        if write_logs:
+            if results_format == ResultsFormat.npy:
+                per_player = (np.int32, (len(self.players),))
+                self.npy_log = NpyLog(name, shard_size, seed=(np.int64, ()), seat_order=(np.int16, per_player[1]),
+                                      scores=per_player, draws=per_player, connects=per_player, cars=per_player,
+                                      route_points=per_player, destination_points=per_player,
+                                      destination_deductions=per_player, winner=(np.int16, ()))
+                self.npy_log.save_array("players", [player.name for player in self.players])
+            else:
+                self.csv_log = CSVLog(name, *header_list, flush_every=flush_every)
 
-        self.csv_log = CSVLog(name, *header_list)
+            if log_level >= LogLevel.turns:
+                self.turn_log = CSVLog(name + "_turns", "Game", "Round", "Player", "Actions", "Score",
+                                       "Cars Remaining", "Cards in Hand", flush_every=flush_every)
+
+            if memory_report:
+                self.memory_log = CSVLog(name + "_memory", "Game", "Measurement", "Site", "Value",
+                                         flush_every=flush_every)
 
     def run_game(self):
+        planned_games = self.plan_games()
+
+        if self.processes > 1:
+            results = self.play_games_in_pool(planned_games)
+            if self.write_logs:
+                for result, turn_rows, memory_rows in results:
+                    self.log_result(result)
+                    self.log_turns(turn_rows)
+                    self.log_memory(memory_rows)
+        else:
+            for planned in planned_games:
+                self.play_planned_game(planned)
+
+        if self.write_logs:
+            (self.csv_log or self.npy_log).write()
+            if self.turn_log is not None:
+                self.turn_log.write()
+            if self.memory_log is not None:
+                self.memory_log.write()
+            if self.latency is not None:
+                self.log_latency()
+
+    def plan_games(self):
+        """
+        Draw the seeds of every game the driver plays, in order.
+
+        :return: A list of PlannedGames.
+        """
+        planned_games = []
+
         # Play the number of games specified by iterations value.
         for i in range(self.iterations):
 
             if self.switch_order:
-                # The game should be played with the same deck and destinations, but the players rotated.
-                deck, destinations = init_decks()
+                # The game should be played with the same deck and destinations, but the players rotated.  Replaying
+                # them only takes their seeds.
+                deck_seed = self.rng.getrandbits(32)
+                destinations_seed = self.rng.getrandbits(32)
 
-                # Use a deque to rotate the players.
-                player_deque = deque(deepcopy(self.original_players))
                 for j in range(len(self.original_players)):
-                    print "Starting Game", i * 2 + j + 1
-                    print ""
-
                     # If the deck should not be replayed, don't replay it.
                     if not self.replay_deck:
-                        deck = init_decks()[0]
+                        deck_seed = self.rng.getrandbits(32)
 
                     # If the destinations should not be replayed, don't replay them.
                     if not self.replay_destinations:
-                        destinations = init_decks()[1]
+                        destinations_seed = self.rng.getrandbits(32)
 
                     # Play the same game over for the different players.
-                    player_deque.rotate(1)
-
-                    self.players = list(deepcopy(player_deque))
-                    game = self.create_custom_game(self.players, deepcopy(deck), deepcopy(destinations))
-                    self.play_game(game)
+                    planned_games.append(PlannedGame(i * len(self.original_players) + j + 1, j + 1,
+                                                     self.rng.getrandbits(32), deck_seed, destinations_seed))
             else:
                 # Just play one game.
-                self.play_game(self.create_game())
+                planned_games.append(PlannedGame(i + 1, 0, self.rng.getrandbits(32), None, None))
+
+        return planned_games
+
+    def play_planned_game(self, planned):
+        """
+        Play a planned game.
 
-        self.csv_log.write()
+        :param planned: The PlannedGame.
+        :return: The GameResult.
+        """
+        print "Starting Game", planned.number
+        print ""
+        self.game_number = planned.number
+
+        if self.memory_report is not None:
+            self.memory_report.start()
+
+        if planned.rotation or self.copy_players:
+            # Use a deque to rotate the players.
+            player_deque = deque(deepcopy(self.original_players))
+            player_deque.rotate(planned.rotation)
+            self.players = list(player_deque)
+
+        if planned.deck_seed is None:
+            game = Game(self.players, self.maximum_rounds, self.print_debug, seed=planned.seed, latency=self.latency)
+        else:
+            game = self.create_seeded_game(self.players, planned.seed, planned.deck_seed, planned.destinations_seed)
+
+        self.play_game(game)
+
+        if self.memory_report is not None:
+            self.memory_report.stop()
+            self.memory_rows = [[planned.number] + row for row in self.memory_report.rows()]
+            if self.write_logs:
+                self.log_memory(self.memory_rows)
+
+        return self.result
+
+    def play_games_in_pool(self, planned_games):
+        """
+        Play planned games in a pool of processes.
+
+        :param planned_games: A list of PlannedGames.
+        :return: A list of tuples of the GameResult and the rows for the turn and memory logs of every game, in the same
+        order as the planned games.
+        """
+        settings = dict(use_gui=False, switch_order=self.switch_order, print_debug=self.print_debug,
+                        exception_on_bad_action=self.exception_on_bad_action, maximum_rounds=self.maximum_rounds,
+                        log_level=self.log_level, record_latency=self.latency is not None,
+                        memory_report=self.memory_report is not None)
+
+        # A few shards per process, so a process that finishes early can pick up more work.
+        num_shards = min(len(planned_games), self.processes * 4)
+        shards = [planned_games[i::num_shards] for i in range(num_shards)]
+
+        results = [None] * len(planned_games)
+        pool = Pool(self.processes)
+        try:
+            for i, (shard_results, latency) in enumerate(pool.imap(_play_games, [(settings, self.player_factory, shard)
+                                                                                 for shard in shards])):
+                results[i::num_shards] = shard_results
+                if latency is not None:
+                    self.latency.merge(latency)
+        finally:
+            pool.terminate()
+            pool.join()
+
+        return results
+
+    def play_game(self, game):
+        self.turn_rows = []
+        self.turn_actions = []
+        if self.log_level >= LogLevel.turns:
+            game.subscribe(EventType.action_performed, self.action_performed)
+
+        Driver.play_game(self, game)
+
+    def action_performed(self, game, event):
+        """
+        Keep the actions of the current turn, and add a row for the turn log once the turn is over.  Actions are
+        published after the turn they end is over, so the row can't be added when the turn ended event is.
+        """
+        if event.result[0]:
+            self.turn_actions.append(str(event.action))
+
+        if game.get_current_player().name != event.player_name or game.is_game_over()[0]:
+            self.turn_rows.append([self.game_number, game.get_rounds_played(), event.player_name,
+                                   "; ".join(self.turn_actions), game.get_visible_scores()[event.player_name],
+                                   game.get_player_car_counts()[event.player_name],
+                                   game.get_player_hand_counts()[event.player_name]])
+            self.turn_actions = []
 
     def game_over(self, game):
         Driver.game_over(self, game)
 
-        self.wins[self.winner] += 1
+        self.result = self.game_result(game)
+        if self.write_logs:
+            self.log_result(self.result)
+            self.log_turns(self.turn_rows)
 
-        # Log results of game.
+    def game_result(self, game):
+        """
+        :param game: A game that's over.
+        :return: The GameResult of the game.
+        """
         scores = game.get_visible_scores()
-        log_line = []
+        view = game.get_view()
+        infos = [view.get_player_info(player) for player in self.players]
 
-        # Output each player and their scores.
+        return GameResult(game.get_seeds()[0], [player.name for player in self.players],
+                          [scores[player.name] for player in self.players], [info.draws for info in infos],
+                          [info.connects for info in infos], [info.num_cars for info in infos],
+                          [info.get_route_points() for info in infos],
+                          [info.get_destination_points() for info in infos],
+                          [info.get_destination_deductions() for info in infos], game.is_game_over()[1])
+
+    def log_result(self, result):
+        """
+        Count the winner of a game and add its results to the log.
+
+        :param result: The GameResult.
+        """
+        self.winner = result.winner
+        self.wins[result.winner] += 1
 
-        self.add_line_for_players(log_line, lambda player, idx: player.name)
-        self.add_line_for_players(log_line, lambda player, idx: scores[player.name])
-        self.add_line_for_players(log_line, lambda player, idx: game.get_player_info(player).draws)
-        self.add_line_for_players(log_line, lambda player, idx: game.get_player_info(player).connects)
-        self.add_line_for_players(log_line, lambda player, idx: game.get_player_info(player).num_cars)
-        self.add_line_for_players(log_line, lambda player, idx: game.get_player_info(player).get_route_points())
-        self.add_line_for_players(log_line, lambda player, idx: game.get_player_info(player).get_destination_points())
-        self.add_line_for_players(log_line,
-                                  lambda player, idx: game.get_player_info(player).get_destination_deductions())
-        self.add_line_for_players(log_line,
-                                  lambda player, idx: "%.2f" %
-                                                      (self.wins[player.name] / float(sum(self.wins.values()))))
-        log_line.append(game.is_game_over()[1])
+        if self.npy_log is not None:
+            self.npy_log.append(seed=result.seed, seat_order=[self.player_indices[name] for name in result.players],
+                                scores=result.scores, draws=result.draws, connects=result.connects, cars=result.cars,
+                                route_points=result.route_points, destination_points=result.destination_points,
+                                destination_deductions=result.destination_deductions,
+                                winner=self.player_indices.get(result.winner, -1))
+            return
+
+        # Output each player and their scores.
+        total_wins = float(sum(self.wins.values()))
+        log_line = result.players + result.scores + result.draws + result.connects + result.cars + \
+            result.route_points + result.destination_points + result.destination_deductions + \
+            ["%.2f" % (self.wins[name] / total_wins) for name in result.players] + [result.winner]
 
         # Add line to log.
         self.csv_log.append(*log_line)
 
+    def log_turns(self, turn_rows):
+        """
+        Add the rows for the turns of a game to the turn log, if there is one.
+
+        :param turn_rows: The rows kept while playing the game.
+        """
+        if self.turn_log is not None:
+            for row in turn_rows:
+                self.turn_log.append(*row)
+
+    def log_memory(self, memory_rows):
+        """
+        Add the rows of a game's memory report to the memory log, if there is one.
+
+        :param memory_rows: The rows of the memory report.
+        """
+        if self.memory_log is not None:
+            for row in memory_rows:
+                self.memory_log.append(*row)
+
+    def log_latency(self):
+        """
+        Log the histograms of how long the players took to decide, and print them.
+        """
+        titles = ["Player", "Decision", "Phase", "Calls", "p50 (ms)", "p95 (ms)", "Max (ms)", "Mean (ms)"]
+        latency_log = CSVLog(self.log_name + "_latency", *titles)
+
+        print "Decision Latency:"
+        for row in self.latency.rows():
+            latency_log.append(*row)
+            print "%-20s %-40s %-8s %6d %10s %10s %10s" % tuple(row[:7])
+        print ""
+
+        latency_log.write()
+
     def add_line_for_players(self, log_line, func):
         i = 0
         for player in self.players:
             log_line.append(func(player, i))
             i += 1
 
+    def create_seeded_game(self, players, seed, deck_seed, destinations_seed):
+        return Game(players=players, maximum_rounds=self.maximum_rounds, print_debug=self.print_debug, seed=seed,
+                    deck_seed=deck_seed, destinations_seed=destinations_seed, latency=self.latency)
+
     def create_custom_game(self, players, deck, destinations):
         city_edges, edges = create_board()
         return Game(players=players, maximum_rounds=self.maximum_rounds, print_debug=self.print_debug,
-                    custom_settings=True, deck=deck, destinations=destinations, city_edges=city_edges, edges=edges)
+                    custom_settings=True, deck=deck, destinations=destinations, city_edges=city_edges, edges=edges,
+                    latency=self.latency)
@@ -0,0 +1,102 @@
+import copy
+import gc
+import os
+import sys
+from collections import Counter
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class MemoryReport:
+    """
+    Measures the memory used while playing a game, and counts calls to deepcopy by the line they were called from.
+
+    With tracemalloc (Python 3, or Python 2 with the pytracemalloc backport), the peak traced memory and the memory
+    allocated by the source lines that allocated the most are reported.  Without it, the peak resident size of the
+    process and the growth in the number of live objects by type are reported instead.  Calls to deepcopy are counted
+    with a profile function, which slows everything down, so reports should only be made when asked for.
+    """
+
+    # The number of source lines or types reported.
+    TOP = 10
+
+    def __init__(self):
+        self.deepcopy_calls = Counter()
+        self._root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self._copy_file = copy.deepcopy.__code__.co_filename
+        self._objects = None
+        self._rows = []
+
+    def start(self):
+        """
+        Start measuring.
+        """
+        self.deepcopy_calls.clear()
+        self._rows = []
+
+        if tracemalloc is not None:
+            tracemalloc.start()
+        else:
+            self._objects = self._count_objects()
+
+        sys.setprofile(self._profile)
+
+    def stop(self):
+        """
+        Stop measuring.
+        """
+        sys.setprofile(None)
+
+        if tracemalloc is not None:
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            self._rows.append(["Peak Traced (KB)", "", peak / 1024])
+            for statistic in snapshot.statistics("lineno")[:self.TOP]:
+                frame = statistic.traceback[0]
+                self._rows.append(["Allocated (KB)", "%s:%d" % (self._site(frame.filename), frame.lineno),
+                                   statistic.size / 1024])
+        else:
+            if resource is not None:
+                self._rows.append(["Peak Resident (KB)", "", resource.getrusage(resource.RUSAGE_SELF).ru_maxrss])
+
+            growth = self._count_objects()
+            growth.subtract(self._objects)
+            self._objects = None
+            for type_name, count in growth.most_common(self.TOP):
+                if count > 0:
+                    self._rows.append(["New Objects", type_name, count])
+
+        for site, count in self.deepcopy_calls.most_common():
+            self._rows.append(["Deepcopy Calls", site, count])
+
+    def rows(self):
+        """
+        :return: A list of rows with the kind of measurement, the source line or type it's for, if any, and the value.
+        """
+        return list(self._rows)
+
+    def _profile(self, frame, event, arg):
+        # Only count calls to deepcopy from outside the copy module, not the recursive ones.
+        if event == "call" and frame.f_code is copy.deepcopy.__code__:
+            caller = frame.f_back
+            if caller is not None and caller.f_code.co_filename != self._copy_file:
+                self.deepcopy_calls["%s:%d" % (self._site(caller.f_code.co_filename), caller.f_lineno)] += 1
+
+    def _site(self, filename):
+        filename = os.path.abspath(filename)
+        return os.path.relpath(filename, self._root) if filename.startswith(self._root) else filename
+
+    @staticmethod
+    def _count_objects():
+        gc.collect()
+        return Counter(type(obj).__name__ for obj in gc.get_objects())
@@ -0,0 +1,141 @@
+from collections import Counter, Mapping
+from struct import Struct
+
+from actions import DrawDeckAction, DrawFaceUpAction, ConnectAction
+from classes import Colors
+
+
+class RecordType:
+    """
+    Used as an enum to hold the types of records in an action log.
+    """
+
+    def __init__(self):
+        pass
+
+    draw_deck, draw_face_up, connect, draw_destinations, starting_destinations = range(5)
+    type_list = ['Draw Deck', 'Draw Face Up', 'Connect', 'Draw Destinations', 'Starting Destinations']
+
+    @staticmethod
+    def str(record_type):
+        return RecordType.type_list[record_type] if len(RecordType.type_list) > record_type else "Unknown"
+
+
+# Every record is 12 bytes: the index of the player, the type of record, the target, and the number of cards of every
+# color used to connect, in Colors order with wilds last.  The target is the id of the edge in the compiled board, the
+# index of the face up card, or a mask of the destinations kept out of the ones drawn.
+RECORD = Struct("<12B")
+RECORD_FIELDS = ("player", "type", "target", "cards")
+
+# The target or player of a record when there isn't one, or it can't be stored in a byte.
+NONE = 255
+
+# Every log starts with a header holding the maximum number of rounds of the game, since hitting it ends the game.
+HEADER = Struct("<I")
+
+
+def encode_header(maximum_rounds):
+    """
+    :param maximum_rounds: The maximum number of rounds of the game.
+    :return: The encoded header.
+    """
+    return HEADER.pack(min(max(maximum_rounds, 0), 0xFFFFFFFF))
+
+
+def decode_header(log):
+    """
+    :param log: An action log, as returned by Game.get_action_log.
+    :return: The maximum number of rounds of the game.
+    """
+    return HEADER.unpack_from(log)[0]
+
+
+def encode(player_index, record_type, target=NONE, cards=None):
+    """
+    Encode a record.  Card counts are kept between 0 and 255.  Connecting ignores colors with fewer than 1 card, and
+    fails with more than 255 cards of a color since no hand has that many, so the record still plays out the same.
+
+    :param player_index: The index of the player.
+    :param record_type: The type of record, from RecordType.
+    :param target: The id of the edge, index of the face up card or mask of destinations.
+    :param cards: The cards used to connect, if connecting, as a mapping of cards to their counts or a list of cards.
+    :return: The encoded record.
+    """
+    counts = [0] * (Colors.none + 1)
+    if cards is not None:
+        if not isinstance(cards, Mapping):
+            cards = Counter(cards)
+
+        for card in range(Colors.none + 1):
+            counts[card] = min(max(cards[card], 0), NONE)
+
+    return RECORD.pack(player_index if 0 <= player_index < NONE else NONE, record_type,
+                       target if 0 <= target < NONE else NONE, *counts)
+
+
+def destination_mask(selected, possible):
+    """
+    :param selected: The destinations a player kept.
+    :param possible: The destinations the player drew.
+    :return: A mask with a bit set for the index of every destination kept.
+    """
+    return sum(1 << i for i, destination in enumerate(possible) if destination in selected)
+
+
+def decode(log):
+    """
+    Decode a whole action log at once.
+
+    :param log: An action log, as returned by Game.get_action_log.
+    :return: A NumPy structured array with a row per record, and a field for each of RECORD_FIELDS.  The cards field
+    holds an array of the count of every color.
+    """
+    import numpy as np
+
+    return np.frombuffer(log, dtype=np.dtype([("player", np.uint8), ("type", np.uint8), ("target", np.uint8),
+                                              ("cards", np.uint8, (Colors.none + 1,))]), offset=HEADER.size)
+
+
+def iter_records(log):
+    """
+    Decode an action log one record at a time.
+
+    :param log: An action log, as returned by Game.get_action_log.
+    :return: An iterator over tuples of the index of the player, the type of record, the target, and a tuple of the
+    count of every color.
+    """
+    for offset in range(HEADER.size, len(log), RECORD.size):
+        fields = RECORD.unpack_from(log, offset)
+        yield fields[:3] + (fields[3:],)
+
+
+def record_cards(counts):
+    """
+    :param counts: The count of every color, as stored in a record.
+    :return: A Counter of the cards.
+    """
+    return Counter({card: count for card, count in enumerate(counts) if count})
+
+
+def decode_actions(log, board):
+    """
+    Decode an action log into actions.
+
+    :param log: An action log, as returned by Game.get_action_log.
+    :param board: The compiled board of the game.
+    :return: A list of tuples with the index of the player, the type of record, and either the Action, or the mask
+    of destinations kept for destination records.
+    """
+    result = []
+    for player_index, record_type, target, counts in iter_records(log):
+        if record_type == RecordType.draw_deck:
+            result.append((player_index, record_type, DrawDeckAction()))
+        elif record_type == RecordType.draw_face_up:
+            result.append((player_index, record_type, DrawFaceUpAction(target, None)))
+        elif record_type == RecordType.connect:
+            edge = board.edges[target] if target < len(board.edges) else None
+            result.append((player_index, record_type, ConnectAction(edge, record_cards(counts))))
+        else:
+            result.append((player_index, record_type, target))
+
+    return result
@@ -0,0 +1,493 @@
+from collections import Counter
+from random import Random
+
+import numpy as np
+
+from actions import DrawDeckAction, DrawDestinationAction, DrawFaceUpAction, ConnectAction
+from board import create_board, get_scoring, compile_board
+from cards import create_destinations, shuffle_deck, shuffle_destinations
+from classes import Colors, FailureCause
+from game import Game
+
+# Actions are encoded as integers.  Connections are encoded by edge, the color of the non-wild cards (or wild when only
+# wilds are used) and the number of wilds.
+DRAW_DECK = 0
+DRAW_DESTINATIONS = 1
+DRAW_FACE_UP = 2
+CONNECT = DRAW_FACE_UP + 5
+CONNECT_COLORS = Colors.none + 1
+CONNECT_WILDS = 7
+NO_ACTION = -1
+
+# Values in the claims array for unclaimed edges and edges blocked by the rules on double edges.
+UNCLAIMED = -1
+BLOCKED = -2
+
+# States of the destinations a player holds.
+OUTSTANDING = 1
+COMPLETED = 2
+
+
+class BatchGame:
+    """
+    Many games on the standard board stepped together, with the state of all games stored in NumPy arrays.
+
+    Every game follows the rules of `game.game.Game` and is dealt exactly like a Game with the same seed.  Players keep
+    every destination they draw, like the default `Player`.  All games act at once in `step`, each for its current
+    player, and `legal_moves` gives the actions each of them can take.
+    """
+
+    def __init__(self, seeds, num_players=2, maximum_rounds=5000, num_cars=45):
+        """
+        Deals the games.
+
+        :param seeds: The seed of every game, as passed to Game.
+        :param num_players: The number of players in every game.
+        :param maximum_rounds: The maximum number of rounds, as passed to Game.
+        :param num_cars: The number of cars every player starts with.
+        """
+        self.city_edges, self.edges = create_board()
+        self.board = compile_board(self.city_edges)
+        self.num_games = n = len(seeds)
+        self.num_players = num_players
+        self.maximum_rounds = maximum_rounds
+        self.seeds = list(seeds)
+
+        scoring = get_scoring()
+        board = self.board
+        self.edge_city1 = np.array(board.edge_city1, dtype=np.int16)
+        self.edge_city2 = np.array(board.edge_city2, dtype=np.int16)
+        self.edge_cost = np.array(board.edge_cost, dtype=np.int16)
+        self.edge_color = np.array(board.edge_color, dtype=np.int16)
+        self.edge_score = np.array(board.edge_score, dtype=np.int32)
+        double_edges = board.double_edges if num_players < 4 else (None,) * board.num_edges
+        self.double_edges = np.array([UNCLAIMED if edge_id is None else edge_id for edge_id in double_edges],
+                                     dtype=np.int32)
+        self.scoring = scoring
+
+        self.destination_list = create_destinations()
+        self._destination_ids = {destination: i for i, destination in enumerate(self.destination_list)}
+        self.destination_city1 = np.array([board.city_ids[d.city1] for d in self.destination_list], dtype=np.int16)
+        self.destination_city2 = np.array([board.city_ids[d.city2] for d in self.destination_list], dtype=np.int16)
+        self.destination_value = np.array([d.value for d in self.destination_list], dtype=np.int32)
+
+        num_cards = len(shuffle_deck(Random(0)))
+        num_destinations = len(self.destination_list)
+        num_edges = board.num_edges
+        num_cities = len(board.cities)
+
+        # Public state.
+        self.claims = np.full((n, num_edges), UNCLAIMED, dtype=np.int8)
+        self.hands = np.zeros((n, num_players, CONNECT_COLORS), dtype=np.int16)
+        self.cars = np.full((n, num_players), num_cars, dtype=np.int16)
+        self.scores = np.zeros((n, num_players), dtype=np.int32)
+        self.visible_scores = np.zeros((n, num_players), dtype=np.int32)
+        self.draws = np.zeros((n, num_players), dtype=np.int32)
+        self.connects = np.zeros((n, num_players), dtype=np.int32)
+        self.face_up = np.zeros((n, 5), dtype=np.int8)
+        self.current = np.zeros(n, dtype=np.int8)
+        self.remaining = np.full(n, 2, dtype=np.int8)
+        self.rounds = np.zeros(n, dtype=np.int32)
+        self.over = np.zeros(n, dtype=bool)
+
+        # Piles, popped from the end like the lists in Game.
+        self.deck = np.zeros((n, num_cards), dtype=np.int8)
+        self.deck_size = np.zeros(n, dtype=np.int32)
+        self.discards = np.zeros((n, num_cards), dtype=np.int8)
+        self.discards_size = np.zeros(n, dtype=np.int32)
+        self.destination_deck = np.zeros((n, num_destinations), dtype=np.int16)
+        self.destination_deck_size = np.zeros(n, dtype=np.int32)
+
+        # Destinations held by every player, and their state.
+        self.destinations = np.zeros((n, num_players, 3), dtype=np.int16)
+        self.destination_states = np.zeros((n, num_players, 3), dtype=np.int8)
+        self.destination_counts = np.zeros((n, num_players), dtype=np.int32)
+
+        # The connected component of every city for every player.
+        self.components = np.tile(np.arange(num_cities, dtype=np.int16), (n, num_players, 1))
+
+        self._deck_rngs = []
+        self._destinations_rngs = []
+
+        for g, seed in enumerate(self.seeds):
+            # Derive the streams exactly like Game does.
+            rng = Random(seed)
+            deck_rng = Random(rng.getrandbits(32))
+            destinations_rng = Random(rng.getrandbits(32))
+            self._deck_rngs.append(deck_rng)
+            self._destinations_rngs.append(destinations_rng)
+
+            deck = shuffle_deck(deck_rng)
+            destinations = [self._destination_ids[d] for d in shuffle_destinations(destinations_rng)]
+
+            self.face_up[g] = [deck.pop() for _ in range(5)]
+            for p in range(num_players):
+                for _ in range(Game.STARTING_HAND_SIZE):
+                    self.hands[g, p, deck.pop()] += 1
+                starting = [destinations.pop() for _ in range(3)]
+                self.destinations[g, p] = starting
+                self.destination_states[g, p] = OUTSTANDING
+                self.destination_counts[g, p] = 3
+                self.scores[g, p] = -self.destination_value[starting].sum()
+
+            self._set_pile(self.deck, self.deck_size, g, deck)
+            self._set_pile(self.destination_deck, self.destination_deck_size, g, destinations)
+
+    def legal_moves(self):
+        """
+        Get the actions every game's current player can take.  These are the distinct valid actions among those
+        returned by Game.get_available_actions.
+
+        :return: A boolean array with a row for every game and a column for every encoded action.
+        """
+        n = self.num_games
+        num_edges = self.board.num_edges
+        moves = np.zeros((n, CONNECT + num_edges * CONNECT_COLORS * CONNECT_WILDS), dtype=bool)
+
+        live = ~self.over
+        two = live & (self.remaining == 2)
+        one = live & (self.remaining == 1)
+
+        moves[live, DRAW_DECK] = True
+        moves[two, DRAW_DESTINATIONS] = True
+        moves[two, DRAW_FACE_UP:CONNECT] = True
+        moves[one, DRAW_FACE_UP:CONNECT] = self.face_up[one] != Colors.none
+
+        rows = np.flatnonzero(two)
+        if rows.size:
+            players = self.current[rows]
+            hands = self.hands[rows, players]
+            wilds = hands[:, Colors.none]
+            cost = self.edge_cost
+            wild_counts = np.arange(CONNECT_WILDS)
+
+            # Shape (games, edges, colors, wilds).
+            colored = np.zeros((rows.size, num_edges, CONNECT_COLORS, CONNECT_WILDS), dtype=bool)
+            color_allowed = (self.edge_color[:, None] == Colors.none) | \
+                            (self.edge_color[:, None] == np.arange(Colors.none)[None, :])
+            needed = cost[:, None] - wild_counts[None, :]
+            colored[:, :, :Colors.none, :] = color_allowed[None, :, :, None] & \
+                (wild_counts[None, None, None, :] < cost[None, :, None, None]) & \
+                (wild_counts[None, None, None, :] <= wilds[:, None, None, None]) & \
+                (hands[:, None, :Colors.none, None] >= needed[None, :, None, :])
+            colored[:, :, Colors.none, :] = (wild_counts[None, None, :] == cost[None, :, None]) & \
+                (wilds[:, None, None] >= cost[None, :, None])
+
+            available = (self.claims[rows] == UNCLAIMED) & (self.cars[rows, players][:, None] >= cost[None, :])
+            colored &= available[:, :, None, None]
+            moves[rows, CONNECT:] = colored.reshape(rows.size, -1)
+
+        return moves
+
+    def random_actions(self, random_state, moves=None):
+        """
+        Pick a legal action uniformly at random for every game, like RandomAI does.
+
+        :param random_state: A numpy RandomState.
+        :param moves: The legal moves, if they were already computed.
+        :return: An array with an encoded action for every game, or NO_ACTION for games that are over.
+        """
+        if moves is None:
+            moves = self.legal_moves()
+
+        # Legal moves are sparse, so pick among the positions of the legal moves of every game.
+        rows, columns = np.nonzero(moves)
+        counts = np.bincount(rows, minlength=self.num_games)
+        offsets = np.cumsum(counts) - counts
+        picks = offsets + np.floor(random_state.random_sample(self.num_games) * counts).astype(np.int64)
+
+        actions = np.full(self.num_games, NO_ACTION, dtype=np.int64)
+        actions[counts > 0] = columns[picks[counts > 0]]
+
+        return actions
+
+    def step(self, actions):
+        """
+        Perform an action in every game for its current player.
+
+        :param actions: An array with an encoded action for every game.
+        :return: An array with the FailureCause of every action, which is FailureCause.none when it succeeded.
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        causes = np.full(self.num_games, FailureCause.no_action, dtype=np.int8)
+        causes[self.over] = FailureCause.game_over
+        live = ~self.over
+
+        rows = np.flatnonzero(live & (actions == DRAW_DECK))
+        if rows.size:
+            causes[rows] = self._draw_deck(rows)
+
+        rows = np.flatnonzero(live & (actions >= DRAW_FACE_UP) & (actions < CONNECT))
+        if rows.size:
+            causes[rows] = self._draw_face_up(rows, actions[rows] - DRAW_FACE_UP)
+
+        rows = np.flatnonzero(live & (actions >= CONNECT))
+        if rows.size:
+            causes[rows] = self._connect(rows, actions[rows] - CONNECT)
+
+        rows = np.flatnonzero(live & (actions == DRAW_DESTINATIONS))
+        if rows.size:
+            causes[rows] = self._draw_destinations(rows)
+
+        return causes
+
+    def play_random(self, random_state):
+        """
+        Play every game to the end with uniformly random actions.
+
+        :param random_state: A numpy RandomState.
+        :return: The number of steps taken.
+        """
+        steps = 0
+        while not self.over.all():
+            self.step(self.random_actions(random_state))
+            steps += 1
+
+        return steps
+
+    def winners(self):
+        """
+        :return: The index of the player with the highest visible score in every game.  Ties go to the first player.
+        """
+        return np.argmax(self.visible_scores, axis=1)
+
+    def encode(self, action):
+        """
+        Encode an action.
+
+        :param action: An Action.
+        :return: The encoded action.
+        """
+        if action.is_draw_deck():
+            return DRAW_DECK
+        if action.is_draw_destination():
+            return DRAW_DESTINATIONS
+        if action.is_draw_face_up():
+            return DRAW_FACE_UP + action.index
+        if action.is_connect():
+            colors = [card for card in action.cards if card != Colors.none and action.cards[card] > 0]
+            color = colors[0] if colors else Colors.none
+            edge_id = self.board.edge_ids[action.edge]
+            return CONNECT + (edge_id * CONNECT_COLORS + color) * CONNECT_WILDS + action.cards[Colors.none]
+        return NO_ACTION
+
+    def decode(self, game, code):
+        """
+        Decode an action.
+
+        :param game: The index of the game, which is needed for the face up cards.
+        :param code: The encoded action.
+        :return: The Action.
+        """
+        if code == DRAW_DECK:
+            return DrawDeckAction()
+        if code == DRAW_DESTINATIONS:
+            return DrawDestinationAction()
+        if DRAW_FACE_UP <= code < CONNECT:
+            return DrawFaceUpAction(code - DRAW_FACE_UP, int(self.face_up[game, code - DRAW_FACE_UP]))
+
+        edge_id, rest = divmod(int(code) - CONNECT, CONNECT_COLORS * CONNECT_WILDS)
+        color, wilds = divmod(rest, CONNECT_WILDS)
+        edge = self.board.edges[edge_id]
+        if color == Colors.none:
+            return ConnectAction(edge, Counter({Colors.none: wilds}))
+        return ConnectAction(edge, Counter({color: edge.cost - wilds, Colors.none: wilds}))
+
+    def _draw_deck(self, rows):
+        players = self.current[rows]
+        self._refill_empty_decks(rows)
+
+        cards = self._pop(self.deck, self.deck_size, rows)
+        self.hands[rows, players, cards] += 1
+
+        self._use_actions(rows, 1)
+        self._check_decks(rows)
+        self.draws[rows, players] += 1
+
+        return FailureCause.none
+
+    def _draw_face_up(self, rows, indices):
+        causes = np.full(rows.size, FailureCause.none, dtype=np.int8)
+        self._refill_empty_decks(rows)
+
+        # Wilds require 2 actions.
+        cards = self.face_up[rows, indices]
+        failed = (cards == Colors.none) & (self.remaining[rows] == 1)
+        causes[failed] = FailureCause.already_drew
+
+        rows, indices, cards = rows[~failed], indices[~failed], cards[~failed]
+        players = self.current[rows]
+        self.hands[rows, players, cards] += 1
+        self.face_up[rows, indices] = self._pop(self.deck, self.deck_size, rows)
+
+        self._use_actions(rows, np.where(cards == Colors.none, 2, 1))
+        self._check_decks(rows)
+        self.draws[rows, players] += 1
+
+        return causes
+
+    def _connect(self, rows, codes):
+        causes = np.full(rows.size, FailureCause.none, dtype=np.int8)
+        pending = np.ones(rows.size, dtype=bool)
+
+        def fail(failed, cause):
+            failed = failed & pending
+            causes[failed] = cause
+            pending[failed] = False
+
+        edge_ids, rest = np.divmod(codes, CONNECT_COLORS * CONNECT_WILDS)
+        colors, wilds = np.divmod(rest, CONNECT_WILDS)
+        players = self.current[rows]
+        cost = self.edge_cost[edge_ids]
+        edge_color = self.edge_color[edge_ids]
+
+        # The cards are {color: cost - wilds, wild: wilds}, or just {wild: wilds} for the wild color.
+        colored = colors != Colors.none
+        counts = np.where(colored, cost - wilds, 0)
+        hands = self.hands[rows, players]
+        color_counts = hands[np.arange(rows.size), np.where(colored, colors, Colors.none)]
+
+        fail(self.remaining[rows] != 2, FailureCause.already_drew)
+        owners = self.claims[rows, edge_ids]
+        fail((owners != UNCLAIMED) & (owners != players), FailureCause.already_claimed_opponent)
+        fail(owners == players, FailureCause.already_claimed_self)
+        in_hand = (hands[:, Colors.none] >= wilds) & (~colored | (color_counts >= counts))
+        fail(~in_hand, FailureCause.missing_cards)
+
+        # Match the cards to the edge like Game.cards_match_exact.
+        positive = np.maximum(counts, 0)
+        total = positive + wilds
+        matching_color = np.where(colored & (colors == edge_color), positive, 0)
+        matches = np.where(edge_color == Colors.none, total == cost, (matching_color + wilds == cost) & (total == cost))
+        fail(~matches, FailureCause.incompatible_cards)
+        fail(self.cars[rows, players] < cost, FailureCause.insufficient_cars)
+
+        rows, edge_ids, colors, players = rows[pending], edge_ids[pending], colors[pending], players[pending]
+        positive, wilds, cost = positive[pending], wilds[pending], cost[pending]
+        if not rows.size:
+            return causes
+
+        # Claim the edge, and block its double.
+        self.claims[rows, edge_ids] = players
+        doubles = self.double_edges[edge_ids]
+        has_double = doubles != UNCLAIMED
+        self.claims[rows[has_double], doubles[has_double]] = BLOCKED
+
+        # Lose the cards, discarding them in the order of Counter.elements.  That follows the order of a small
+        # dictionary, where wilds come first unless the other color is red, which shares their slot.
+        self.hands[rows, players, colors] -= np.where(colors != Colors.none, positive, 0)
+        self.hands[rows, players, Colors.none] -= wilds
+        positions = np.arange(CONNECT_WILDS - 1)[None, :]
+        discarded = np.where(colors[:, None] == Colors.red,
+                             np.where(positions < positive[:, None], colors[:, None], Colors.none),
+                             np.where(positions < wilds[:, None], Colors.none, colors[:, None]))
+        valid = positions < (positive + wilds)[:, None]
+        self._ensure_width("discards", (self.discards_size[rows] + positive + wilds).max())
+        self.discards[np.repeat(rows, valid.sum(axis=1)),
+                      (self.discards_size[rows][:, None] + positions)[valid]] = discarded[valid]
+        self.discards_size[rows] += positive + wilds
+
+        self.cars[rows, players] -= cost
+        points = self.edge_score[edge_ids]
+        self.scores[rows, players] += points
+        self.visible_scores[rows, players] += points
+        self._check_connections(rows, players, edge_ids)
+
+        # Check if the games are over.
+        self._end_games(rows[self.cars[rows, players] <= 3])
+        self._use_actions(rows, 2)
+        self.connects[rows, players] += 1
+
+        return causes
+
+    def _draw_destinations(self, rows):
+        players = self.current[rows]
+        drawn = np.zeros((rows.size, 3), dtype=np.int16)
+        for i in range(3):
+            drawn[:, i] = self._pop(self.destination_deck, self.destination_deck_size, rows)
+            for g in rows[self.destination_deck_size[rows] == 0]:
+                self._set_pile(self.destination_deck, self.destination_deck_size, g,
+                               [self._destination_ids[d] for d in shuffle_destinations(self._destinations_rngs[g])])
+
+        # Players keep every destination they draw.
+        held = self.destination_counts[rows, players]
+        self._ensure_width("destinations", held.max() + 3)
+        for i in range(3):
+            self.destinations[rows, players, held + i] = drawn[:, i]
+            self.destination_states[rows, players, held + i] = OUTSTANDING
+        self.destination_counts[rows, players] += 3
+        self.scores[rows, players] -= self.destination_value[drawn].sum(axis=1)
+
+        self._use_actions(rows, 2)
+
+        return FailureCause.none
+
+    def _check_connections(self, rows, players, edge_ids):
+        # Merge the components of the edge's cities.
+        components = self.components[rows, players]
+        component1 = components[np.arange(rows.size), self.edge_city1[edge_ids]]
+        component2 = components[np.arange(rows.size), self.edge_city2[edge_ids]]
+        components = np.where(components == component2[:, None], component1[:, None], components)
+        self.components[rows, players] = components
+
+        # Complete the outstanding destinations whose cities are now in the same component.
+        destinations = self.destinations[rows, players]
+        states = self.destination_states[rows, players]
+        connected = np.take_along_axis(components, self.destination_city1[destinations], axis=1) == \
+            np.take_along_axis(components, self.destination_city2[destinations], axis=1)
+        completed = (states == OUTSTANDING) & connected
+
+        self.scores[rows, players] += (self.destination_value[destinations] * completed).sum(axis=1) * 2
+        states[completed] = COMPLETED
+        self.destination_states[rows, players] = states
+
+    def _use_actions(self, rows, num_actions):
+        self.remaining[rows] -= num_actions
+
+        # Running out of actions means the turn is over.
+        ended = rows[self.remaining[rows] <= 0]
+        self.rounds[ended] += 1
+        self._end_games(ended[self.rounds[ended] > self.maximum_rounds])
+        self.remaining[ended] = 2
+        self.current[ended] = (self.current[ended] + 1) % self.num_players
+
+    def _end_games(self, rows):
+        self.over[rows] = True
+        self.visible_scores[rows] = self.scores[rows]
+
+    def _refill_empty_decks(self, rows):
+        # Game deals a new deck if there are no cards to draw.
+        for g in rows[self.deck_size[rows] == 0]:
+            self._set_pile(self.deck, self.deck_size, g, shuffle_deck(self._deck_rngs[g]))
+
+    def _check_decks(self, rows):
+        # If a deck is empty, shuffle the discards back in.
+        for g in rows[self.deck_size[rows] == 0]:
+            discards = self.discards[g, :self.discards_size[g]].tolist()
+            self._deck_rngs[g].shuffle(discards)
+            self._set_pile(self.deck, self.deck_size, g, discards)
+            self.discards_size[g] = 0
+
+    def _set_pile(self, pile, sizes, g, cards):
+        if len(cards) > pile.shape[1]:
+            name = "deck" if pile is self.deck else "destination_deck"
+            self._ensure_width(name, len(cards))
+            pile = getattr(self, name)
+        pile[g, :len(cards)] = cards
+        sizes[g] = len(cards)
+
+    @staticmethod
+    def _pop(pile, sizes, rows):
+        sizes[rows] -= 1
+        return pile[rows, sizes[rows]]
+
+    def _ensure_width(self, name, width):
+        # Piles only outgrow their arrays when Game would deal a whole new deck while cards are still in play.
+        array = getattr(self, name)
+        if width > array.shape[-1]:
+            padding = np.zeros(array.shape[:-1] + (width - array.shape[-1],), dtype=array.dtype)
+            setattr(self, name, np.concatenate([array, padding], axis=-1))
+            if name == "destinations":
+                padding = np.zeros(padding.shape, dtype=self.destination_states.dtype)
+                self.destination_states = np.concatenate([self.destination_states, padding], axis=-1)
+
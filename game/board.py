@@ -168,3 +168,125 @@ def get_scoring():
             4: 7,
             5: 10,
             6: 15}
+
+
+class CompiledBoard:
+    """
+    An integer-indexed compilation of a board.  Every distinct city and edge is given a dense id, and the attributes of
+    the edges are stored in tuples indexed by edge id, so hot loops can use plain indexing instead of hashing `Edge`
+    tuples of city names.
+
+    Ids are assigned in sorted order, so two boards compiled from the same edges always agree on them.  Identical edges
+    (same cities, cost and color) share a single id, just like they share a single key in a dictionary of edge claims.
+    """
+
+    def __init__(self, city_edges, scoring=None):
+        """
+        Compiles a board.
+
+        :param city_edges: A dictionary of which cities, as keys, have which edges.
+        :param scoring: The scoring dictionary for the game.  Defaults to the standard scoring.
+        """
+        if scoring is None:
+            scoring = get_scoring()
+
+        # Dense ids for cities and edges, with lookups both ways.
+        self.cities = tuple(sorted(city_edges))
+        self.city_ids = {city: city_id for city_id, city in enumerate(self.cities)}
+        self.edges = tuple(sorted(set(edge for city in city_edges for edge in city_edges[city])))
+        self.edge_ids = {edge: edge_id for edge_id, edge in enumerate(self.edges)}
+        self.num_edges = len(self.edges)
+
+        # Per-edge attributes, indexed by edge id.
+        self.edge_city1 = tuple(self.city_ids[edge.city1] for edge in self.edges)
+        self.edge_city2 = tuple(self.city_ids[edge.city2] for edge in self.edges)
+        self.edge_cost = tuple(edge.cost for edge in self.edges)
+        self.edge_color = tuple(edge.color for edge in self.edges)
+        self.edge_score = tuple(scoring[edge.cost] for edge in self.edges)
+
+        # Outgoing edges of every city, indexed by city id.  Repeated edges are kept so that searches over the compiled
+        # board expand exactly the same edges as searches over city_edges.
+        self.city_edge_ids = tuple(tuple(self.edge_ids[edge] for edge in city_edges[city]) for city in self.cities)
+
+        # The other edge connecting the same two cities, or None.
+        routes = {}
+        for edge_id in range(self.num_edges):
+            routes.setdefault((self.edge_city1[edge_id], self.edge_city2[edge_id]), []).append(edge_id)
+
+        double_edges = [None] * self.num_edges
+        for edge_ids in routes.values():
+            for edge_id1 in edge_ids:
+                for edge_id2 in edge_ids:
+                    if edge_id1 != edge_id2:
+                        double_edges[edge_id1] = edge_id2
+        self.double_edges = tuple(double_edges)
+
+    def other_city(self, edge_id, city_id):
+        """
+        Get the city on the other side of an edge.
+
+        :param edge_id: The id of the edge.
+        :param city_id: The id of the city on one side of the edge.
+        :return: The id of the city on the other side of the edge.
+        """
+        city1 = self.edge_city1[edge_id]
+        return self.edge_city2[edge_id] if city1 == city_id else city1
+
+    def scores_for(self, scoring):
+        """
+        Get the score of every edge under a scoring dictionary.
+
+        :param scoring: The scoring dictionary.
+        :return: A tuple of scores indexed by edge id.
+        """
+        return tuple(scoring[cost] for cost in self.edge_cost)
+
+    def claims_list(self, edge_claims):
+        """
+        Convert edge claims into a list indexed by edge id.
+
+        :param edge_claims: Either a dictionary with edges as keys or a sequence already indexed by edge id.  May be
+        None.
+        :return: A sequence of claims indexed by edge id, or None if edge_claims is None.
+        """
+        if edge_claims is None or isinstance(edge_claims, (list, tuple)):
+            return edge_claims
+        return [edge_claims.get(edge) for edge in self.edges]
+
+    def claims_dict(self, claims):
+        """
+        Convert a sequence of claims indexed by edge id into a dictionary with edges as keys.
+
+        :param claims: The claims indexed by edge id.
+        :return: A dictionary of claims keyed by edge.
+        """
+        return dict(zip(self.edges, claims))
+
+
+# Maximum number of compiled boards to keep cached.
+MAX_COMPILED_BOARDS = 32
+
+_compiled_boards = {}
+
+
+def compile_board(city_edges):
+    """
+    Get the compiled board for a city_edges dictionary.  Compiled boards are cached by the identity of city_edges, so
+    callers that keep passing the same dictionary only pay for compiling it once.
+
+    :param city_edges: A dictionary of which cities, as keys, have which edges.
+    :return: The CompiledBoard.
+    """
+    cached = _compiled_boards.get(id(city_edges))
+
+    # The cache holds on to city_edges, so its id can't have been reused by another dictionary.
+    if cached is not None and cached[0] is city_edges:
+        return cached[1]
+
+    if len(_compiled_boards) >= MAX_COMPILED_BOARDS:
+        _compiled_boards.clear()
+
+    compiled_board = CompiledBoard(city_edges)
+    _compiled_boards[id(city_edges)] = (city_edges, compiled_board)
+
+    return compiled_board
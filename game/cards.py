@@ -1,21 +1,32 @@
-from random import shuffle
+import random
 
 from classes import Destination
 
 
-def init_decks():
+def init_decks(rng=None):
     """
     Initializes all decks
+
+    :param rng: The random number generator to shuffle with.  Uses the random module if not given.
     """
 
-    destinations = shuffle_destinations()
-    deck = shuffle_deck()
+    destinations = shuffle_destinations(rng)
+    deck = shuffle_deck(rng)
 
     return deck, destinations
 
 
-def shuffle_destinations():
-    destinations = [
+def shuffle_destinations(rng=None):
+    destinations = create_destinations()
+    (rng or random).shuffle(destinations)
+    return destinations
+
+
+def create_destinations():
+    """
+    :return: A list of all destinations, in a fixed order.
+    """
+    return [
         Destination("Dallas", "New York", 11),
         Destination("Portland", "Phoenix", 11),
         Destination("Vancouver", "Santa Fe", 13),
@@ -47,12 +58,17 @@ def shuffle_destinations():
         Destination("New York", "Atlanta", 6),
         Destination("Montreal", "New Orleans", 13)
     ]
-    shuffle(destinations)
-    return destinations
 
 
-def shuffle_deck():
-    # Initialize the deck to have 12 of each color and 14 wild cards (which are just cards colored "None").
-    deck = [color for color in range(8)] * 12 + [8] * 14
-    shuffle(deck)
+def shuffle_deck(rng=None):
+    deck = create_deck()
+    (rng or random).shuffle(deck)
     return deck
+
+
+def create_deck():
+    """
+    :return: A list of all cards, in a fixed order.
+    """
+    # Initialize the deck to have 12 of each color and 14 wild cards (which are just cards colored "None").
+    return [color for color in range(8)] * 12 + [8] * 14
@@ -1,4 +1,6 @@
-from collections import namedtuple, Counter
+from collections import namedtuple, Counter, Mapping, MutableMapping
+from itertools import repeat
+from operator import itemgetter
 
 
 class Colors:
@@ -74,23 +76,191 @@ class Destination(namedtuple("Destination", "city1 city2 value")):
         return "(%s, %s, %s)" % (str(self.city1), str(self.city2), str(self.value))
 
 
+class CardCounts(MutableMapping):
+    """
+    The number of cards of every color, stored in a list with one slot per Colors value.  It can be used like a Counter
+    of colors, where the colors with a count other than 0 are the keys.
+    """
+
+    __hash__ = None
+
+    def __init__(self, cards=None):
+        """
+        :param cards: An optional iterable of cards, or a mapping of cards to their counts, to start with.
+        """
+        self.counts = [0] * (Colors.none + 1)
+
+        if cards is not None:
+            self.update(cards)
+
+    def __getitem__(self, card):
+        return self.counts[card]
+
+    def __setitem__(self, card, count):
+        self.counts[card] = count
+
+    def __delitem__(self, card):
+        self.counts[card] = 0
+
+    def __iter__(self):
+        return (card for card, count in enumerate(self.counts) if count)
+
+    def __len__(self):
+        return sum(1 for count in self.counts if count)
+
+    def __contains__(self, card):
+        return 0 <= card < len(self.counts) and self.counts[card] != 0
+
+    def __eq__(self, other):
+        if isinstance(other, CardCounts):
+            return list(self.counts) == list(other.counts)
+        if isinstance(other, Mapping):
+            return {card: count for card, count in self.iteritems() if count} == \
+                   {card: count for card, count in other.iteritems() if count}
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __add__(self, other):
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        result = self.copy()
+        result.update(other)
+        result.counts = [max(count, 0) for count in result.counts]
+        return result
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        result = self.copy()
+        result.subtract(other)
+        result.counts = [max(count, 0) for count in result.counts]
+        return result
+
+    def __rsub__(self, other):
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        return CardCounts(other) - self
+
+    def __repr__(self):
+        return "CardCounts({%s})" % ", ".join("%d: %d" % (card, count) for card, count in self.iteritems() if count)
+
+    def copy(self):
+        result = CardCounts()
+        result.counts = list(self.counts)
+        return result
+
+    def update(self, cards=None):
+        """
+        Add cards, like Counter.update.
+
+        :param cards: An iterable of cards, or a mapping of cards to their counts.
+        """
+        counts = self.counts
+        if isinstance(cards, CardCounts):
+            for card, count in enumerate(cards.counts):
+                counts[card] += count
+        elif isinstance(cards, Mapping):
+            for card, count in cards.iteritems():
+                counts[card] += count
+        elif cards is not None:
+            for card in cards:
+                counts[card] += 1
+
+    def subtract(self, cards=None):
+        """
+        Remove cards, like Counter.subtract.  Counts can become negative.
+
+        :param cards: An iterable of cards, or a mapping of cards to their counts.
+        """
+        counts = self.counts
+        if isinstance(cards, Mapping):
+            for card, count in cards.iteritems():
+                counts[card] -= count
+        elif cards is not None:
+            for card in cards:
+                counts[card] -= 1
+
+    def elements(self):
+        """
+        :return: An iterator over the cards, repeating each as many times as its count.
+        """
+        for card, count in enumerate(self.counts):
+            for element in repeat(card, count):
+                yield element
+
+    def most_common(self, n=None):
+        """
+        :param n: The number of colors to return, or None for all of them.
+        :return: A list of (card, count) tuples from the most common to the least.
+        """
+        result = sorted(self.iteritems(), key=itemgetter(1), reverse=True)
+        return result if n is None else result[:n]
+
+    def total(self):
+        """
+        :return: The number of cards.
+        """
+        return sum(self.counts)
+
+    def can_afford(self, edge):
+        """
+        Determine if there are enough cards to claim an edge in some way.
+
+        :param edge: The edge to check.
+        :return: True if the cards are enough to claim the edge, False otherwise.
+        """
+        counts = self.counts
+        if edge.color == Colors.none:
+            return max(counts[:Colors.none]) + counts[Colors.none] >= edge.cost
+
+        return counts[edge.color] + counts[Colors.none] >= edge.cost
+
+
+class FrozenCardCounts(CardCounts):
+    """
+    Card counts that can't be modified.  Arithmetic and `copy` still work, returning new CardCounts.
+    """
+
+    def __init__(self, cards=None):
+        # CardCounts.__init__ would go through the blocked update method.
+        self.counts = tuple(cards.counts if isinstance(cards, CardCounts) else CardCounts(cards).counts)
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("%s is read-only" % type(self).__name__)
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = subtract = _read_only
+
+
 class Hand:
     def __init__(self, cards):
-        self.cards = Counter(cards)
+        self.cards = CardCounts(cards)
 
     def add_card(self, card):
-        self.cards[card] += 1
+        self.cards.counts[card] += 1
 
     def remove_card(self, card):
-        self.cards[card] = max(self.cards[card] - 1, 0)
+        counts = self.cards.counts
+        counts[card] = max(counts[card] - 1, 0)
 
     def contains_cards(self, cards):
+        counts = self.cards.counts
         for card in cards:
-            if self.cards[card] - cards[card] < 0:
+            if counts[card] - cards[card] < 0:
                 return False
 
         return True
 
+    def can_afford(self, edge):
+        return self.cards.can_afford(edge)
+
+    def __len__(self):
+        return self.cards.total()
+
     def __str__(self):
         return Hand.cards_str(self.cards)
 
@@ -162,6 +332,9 @@ class Path:
         self.cost = 0
         self.score = 0
 
+        # Ids of the edges in the compiled board.  Only known for paths built by game.methods.
+        self.edge_ids = None
+
         for edge in edges:
             # If the player owns the edge, then the there's no cost or score to the edge.
             if player is None or edge_claims is None or edge_claims[edge] != player.name:
@@ -170,6 +343,7 @@ class Path:
 
     def add_edge(self, edge, scoring, player=None, edge_claims=None):
         self.edges.add(edge)
+        self.edge_ids = None
 
         # If the player owns the edge, then the there's no cost or score to the edge.
         if player is None or edge_claims is None or edge_claims[edge] != player.name:
@@ -195,3 +369,51 @@ class HistoryEvent:
 
     def __str__(self):
         return "%s: %s" % (self.player_name, str(self.action))
+
+
+class UndoRecord:
+    """
+    Everything needed to undo an action performed with `Game.apply`.  Only the parts of the game the action can change
+    are recorded, so creating one doesn't depend on the size of the game.
+    """
+
+    def __init__(self, player, action):
+        self.player = player
+        self.action = action
+
+        # The result of performing the action, as returned by Game.perform_action.
+        self.result = None
+
+        # Turn order, round count, game over flag, visible scores, and history and action log lengths.
+        self.turn_state = None
+        self.visible_scores = None
+        self.history_length = 0
+        self.action_log_length = 0
+
+        # Score, cars, draws, connections and card counts of the acting player.
+        self.player_state = None
+        self.destinations = None
+        self.completed_destinations = None
+
+        self.face_up_cards = None
+
+        # Either the tail of a pile, which only gets popped from, or a full copy and the state of the random number
+        # generator if it may be reshuffled.
+        self.deck_length = 0
+        self.deck_tail = None
+        self.deck_copy = None
+        self.deck_rng_state = None
+        self.discards_length = 0
+        self.discards_copy = None
+        self.destination_deck_length = 0
+        self.destination_deck_tail = None
+        self.destination_deck_copy = None
+        self.destinations_rng_state = None
+
+        # Pairs of (edge id, previous owner) for every edge the action may claim.
+        self.claims = ()
+        self.connectivity_mark = 0
+
+        # Markers for the shortest paths tables of every player that had one.
+        self.shortest_paths_marks = {}
+
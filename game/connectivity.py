@@ -0,0 +1,111 @@
+class Connectivity:
+    """
+    Tracks which cities a player's routes connect, using a disjoint-set forest over the cities of a compiled board.
+
+    Claiming an edge merges the sets of its cities, so checking whether 2 cities are connected only needs to find the
+    roots of their sets.  Sets are merged by size and paths aren't compressed, so every merge can be rolled back.  This
+    is what makes hypothetical queries possible without copying any claims.
+    """
+
+    def __init__(self, board):
+        """
+        :param board: The compiled board.
+        """
+        self._board = board
+        self._parents = range(len(board.cities))
+        self._sizes = [1] * len(board.cities)
+
+        # Pairs of (child root, parent root) for every merge, in the order they were made.
+        self._merges = []
+
+    def find(self, city):
+        """
+        :param city: The id of a city.
+        :return: The id of the city at the root of the city's set.
+        """
+        parents = self._parents
+        while parents[city] != city:
+            city = parents[city]
+
+        return city
+
+    def connected(self, city1, city2):
+        """
+        :param city1: The id of the first city.
+        :param city2: The id of the second city.
+        :return: True if the cities are connected, false otherwise.
+        """
+        return self.find(city1) == self.find(city2)
+
+    def add_edge(self, edge_id):
+        """
+        Connect the cities of an edge.
+
+        :param edge_id: The id of the edge in the compiled board.
+        :return: True if the edge connected 2 cities that weren't connected before, false otherwise.
+        """
+        root1 = self.find(self._board.edge_city1[edge_id])
+        root2 = self.find(self._board.edge_city2[edge_id])
+        if root1 == root2:
+            return False
+
+        if self._sizes[root1] > self._sizes[root2]:
+            root1, root2 = root2, root1
+
+        self._parents[root1] = root2
+        self._sizes[root2] += self._sizes[root1]
+        self._merges.append((root1, root2))
+
+        return True
+
+    def mark(self):
+        """
+        :return: A marker for the current state, which can be passed to `rollback`.
+        """
+        return len(self._merges)
+
+    def rollback(self, mark):
+        """
+        Undo every merge made since a marker was taken.
+
+        :param mark: The marker returned by `mark`.
+        """
+        merges = self._merges
+        while len(merges) > mark:
+            child, parent = merges.pop()
+            self._parents[child] = child
+            self._sizes[parent] -= self._sizes[child]
+
+    def connected_with(self, city1, city2, edge_ids):
+        """
+        Determine if 2 cities would be connected if the player claimed some more edges.  The structure is left as it
+        was.
+
+        :param city1: The id of the first city.
+        :param city2: The id of the second city.
+        :param edge_ids: The ids of the edges to pretend are claimed.
+        :return: True if the cities would be connected, false otherwise.
+        """
+        return self.all_connected_with([(city1, city2)], edge_ids)
+
+    def all_connected_with(self, city_pairs, edge_ids):
+        """
+        Determine if every pair of cities would be connected if the player claimed some more edges.  The structure is
+        left as it was.
+
+        :param city_pairs: An iterable of tuples with the ids of 2 cities.
+        :param edge_ids: The ids of the edges to pretend are claimed.
+        :return: True if all of the pairs would be connected, false otherwise.
+        """
+        mark = self.mark()
+        for edge_id in edge_ids:
+            self.add_edge(edge_id)
+
+        try:
+            for city1, city2 in city_pairs:
+                if not self.connected(city1, city2):
+                    return False
+
+            return True
+        finally:
+            self.rollback(mark)
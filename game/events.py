@@ -0,0 +1,90 @@
+from collections import namedtuple
+
+
+class EventType:
+    """
+    Used as an enum to hold the types of events a game publishes.
+    """
+
+    def __init__(self):
+        pass
+
+    action_performed, edge_claimed, card_drawn, destination_completed, turn_ended, game_ended, edge_unclaimed = range(7)
+    type_list = ['Action Performed', 'Edge Claimed', 'Card Drawn', 'Destination Completed', 'Turn Ended', 'Game Ended',
+                 'Edge Unclaimed']
+
+    @staticmethod
+    def str(event_type):
+        return EventType.type_list[event_type] if len(EventType.type_list) > event_type else "Unknown"
+
+
+# The payloads of events only describe what changed.
+
+# An action performed through Game.perform_action, and its result.
+ActionPerformedEvent = namedtuple("ActionPerformedEvent", "player_name action result")
+
+# An edge claimed by a player with the given cards, and the double edge that was blocked, if any.
+EdgeClaimedEvent = namedtuple("EdgeClaimedEvent", "player_name edge edge_id cards score double_edge_id")
+
+# A claim undone with Game.undo, and the double edge it freed, if any.
+EdgeUnclaimedEvent = namedtuple("EdgeUnclaimedEvent", "player_name edge edge_id double_edge_id")
+
+# A card drawn by a player.  For face up cards, the index of the card and the card that replaced it, otherwise None.
+CardDrawnEvent = namedtuple("CardDrawnEvent", "player_name card face_up_index replacement")
+
+# A destination completed by a player.
+DestinationCompletedEvent = namedtuple("DestinationCompletedEvent", "player_name destination")
+
+# The end of a player's turn and the player who goes next.
+TurnEndedEvent = namedtuple("TurnEndedEvent", "player_name next_player_name rounds_played")
+
+# The winner and the final scores.
+GameEndedEvent = namedtuple("GameEndedEvent", "winner scores")
+
+
+class EventBus:
+    """
+    Handlers subscribed to the types of events a game publishes.  Publishers should check `has_subscribers` before
+    building a payload, so events nobody is subscribed to cost next to nothing.
+    """
+
+    def __init__(self):
+        self._handlers = [() for _ in EventType.type_list]
+
+    def subscribe(self, event_type, handler):
+        """
+        Subscribe to a type of event.
+
+        :param event_type: The type of event, from EventType.
+        :param handler: A function that takes the game and the event's payload as parameters.
+        """
+        if handler not in self._handlers[event_type]:
+            self._handlers[event_type] += (handler,)
+
+    def unsubscribe(self, event_type, handler):
+        """
+        Unsubscribe from a type of event.  Does nothing if the handler isn't subscribed.
+
+        :param event_type: The type of event, from EventType.
+        :param handler: The function to unsubscribe.
+        """
+        self._handlers[event_type] = tuple(h for h in self._handlers[event_type] if h != handler)
+
+    def has_subscribers(self, event_type):
+        """
+        :param event_type: The type of event, from EventType.
+        :return: True if anything is subscribed to the type of event, false otherwise.
+        """
+        return bool(self._handlers[event_type])
+
+    def publish(self, event_type, game, payload):
+        """
+        Call every handler subscribed to a type of event.
+
+        :param event_type: The type of event, from EventType.
+        :param game: The game publishing the event.
+        :param payload: The payload of the event.
+        """
+        # Handlers are kept in tuples, so they can unsubscribe while being called.
+        for handler in self._handlers[event_type]:
+            handler(game, payload)
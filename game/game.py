@@ -1,13 +1,20 @@
 import operator
 from collections import Counter
 from copy import deepcopy
-from random import shuffle
+from random import Random, getrandbits
 
+import action_log
+from action_log import RecordType
 from actions import *
-from board import create_board, get_scoring
+from board import create_board, get_scoring, compile_board
 from cards import init_decks, shuffle_deck, shuffle_destinations
-from classes import PlayerInfo, FailureCause, HistoryEvent, Hand
-from methods import connected
+from classes import PlayerInfo, FailureCause, HistoryEvent, Hand, CardCounts, FrozenCardCounts, UndoRecord
+from connectivity import Connectivity
+from events import EventBus, EventType, ActionPerformedEvent, EdgeClaimedEvent, CardDrawnEvent, \
+    DestinationCompletedEvent, TurnEndedEvent, GameEndedEvent, EdgeUnclaimedEvent
+from latency import Phase
+from shortest_paths import ShortestPaths
+from view import GameView, FrozenDict
 
 
 # from gui import GUI
@@ -19,10 +26,24 @@ class Game:
     def __init__(self, players, maximum_rounds=5000, print_debug=False, custom_settings=False, city_edges=None, \
                  edges=None,
                  deck=None,
-                 destinations=None, num_cars=45):
+                 destinations=None, num_cars=45, seed=None, deck_seed=None, destinations_seed=None, latency=None):
+        # Every random choice comes from streams derived from the seed, so the seed and the players are enough to play
+        # the game again.  The deck and destinations can be given seeds of their own to replay just those.
+        if seed is None:
+            seed = getrandbits(32)
+        self._rng = Random(seed)
+        derived_deck_seed = self._rng.getrandbits(32)
+        derived_destinations_seed = self._rng.getrandbits(32)
+        self._seeds = (seed,
+                       deck_seed if deck_seed is not None else derived_deck_seed,
+                       destinations_seed if destinations_seed is not None else derived_destinations_seed)
+        self._deck_rng = Random(self._seeds[1])
+        self._destinations_rng = Random(self._seeds[2])
+
         if not custom_settings:
             self._city_edges, self._edges = create_board()
-            self._deck, self._destinations = init_decks()
+            self._deck = shuffle_deck(self._deck_rng)
+            self._destinations = shuffle_destinations(self._destinations_rng)
             self._num_cars = self.DEFAULT_NUM_CARS
         else:
             self._city_edges = city_edges
@@ -33,25 +54,75 @@ class Game:
             self._num_cars = num_cars
 
         self.print_debug = print_debug
+
+        # An optional LatencyRecorder, which times how long players take to select destinations.
+        self.latency = latency
+
         self._maximum_rounds = maximum_rounds
         self._rounds_count = 0
         self.gui = None
         self._scoring = get_scoring()
-        self._double_edges = dict()
         self._players = players
 
         # Select 5 face up cards.
         # noinspection PyUnusedLocal
         self._face_up_cards = [self._deck.pop() for x in range(5)]
 
-        # Initialize edge claims
-        self._edge_claims = {edge: None for edge in self._edges}
+        # Compile the board so edges can be referred to by id.
+        self._board = compile_board(self._city_edges)
+
+        # Initialize edge claims, indexed by edge id.
+        self._edge_claims = [None] * self._board.num_edges
         if len(players) < 4:  # tracking double edges in 2 and 3 player games
-            self._track_double_edges()
+            self._double_edges = self._board.double_edges
+        else:
+            self._double_edges = (None,) * self._board.num_edges
+
+        # Track the cities connected by each player's routes.
+        self._connectivity = {player.name: Connectivity(self._board) for player in self._players}
+
+        # The shortest paths between all cities for each player, built the first time they're asked for.
+        self._shortest_paths = {}
 
         # Visible scores are set to zero.
         self._visible_scores = {player.name: 0 for player in self._players}
 
+        # Set the first player to have the first turn.
+        self._current_player_index = 0
+
+        # The number of actions the player has left to take this turn.
+        self._num_actions_remaining = 2
+
+        self._game_is_over = False
+
+        # The result of is_game_over, which is cached once the game is over.
+        self._game_over_result = None
+
+        self._discards = []
+
+        # Create the sets for events that will trigger when the game ends or begins.
+        self._turn_ended_events = set()
+        self._game_ended_events = set()
+
+        # Typed events with the changes made by each action.
+        self._events = EventBus()
+
+        # Store a history of all actions taken.
+        self._history = []
+
+        # A compact log of every action attempted, which reconstructs the game together with its seeds.
+        self._action_log = bytearray(action_log.encode_header(maximum_rounds))
+        self._player_indices = {player: i for i, player in enumerate(players)}
+
+        # Connection actions by edge and the cards and cars they depend on, with cards that can't be modified since
+        # every caller shares them.  Cleared whenever an edge is claimed, which bounds it by the hands seen in between.
+        self._connection_actions_cache = {}
+
+        # Snapshots handed out to players, which are reset whenever the state they describe changes.
+        self._view = None
+        self._claims_snapshot = None
+        self._double_edges_snapshot = None
+
         # Initialize info for all players.
         self._player_info = {}
         for player in players:
@@ -66,75 +137,120 @@ class Game:
             hand = Hand([self._deck.pop() for x in range(self.STARTING_HAND_SIZE)])
             player_info.hand = hand
 
+        # Every player selects before any selection is applied, so the state, and any view of it, doesn't change until
+        # they all have.
+        selections = []
+        for player in players:
             # Give each player 3 destinations.
             possible_destinations = [self._destinations.pop(), self._destinations.pop(),
                                      self._destinations.pop()]
+            player.reset_rng(self._rng.getrandbits(32))
             player.initialize_game(self)
             if self.print_debug:
                 print player, "is selecting initial tickets"
 
-            destinations = player.select_starting_destinations(self, possible_destinations)
+            if self.latency is None:
+                destinations = player.select_starting_destinations(self, possible_destinations)
+            else:
+                destinations = self.latency.time(player.name, "select_starting_destinations", Phase.starting,
+                                                 player.select_starting_destinations, self, possible_destinations)
 
             if len(destinations) < 2:
                 raise Exception("Failure", FailureCause.str(FailureCause.not_enough_destinations))
 
-            score = 0
+            # Make sure the destination cards are in the possible_destination cards set
             for destination in destinations:
-                # Make sure the destination card is in the possible_destination cards set
                 if destination not in possible_destinations:
                     raise Exception("Failure", FailureCause.str(FailureCause.wrong_destination_card))
 
-                # Reduce score by all incomplete destinations.
-                score -= destination.value
-
             if self.print_debug:
                 print player, "selected tickets", destinations
 
+            selections.append((player, destinations, possible_destinations))
+
+        for player, destinations, possible_destinations in selections:
+            player_info = self._player_info[player]
+
             # set the selected destinations
             player_info.destinations = destinations
+            self._action_log += action_log.encode(self._player_indices[player], RecordType.starting_destinations,
+                                                  action_log.destination_mask(destinations, possible_destinations))
 
-            # set the player's calculated score
-            player_info.score = score
+            # Reduce score by all incomplete destinations.
+            player_info.score = -sum(destination.value for destination in destinations)
 
-        # Set the first player to have the first turn.
-        self._current_player_index = 0
+        self._state_changed()
 
-        # The number of actions the player has left to take this turn.
-        self._num_actions_remaining = 2
+    def get_seeds(self):
+        """
+        :return: A tuple with the seeds of the game, the deck and the destinations.
+        """
+        return self._seeds
 
-        self._game_is_over = False
+    def get_double_edges_dict(self):
+        """
+        Get the double edges dictionary.
+        :return: The double edges dictionary, which can't be modified.
+        """
+        if self._double_edges_snapshot is None:
+            edges = self._board.edges
+            self._double_edges_snapshot = FrozenDict((edges[edge_id], edges[double_id])
+                                                     for edge_id, double_id in enumerate(self._double_edges)
+                                                     if double_id is not None)
 
-        self._discards = []
+        return self._double_edges_snapshot
 
-        # Create the sets for events that will trigger when the game ends or begins.
-        self._turn_ended_events = set()
-        self._game_ended_events = set()
+    def get_edge_claims(self):
+        """
+        :return: All edge claims.
+        """
+        return self._board.claims_dict(self._edge_claims)
 
-        # Store a history of all actions taken.
-        self._history = []
+    def get_claims(self):
+        """
+        Gets the claims of all edges, indexed by edge id in the compiled board.
 
-    def _track_double_edges(self):
+        :return: A tuple with the name of the player who claimed each edge, or None.
         """
-        Populate dictionary of edges which connect the same city
+        if self._claims_snapshot is None:
+            self._claims_snapshot = tuple(self._edge_claims)
+
+        return self._claims_snapshot
+
+    def get_board(self):
         """
-        for edge1 in self._edge_claims:
-            for edge2 in self._edge_claims:
-                if edge1 is not edge2:
-                    if edge1.city1 is edge2.city1 and edge1.city2 is edge2.city2:
-                        self._double_edges[edge1] = edge2
+        Gets the compiled board the game is played on.
 
-    def get_double_edges_dict(self):
+        :return: The CompiledBoard.
         """
-        Get the double edges dictionary.
-        :return: The double edges dictionary.
+        return self._board
+
+    def get_connectivity(self, player):
         """
-        return deepcopy(self._double_edges)
+        Get the structure tracking which cities a player's routes connect.  It is shared with the game and must not be
+        changed, but it can answer what would be connected if the player claimed more edges with `connected_with` and
+        `all_connected_with`, which leave it as it was.
 
-    def get_edge_claims(self):
+        :param player: The player.
+        :return: The player's Connectivity.
         """
-        :return: All edge claims.
+        return self._connectivity[player.name]
+
+    def get_shortest_paths(self, player):
+        """
+        Get the table of the cheapest paths between all cities for a player, where the player's edges cost nothing and
+        edges claimed by anyone else can't be used.  It is built the first time it's asked for, then kept up to date as
+        edges are claimed.  It is shared with the game and must not be changed.
+
+        :param player: The player.
+        :return: The player's ShortestPaths.
         """
-        return dict(self._edge_claims)
+        shortest_paths = self._shortest_paths.get(player.name)
+        if shortest_paths is None:
+            shortest_paths = self._shortest_paths[player.name] = ShortestPaths(self._board, player.name,
+                                                                               self._edge_claims)
+
+        return shortest_paths
 
     def get_face_up_cards(self):
         """
@@ -154,10 +270,21 @@ class Game:
         Get all of the game info of player.
 
         :param player: The player.
-        :return: The player's game info.
+        :return: A copy of the player's game info.  Use `get_view` for a read-only snapshot that doesn't need copying.
         """
         return deepcopy(self._player_info[player])
 
+    def get_view(self):
+        """
+        Get a read-only view of the game.  The same view is returned until the state of the game changes.
+
+        :return: A GameView.
+        """
+        if self._view is None:
+            self._view = GameView(self)
+
+        return self._view
+
     def get_visible_scores(self):
         """
         See the visible scores of all players.
@@ -192,13 +319,9 @@ class Game:
         :param player: The player.
         :return: A set of all edges this player owns
         """
-        result = set()
+        edges = self._board.edges
 
-        for edge in self._edge_claims:
-            if self._edge_claims[edge] == player.name:
-                result.add(edge)
-
-        return result
+        return set(edges[edge_id] for edge_id, owner in enumerate(self._edge_claims) if owner == player.name)
 
     def get_history(self):
         """
@@ -208,6 +331,16 @@ class Game:
         """
         return deepcopy(self._history)
 
+    def get_action_log(self):
+        """
+        Gets the compact log of every action attempted this game, including failed ones and the destinations kept.
+        Together with the seeds from `get_seeds`, it reconstructs the game.  See game.action_log for the format.
+
+        :return: A string of a header with the maximum number of rounds, followed by fixed-width records with the first
+        action attempted this game first.
+        """
+        return str(self._action_log)
+
     def get_player_car_counts(self):
         """
         Gets the car counts of each player.
@@ -278,6 +411,63 @@ class Game:
         """
         return len(self._discards)
 
+    def get_current_player(self):
+        """
+        :return: The player whose turn it is.
+        """
+        return self._players[self._current_player_index]
+
+    def add_turn_ended_event(self, event):
+        """
+        Add an event that triggers whenever a turn ends.
+
+        :param event: A function that takes the game as a parameter.
+        """
+        self._turn_ended_events.add(event)
+
+    def remove_turn_ended_event(self, event):
+        """
+        Remove an event added with `add_turn_ended_event`.
+
+        :param event: The function to remove.
+        """
+        self._turn_ended_events.discard(event)
+
+    def add_game_ended_event(self, event):
+        """
+        Add an event that triggers when the game ends.
+
+        :param event: A function that takes the game as a parameter.
+        """
+        self._game_ended_events.add(event)
+
+    def remove_game_ended_event(self, event):
+        """
+        Remove an event added with `add_game_ended_event`.
+
+        :param event: The function to remove.
+        """
+        self._game_ended_events.discard(event)
+
+    def subscribe(self, event_type, handler):
+        """
+        Subscribe to a type of event.  Events are published once the change they describe is complete, and aren't
+        undone by `undo`.
+
+        :param event_type: The type of event, from EventType.
+        :param handler: A function that takes the game and the event's payload as parameters.
+        """
+        self._events.subscribe(event_type, handler)
+
+    def unsubscribe(self, event_type, handler):
+        """
+        Unsubscribe from a type of event.
+
+        :param event_type: The type of event, from EventType.
+        :param handler: The function to unsubscribe.
+        """
+        self._events.unsubscribe(event_type, handler)
+
     def is_turn(self, player):
         """
         Determine if it is this player's turn.
@@ -294,10 +484,13 @@ class Game:
         :return: A tuple with a boolean and a string.  The Boolean is True if the game is over, false otherwise.  The
         String is the name of the winning player, or None otherwise.
         """
-        if self._game_is_over:
-            return True, max(self._visible_scores.iteritems(), key=operator.itemgetter(1))[0]
+        if not self._game_is_over:
+            return False, None
 
-        return False, None
+        if self._game_over_result is None:
+            self._game_over_result = True, max(self._visible_scores.iteritems(), key=operator.itemgetter(1))[0]
+
+        return self._game_over_result
 
     def num_players(self):
         """
@@ -327,22 +520,29 @@ class Game:
         :param cards: The cards to check as a Counter.
         :return: True if the cards are acceptable, False otherwise.
         """
-        # Remove non-zero elements.
-        cards += Counter()
+        # Only count colors with a positive number of cards.
+        num_colors = 0
+        total = 0
+        for card, count in cards.iteritems():
+            if count > 0:
+                num_colors += 1
+                total += count
+
+        wilds = max(cards[Colors.none], 0)
 
         # Make sure there are at most 2 colors.
-        if len(cards.items()) > 2:
+        if num_colors > 2:
             return False
         # Make sure that if there are 2 colors, then one is wild.
-        elif len(cards.items()) == 2 and cards[Colors.none] == 0:
+        elif num_colors == 2 and wilds == 0:
             return False
 
         if edge.color == Colors.none:
             # Since there are the right number of cards and at most 1 non-wild color, that's all we need to check.
-            return sum(cards.values()) == edge.cost
+            return total == edge.cost
         else:
             # Make sure that there are the right number of cards.
-            return cards[edge.color] + cards[Colors.none] == edge.cost and sum(cards.values()) == edge.cost
+            return max(cards[edge.color], 0) + wilds == edge.cost and total == edge.cost
 
     def draw_face_up_card(self, player, card_index):
         """
@@ -353,6 +553,9 @@ class Game:
         :return: A tuple containing a boolean and an int.  Boolean will be True if the action succeeded,
         False otherwise.  Integer will correspond to a failure cause in the FailureCause object.
         """
+        self._action_log += action_log.encode(self._player_indices.get(player, action_log.NONE),
+                                              RecordType.draw_face_up, card_index)
+
         # Make sure the game is not over.
         if self._game_is_over:
             return False, FailureCause.game_over
@@ -367,7 +570,7 @@ class Game:
 
         # Make sure that there are cards to draw.
         if not self._deck:
-            self._deck = shuffle_deck()
+            self._deck = shuffle_deck(self._deck_rng)
             # return False, FailureCause.deck_out_of_cards
 
         card = self._face_up_cards[card_index]
@@ -387,12 +590,20 @@ class Game:
         self._history.append(HistoryEvent(player.name, DrawFaceUpAction(card_index, card)))
 
         # Complete action.
-        self._use_actions(1 if card != Colors.none else 2)
+        turn_ended = self._use_actions(1 if card != Colors.none else 2)
 
         # Check that the deck is not empty.
         self._check_deck()
 
         self._player_info[player].note_draw()
+        self._state_changed()
+
+        if self._events.has_subscribers(EventType.card_drawn):
+            self._events.publish(EventType.card_drawn, self,
+                                 CardDrawnEvent(player.name, card, card_index, self._face_up_cards[card_index]))
+
+        if turn_ended:
+            self._end_turn()
 
         return True, FailureCause.none
 
@@ -404,6 +615,8 @@ class Game:
         :return: A tuple containing a boolean and an int.  Boolean will be True if the action succeeded,
         False otherwise.  Integer will correspond to a failure cause in the FailureCause object.
         """
+        self._action_log += action_log.encode(self._player_indices.get(player, action_log.NONE), RecordType.draw_deck)
+
         # Make sure the game is not over.
         if self._game_is_over:
             return False, FailureCause.game_over
@@ -414,22 +627,30 @@ class Game:
 
         # Make sure that there are cards to draw.
         if not self._deck:
-            self._deck = shuffle_deck()
+            self._deck = shuffle_deck(self._deck_rng)
             # return False, FailureCause.deck_out_of_cards
 
         hand = self._player_info[player].hand
 
-        hand.add_card(self._deck.pop())
+        card = self._deck.pop()
+        hand.add_card(card)
 
         # Update history.
         self._history.append(HistoryEvent(player.name, DrawDeckAction()))
 
-        self._use_actions(1)
+        turn_ended = self._use_actions(1)
 
         # Check that the deck is not empty.
         self._check_deck()
 
         self._player_info[player].note_draw()
+        self._state_changed()
+
+        if self._events.has_subscribers(EventType.card_drawn):
+            self._events.publish(EventType.card_drawn, self, CardDrawnEvent(player.name, card, None, None))
+
+        if turn_ended:
+            self._end_turn()
 
         return True, FailureCause.none
 
@@ -444,21 +665,31 @@ class Game:
         for i in range(3):
             possible_destinations += [self._destinations.pop()]
             if not self._destinations:
-                self._destinations = shuffle_destinations()
+                self._destinations = shuffle_destinations(self._destinations_rng)
 
         # call player's select destination function to confirm which card it want to keep
-        selected_destinations = player.select_destinations(self, possible_destinations)
+        if self.latency is None:
+            selected_destinations = player.select_destinations(self, possible_destinations)
+        else:
+            selected_destinations = self.latency.time(player.name, "select_destinations",
+                                                      Phase.from_cars(self._player_info[player].num_cars),
+                                                      player.select_destinations, self, possible_destinations)
 
         # Make sure the return is a list
         if not isinstance(selected_destinations, list):
             selected_destinations = [selected_destinations]
 
+        self._action_log += action_log.encode(self._player_indices.get(player, action_log.NONE),
+                                              RecordType.draw_destinations,
+                                              action_log.destination_mask(selected_destinations, possible_destinations))
+
         # Must return at least 1 card in between game
         if len(selected_destinations) < 1:
             return False, FailureCause.not_enough_destinations
 
         # add the selected card into it's hand
         self._player_info[player].destinations += selected_destinations
+        self._state_changed()
 
         for destination in selected_destinations:
             # Make sure the destination card is in the possible_destination cards set
@@ -469,6 +700,8 @@ class Game:
             self._player_info[player].score -= destination.value
 
         self._use_actions(2)
+        self._state_changed()
+        self._end_turn()
         # TODO Whether we need to add the card the player don't want back to the stack in case of
         # short of ticket card
 
@@ -484,6 +717,10 @@ class Game:
         :return: A tuple containing a boolean and an int.  Boolean will be True if the action succeeded,
         False otherwise.  Integer will correspond to a failure cause in the FailureCause object.
         """
+        edge_id = self._board.edge_ids.get(edge)
+        self._action_log += action_log.encode(self._player_indices.get(player, action_log.NONE), RecordType.connect,
+                                              action_log.NONE if edge_id is None else edge_id, cards)
+
         # Make sure the game is not over.
         if self._game_is_over:
             return False, FailureCause.game_over
@@ -496,17 +733,17 @@ class Game:
         if self._num_actions_remaining != 2:
             return False, FailureCause.already_drew
 
-        if edge not in self._edges:
+        if edge_id is None:
             return False, FailureCause.no_route
 
-        if self._edge_claims[edge] is not None and self._edge_claims[edge] != player.name:
+        if self._edge_claims[edge_id] is not None and self._edge_claims[edge_id] != player.name:
             return False, FailureCause.already_claimed_opponent
 
-        if self._edge_claims[edge] == player.name:
+        if self._edge_claims[edge_id] == player.name:
             return False, FailureCause.already_claimed_self
 
         # Find the edge and claim it if possible.
-        if not self._edge_is_claimed(edge):
+        if not self._edge_is_claimed(edge_id):
             # Player must have the given cards.
             if not self.in_hand(player, cards):
                 return False, FailureCause.missing_cards
@@ -522,14 +759,14 @@ class Game:
             if self._player_info[player].num_cars < edge.cost:
                 return False, FailureCause.insufficient_cars
 
-            self._claim_edge(edge, player)
+            self._claim_edge(edge_id, player)
             self._lose_cards(player, cards)
             self._player_info[player].num_cars -= edge.cost
 
             # Update score.
             self._player_info[player].score += self._scoring[edge.cost]
             self._visible_scores[player.name] += self._scoring[edge.cost]
-            self._check_connections(player)
+            completed_destinations = self._check_connections(player)
 
             # Check if game is over.
             if self._player_info[player].num_cars <= 3:
@@ -539,9 +776,22 @@ class Game:
             self._use_actions(2)
 
             # Update history.
-            self._history.append(HistoryEvent(player.name, ConnectAction(edge, cards)))
+            self._history.append(HistoryEvent(player.name, ConnectAction(edge, FrozenCardCounts(cards))))
 
             self._player_info[player].note_connect()
+            self._state_changed()
+
+            if self._events.has_subscribers(EventType.edge_claimed):
+                self._events.publish(EventType.edge_claimed, self,
+                                     EdgeClaimedEvent(player.name, edge, edge_id, cards, self._scoring[edge.cost],
+                                                      self._double_edges[edge_id]))
+
+            if self._events.has_subscribers(EventType.destination_completed):
+                for destination in completed_destinations:
+                    self._events.publish(EventType.destination_completed, self,
+                                         DestinationCompletedEvent(player.name, destination))
+
+            self._end_turn()
 
             return True, FailureCause.none
 
@@ -552,41 +802,80 @@ class Game:
         :param player: The player to check.
         :return: A list of actions that a player can perform.
         """
-        result = []
+        return list(self.iter_available_actions(player))
+
+    def iter_available_actions(self, player):
+        """
+        Lazily generates all available actions for a player, in the same order as `get_available_actions`.  Connection
+        actions are cached by edge and by the cards and cars they depend on, so they are only rebuilt for edges whose
+        relevant card counts changed.
+
+        :param player: The player to check.
+        :return: A generator of actions that a player can perform.
+        """
         # Make sure that it is this player's turn.
         if not self.is_turn(player):
-            return result
+            return
 
         # Make sure the player has action remaining
         if self._num_actions_remaining < 1:  # action remain == 0
-            return result
+            return
 
-        result += [DrawDeckAction()]
+        yield DrawDeckAction()
 
         if self._num_actions_remaining > 1:  # action remain == 2
             #
-            result += [DrawDestinationAction()]
+            yield DrawDestinationAction()
 
             # Add the ability to draw any face up cards.
-            result += [DrawFaceUpAction(i, self._face_up_cards[i]) for i in range(5)]
+            for i in range(5):
+                yield DrawFaceUpAction(i, self._face_up_cards[i])
 
-            hand = self.get_player_info(player).hand
-            num_cars = self.get_player_info(player).num_cars
+            hand = self._player_info[player].hand
+            num_cars = self._player_info[player].num_cars
+            counts = tuple(hand.cards.counts)
 
             # Add the ability to connect any connectible cities.
-            for edge in self._edge_claims:
-                if self._edge_claims[edge] is None:
-                    result += self.all_connection_actions(edge, hand.cards, num_cars)
+            for edge_id, owner in enumerate(self._edge_claims):
+                if owner is None:
+                    for action in self._connection_actions(edge_id, hand.cards, counts, num_cars):
+                        yield action
 
         else:  # action remain == 1
             # If only one action remains, then only allow non-wild face-up draws.
             for i in range(len(self._face_up_cards)):
                 if self._face_up_cards[i] != Colors.none:
-                    result += [DrawFaceUpAction(i, self._face_up_cards[i])]
+                    yield DrawFaceUpAction(i, self._face_up_cards[i])
 
         # TODO: Add action for destinations.
 
-        return result
+    def _connection_actions(self, edge_id, cards, counts, num_cars):
+        """
+        Gets the connection actions for an edge through the cache of connection actions.
+
+        :param edge_id: The id of the edge to check.
+        :param cards: The hand to check the edge against.
+        :param counts: The number of cards of every color in the hand, as a tuple indexed by color.
+        :param num_cars: The number of cars the player has.
+        :return: A tuple of all possible actions that can be performed with the given hand on the given edge.
+        """
+        board = self._board
+        color = board.edge_color[edge_id]
+        has_cars = num_cars >= board.edge_cost[edge_id]
+
+        # A colored edge only depends on its own color and the wilds, a gray edge depends on the whole hand.
+        if color == Colors.none:
+            key = (edge_id, counts, has_cars)
+        else:
+            key = (edge_id, counts[color], counts[Colors.none], has_cars)
+
+        actions = self._connection_actions_cache.get(key)
+        if actions is None:
+            actions = tuple(ConnectAction(action.edge, FrozenCardCounts(action.cards))
+                            for action in self.all_connection_actions(board.edges[edge_id], cards, num_cars))
+            self._connection_actions_cache[key] = actions
+
+        return actions
 
     def perform_action(self, player, action):
         """
@@ -607,8 +896,134 @@ class Game:
         elif action.is_draw_destination():
             result = self.draw_destination_cards(player)
 
+        if self._events.has_subscribers(EventType.action_performed):
+            self._events.publish(EventType.action_performed, self, ActionPerformedEvent(player.name, action, result))
+
         return result
 
+    def apply(self, action):
+        """
+        Perform an action for the player whose turn it is, recording only the state the action can change so that it
+        can be undone with `undo`.  This lets search algorithms branch on a game without copying it.
+
+        Drawing destinations still asks the player to select destinations, and events triggered by the action are not
+        undone.  Undoing a claim publishes an EventType.edge_unclaimed event instead.
+
+        :param action: The action.
+        :return: An UndoRecord, whose `result` is the result of performing the action.
+        """
+        player = self._players[self._current_player_index]
+        info = self._player_info[player]
+        record = UndoRecord(player, action)
+
+        record.turn_state = (self._current_player_index, self._num_actions_remaining, self._rounds_count,
+                             self._game_is_over)
+        record.visible_scores = dict(self._visible_scores)
+        record.history_length = len(self._history)
+        record.action_log_length = len(self._action_log)
+        record.player_state = (info.score, info.num_cars, info.draws, info.connects, tuple(info.hand.cards.counts))
+        record.face_up_cards = list(self._face_up_cards)
+
+        # Drawing pops from the deck, and replaces the deck once it runs out.  Connecting adds to the discards.
+        record.deck_length = len(self._deck)
+        record.discards_length = len(self._discards)
+        if len(self._deck) <= 2:
+            record.deck_copy = list(self._deck)
+            record.discards_copy = list(self._discards)
+            record.deck_rng_state = self._deck_rng.getstate()
+        else:
+            record.deck_tail = self._deck[-2:]
+
+        if action.is_connect() or action.is_draw_destination():
+            record.destinations = list(info.destinations)
+            record.completed_destinations = list(info.completed_destinations)
+
+        if action.is_connect():
+            edge_id = self._board.edge_ids.get(action.edge)
+            if edge_id is not None:
+                record.claims = ((edge_id, self._edge_claims[edge_id]),)
+                double_id = self._double_edges[edge_id]
+                if double_id is not None:
+                    record.claims += ((double_id, self._edge_claims[double_id]),)
+            record.connectivity_mark = self._connectivity[player.name].mark()
+            record.shortest_paths_marks = {name: shortest_paths.mark()
+                                           for name, shortest_paths in self._shortest_paths.iteritems()}
+
+        if action.is_draw_destination():
+            record.destination_deck_length = len(self._destinations)
+            if len(self._destinations) <= 3:
+                record.destination_deck_copy = list(self._destinations)
+                record.destinations_rng_state = self._destinations_rng.getstate()
+            else:
+                record.destination_deck_tail = self._destinations[-3:]
+
+        record.result = self.perform_action(player, action)
+
+        return record
+
+    def undo(self, record):
+        """
+        Undo an action performed with `apply`.  Records must be undone in the reverse order they were applied in.
+
+        :param record: The UndoRecord returned by `apply`.
+        """
+        player = record.player
+        info = self._player_info[player]
+
+        self._current_player_index, self._num_actions_remaining, self._rounds_count, self._game_is_over = \
+            record.turn_state
+        self._game_over_result = None
+        self._visible_scores = record.visible_scores
+        del self._history[record.history_length:]
+        del self._action_log[record.action_log_length:]
+
+        info.score, info.num_cars, info.draws, info.connects, cards = record.player_state
+        info.hand.cards.counts[:] = cards
+
+        self._face_up_cards[:] = record.face_up_cards
+
+        # Later actions have already been undone, so the piles are as this action left them.
+        if record.deck_copy is not None:
+            self._deck = record.deck_copy
+            self._discards = record.discards_copy
+            self._deck_rng.setstate(record.deck_rng_state)
+        else:
+            del self._deck[record.deck_length - len(record.deck_tail):]
+            self._deck.extend(record.deck_tail)
+            del self._discards[record.discards_length:]
+
+        if record.destinations is not None:
+            info.destinations = record.destinations
+            info.completed_destinations = record.completed_destinations
+
+        for edge_id, owner in reversed(record.claims):
+            self._edge_claims[edge_id] = owner
+        if record.claims:
+            self._claims_snapshot = None
+            self._connectivity[player.name].rollback(record.connectivity_mark)
+
+            # Tables built since the action was applied are dropped, and built again when they're asked for.
+            for name in self._shortest_paths.keys():
+                if name in record.shortest_paths_marks:
+                    self._shortest_paths[name].rollback(record.shortest_paths_marks[name])
+                else:
+                    del self._shortest_paths[name]
+
+        if record.destination_deck_copy is not None:
+            self._destinations = record.destination_deck_copy
+            self._destinations_rng.setstate(record.destinations_rng_state)
+        elif record.destination_deck_tail is not None:
+            del self._destinations[record.destination_deck_length - len(record.destination_deck_tail):]
+            self._destinations.extend(record.destination_deck_tail)
+
+        self._state_changed()
+
+        if record.claims and self._events.has_subscribers(EventType.edge_unclaimed):
+            edge_id = record.claims[0][0]
+            double_edge_id = record.claims[1][0] if len(record.claims) > 1 else None
+            self._events.publish(EventType.edge_unclaimed, self,
+                                 EdgeUnclaimedEvent(player.name, self._board.edges[edge_id], edge_id, double_edge_id))
+
     @staticmethod
     def all_connection_actions(edge, cards, num_cars):
         """
@@ -621,9 +1036,11 @@ class Game:
         """
         result = []
 
-        # A short circuit in case there definitely can't be enough cards.
-        # It's okay if colorless cards get counted twice, since this is just an estimate.
-        if edge.cost > cards.most_common(1)[0][1] + cards[Colors.none]:
+        if not isinstance(cards, CardCounts):
+            cards = CardCounts(cards)
+
+        # A short circuit in case there can't be enough cards.
+        if not cards.can_afford(edge):
             return result
         # check if the player has enough cars
         if edge.cost > num_cars:
@@ -631,8 +1048,8 @@ class Game:
 
         # Route has no color.
         if edge.color == Colors.none:
-            for card in cards:
-                if card != Colors.none and cards[card] + cards[Colors.none] >= edge.cost:
+            for card in range(Colors.none):
+                if cards[card] + cards[Colors.none] >= edge.cost:
                     # Find all possible combinations of cards that can be used to claim the edge.
                     # Using min(edge.cost - 1) guarantees that we will not accidentally add unnecessary plays that
                     # use all wilds.
@@ -675,45 +1092,69 @@ class Game:
         destination and give them points for it.
 
         :param player: The player.
+        :return: A list of the destinations completed.
         """
+        city_ids = self._board.city_ids
+        connectivity = self._connectivity[player.name]
+        completed = []
+
         for destination in list(self._player_info[player].destinations):
-            if connected(destination.city1, destination.city2, self._city_edges, self._edge_claims, player):
+            if connectivity.connected(city_ids[destination.city1], city_ids[destination.city2]):
                 self._player_info[player].score += destination.value * 2
 
                 self._player_info[player].completed_destinations.append(destination)
                 self._player_info[player].destinations.remove(destination)
+                completed.append(destination)
+
+        return completed
 
-    def _claim_edge(self, edge, player):
+    def _claim_edge(self, edge_id, player):
         """
         Claim an edge for a player.
 
-        :param edge:
+        :param edge_id: The id of the edge in the compiled board.
         :param player:
         
         In addition, if there is a similar edge which connects two cities, then this edge will be claimed
         by "game_rules"
         """
 
-        self._edge_claims[edge] = player.name
+        self._edge_claims[edge_id] = player.name
+        self._claims_snapshot = None
+        self._connection_actions_cache.clear()
+        self._connectivity[player.name].add_edge(edge_id)
 
-        if edge in self._double_edges:
+        double_id = self._double_edges[edge_id]
+        if double_id is not None:
             # print 'claiming similar edge'
-            self._edge_claims[self._double_edges[edge]] = 'game_rules'
+            self._edge_claims[double_id] = 'game_rules'
 
-    def _edge_is_claimed(self, edge):
+        for shortest_paths in self._shortest_paths.itervalues():
+            shortest_paths.set_owner(edge_id, player.name)
+            if double_id is not None:
+                shortest_paths.set_owner(double_id, 'game_rules')
+
+    def _edge_is_claimed(self, edge_id):
         """
         Determines if an edge is claimed.
 
-        :param edge: The edge to claim.
+        :param edge_id: The id of the edge in the compiled board.
         :return: True if the edge is claimed, false otherwise.
         """
-        return self._edge_claims[edge] is not None
+        return self._edge_claims[edge_id] is not None
+
+    def _state_changed(self):
+        """
+        Drop the snapshots of the game state, so the next request builds them from the current state.
+        """
+        self._view = None
 
     def _use_actions(self, num_actions):
         """
         Use up actions for the current player this turn.
 
         :param num_actions: The number of actions to use up.
+        :return: True if the turn is over, false otherwise.
         """
         self._num_actions_remaining -= num_actions
 
@@ -724,20 +1165,42 @@ class Game:
                 self._end_game()
             self._num_actions_remaining = 2
             self._current_player_index = (self._current_player_index + 1) % len(self._players)
+            return True
+
+        return False
+
+    def _end_turn(self):
+        """
+        Trigger all events for when a turn ends.  Called once the action that ended the turn is complete.
+        """
+        for event in list(self._turn_ended_events):
+            event(self)
+
+        if self._events.has_subscribers(EventType.turn_ended):
+            previous_index = (self._current_player_index - 1) % len(self._players)
+            self._events.publish(EventType.turn_ended, self,
+                                 TurnEndedEvent(self._players[previous_index].name,
+                                                self._players[self._current_player_index].name, self._rounds_count))
 
     def _end_game(self):
         """
         End the game.
         """
         self._game_is_over = True
+        self._game_over_result = None
 
         # Update visible scores to final values.
         self._visible_scores = {player.name: self._player_info[player].score for player in self._players}
+        self._state_changed()
 
         # Trigger all events for when the game ends.
-        for event in self._game_ended_events:
+        for event in list(self._game_ended_events):
             event(self)
 
+        if self._events.has_subscribers(EventType.game_ended):
+            self._events.publish(EventType.game_ended, self,
+                                 GameEndedEvent(self.is_game_over()[1], FrozenDict(self._visible_scores)))
+
         if self.print_debug:
             print "Rounds played: %d" % self._rounds_count
 
@@ -747,5 +1210,5 @@ class Game:
         """
         if not self._deck:
             self._deck = self._discards
-            shuffle(self._deck)
+            self._deck_rng.shuffle(self._deck)
             self._discards = []
@@ -0,0 +1,159 @@
+from math import log
+from time import time
+
+
+class Phase:
+    """
+    Used as an enum to hold the phases of a game, which decisions are grouped by.  The phase of a decision depends on
+    the number of cars the deciding player has left.
+    """
+
+    def __init__(self):
+        pass
+
+    starting, early, middle, late = range(4)
+    phase_list = ['Starting', 'Early', 'Middle', 'Late']
+
+    # The fewest cars a player can have left in the early and middle phases.
+    EARLY_CARS = 30
+    MIDDLE_CARS = 15
+
+    @staticmethod
+    def str(phase):
+        return Phase.phase_list[phase] if len(Phase.phase_list) > phase else "Unknown"
+
+    @staticmethod
+    def from_cars(num_cars):
+        """
+        :param num_cars: The number of cars the deciding player has left.
+        :return: The phase of the game for the player, once the game has started.
+        """
+        if num_cars >= Phase.EARLY_CARS:
+            return Phase.early
+        if num_cars >= Phase.MIDDLE_CARS:
+            return Phase.middle
+        return Phase.late
+
+
+class LatencyHistogram:
+    """
+    Counts latencies in buckets that grow exponentially, so recording a latency takes constant time and memory, and
+    percentiles are accurate to within a bucket, about 9%.
+    """
+
+    # The upper bound of the first bucket, in seconds, and the number of buckets per doubling.
+    MINIMUM = 1e-6
+    BUCKETS_PER_DOUBLING = 8
+    NUM_BUCKETS = 8 * 32
+
+    def __init__(self):
+        self.counts = [0] * self.NUM_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        """
+        :param seconds: The latency to record.
+        """
+        if seconds <= self.MINIMUM:
+            bucket = 0
+        else:
+            bucket = min(int(log(seconds / self.MINIMUM, 2) * self.BUCKETS_PER_DOUBLING) + 1, self.NUM_BUCKETS - 1)
+
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        """
+        Add the latencies recorded by another histogram to this one.
+
+        :param other: The other LatencyHistogram.
+        """
+        self.counts = [count + other_count for count, other_count in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percent):
+        """
+        :param percent: The percentile, from 0 to 100.
+        :return: The upper bound of the bucket the percentile falls in, in seconds, but no more than the maximum.
+        """
+        if self.count == 0:
+            return 0.0
+
+        rank = percent / 100.0 * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(self.MINIMUM * 2 ** (bucket / float(self.BUCKETS_PER_DOUBLING)), self.max)
+
+        return self.max
+
+
+class LatencyRecorder:
+    """
+    Keeps a LatencyHistogram for every player, decision and phase of the game.  Decisions are the names of the player
+    methods timed, and for `take_turn` also the type of action taken.
+    """
+
+    def __init__(self):
+        self.histograms = {}
+
+    def record(self, player_name, decision, phase, seconds):
+        """
+        :param player_name: The name of the player that decided.
+        :param decision: The decision.
+        :param phase: The phase of the game, from Phase.
+        :param seconds: How long the decision took.
+        """
+        key = (player_name, decision, phase)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = LatencyHistogram()
+
+        histogram.record(seconds)
+
+    def time(self, player_name, decision, phase, func, *args):
+        """
+        Call a function and record how long it took.
+
+        :param player_name: The name of the player that decides.
+        :param decision: The decision.
+        :param phase: The phase of the game, from Phase.
+        :param func: The function that decides.
+        :param args: The arguments of the function.
+        :return: What the function returned.
+        """
+        start = time()
+        result = func(*args)
+        self.record(player_name, decision, phase, time() - start)
+
+        return result
+
+    def merge(self, other):
+        """
+        Add the latencies recorded by another recorder to this one.
+
+        :param other: The other LatencyRecorder.
+        """
+        for key, histogram in other.histograms.iteritems():
+            if key in self.histograms:
+                self.histograms[key].merge(histogram)
+            else:
+                self.histograms[key] = histogram
+
+    def rows(self):
+        """
+        :return: A list of rows with the player, decision, phase, number of calls, and p50, p95, max and mean latency
+        in milliseconds, sorted by player, decision and phase.
+        """
+        return [[player_name, decision, Phase.str(phase), histogram.count,
+                 "%.3f" % (histogram.percentile(50) * 1000), "%.3f" % (histogram.percentile(95) * 1000),
+                 "%.3f" % (histogram.max * 1000), "%.3f" % (histogram.total / histogram.count * 1000)]
+                for (player_name, decision, phase), histogram in sorted(self.histograms.iteritems())]
@@ -1,39 +1,66 @@
 from collections import deque
-from copy import deepcopy
+from heapq import heappush, heappop
+from itertools import islice
 
-from board import get_scoring
-from classes import Path
+from board import get_scoring, compile_board
+from classes import Colors, Path
 
 # Maximum number of iterations for finding paths.
 MAX_PATH_ITER = 1000
 
 MAX_NUM_PATH = 50
 
+# The number of bits of the cars of every color a network needs, when they're packed into one integer.  The top bit of
+# every field is a guard, so the needs of 2 networks can be compared all at once.
+DEMAND_BITS = 16
 
-def connected(city1, city2, city_edges, edge_claims, player):
+
+def connected(city1, city2, city_edges, edge_claims, player, board=None):
     """
     Perform a depth-first search to determine if 2 cities are connected by a route from a given player.
 
     :param city1: The first city.
     :param city2: The second city.
     :param city_edges: A dictionary of which cities, as keys, have which edges.
-    :param edge_claims: A dictionary with edges as keys of which edges are claimed by which players.
+    :param edge_claims: The claims of all edges, either as a dictionary with edges as keys or as a sequence indexed by
+    edge id.
     :param player: The player who owns the route being checked.
+    :param board: Optional compiled board.  If not included, city_edges will be compiled.
     :return: True if connected, false otherwise.
     """
+    if board is None:
+        board = compile_board(city_edges)
+
+    return connected_ids(board, board.city_ids[city1], board.city_ids[city2], board.claims_list(edge_claims),
+                         player.name)
+
+
+def connected_ids(board, city1, city2, claims, player_name):
+    """
+    Perform a depth-first search over a compiled board to determine if 2 cities are connected by a route from a given
+    player.
+
+    :param board: The compiled board.
+    :param city1: The id of the first city.
+    :param city2: The id of the second city.
+    :param claims: The claims of all edges as a sequence indexed by edge id.
+    :param player_name: The name of the player who owns the route being checked.
+    :return: True if connected, false otherwise.
+    """
+    city_edge_ids = board.city_edge_ids
     stack = [city1]
-    visited = set()
+    visited = [False] * len(board.cities)
 
     while stack:
         city = stack.pop()
 
         # Don't visit the same city twice.
-        if city in visited:
+        if visited[city]:
             continue
 
-        for edge in city_edges[city]:
-            if edge_claims[edge] == player.name:
-                other_city = edge.other_city(city)
+        for edge_id in city_edge_ids[city]:
+            if claims[edge_id] == player_name:
+                other_city = board.other_city(edge_id, city)
 
                 # We're done if this is the city we're trying to connect to.
                 if other_city == city2:
@@ -41,13 +68,70 @@ def connected(city1, city2, city_edges, edge_claims, player):
 
                 stack.append(other_city)
 
-        visited.add(city)
+        visited[city] = True
 
     return False
 
 
+def build_path(board, edge_ids, costs, scores):
+    """
+    Build a Path from edge ids of a compiled board.
+
+    :param board: The compiled board.
+    :param edge_ids: The ids of the edges in the path.
+    :param costs: The cost of every edge to the player, indexed by edge id.
+    :param scores: The score of every edge to the player, indexed by edge id.
+    :return: The Path.
+    """
+    path = Path(set(), None)
+    path.edges = set(board.edges[edge_id] for edge_id in edge_ids)
+    path.edge_ids = frozenset(edge_ids)
+    path.cost = sum(costs[edge_id] for edge_id in path.edge_ids)
+    path.score = sum(scores[edge_id] for edge_id in path.edge_ids)
+
+    return path
+
+
+def edge_ids_of(edge_mask):
+    """
+    :param edge_mask: A bitmask of edge ids.
+    :return: A list of the edge ids in the bitmask, in ascending order.
+    """
+    edge_ids = []
+    while edge_mask:
+        lowest = edge_mask & -edge_mask
+        edge_ids.append(lowest.bit_length() - 1)
+        edge_mask ^= lowest
+
+    return edge_ids
+
+
+def player_edge_values(board, scoring, player=None, claims=None):
+    """
+    Get the cost and score of every edge from the point of view of a player.  Edges owned by the player have no cost
+    or score.
+
+    :param board: The compiled board.
+    :param scoring: The scoring dictionary for the game.
+    :param player: Optional parameter for a player.
+    :param claims: Optional claims of all edges as a sequence indexed by edge id.
+    :return: A tuple of two lists, the costs and the scores, indexed by edge id.
+    """
+    costs = list(board.edge_cost)
+    scores = list(board.scores_for(scoring))
+
+    if player is not None and claims is not None:
+        for edge_id, owner in enumerate(claims):
+            if owner == player.name:
+                costs[edge_id] = 0
+                scores[edge_id] = 0
+
+    return costs, scores
+
+
 def find_paths_for_destinations(destinations, city_edges, max_cost, scoring=get_scoring(), player=None,
-                                edge_claims=None, sort_paths=True):
+                                edge_claims=None, sort_paths=True, board=None, num_paths=None, prune_dominated=False,
+                                candidate_mask=False):
     """
     Finds all paths that connect all destinations for less than the max_cost.
 
@@ -56,17 +140,38 @@ def find_paths_for_destinations(destinations, city_edges, max_cost, scoring=get_
     :param max_cost: The maximum cost of all paths returned.
     :param scoring: The scoring dictionary for the game.
     :param player: Optional parameter for a player.  If included, all edges owned by the player have 0 cost.
-    :param edge_claims: Optional parameter for edge_claims.  If included, all edges owned by the player have 0 cost.
+    :param edge_claims: Optional parameter for edge_claims, either as a dictionary with edges as keys or as a sequence
+    indexed by edge id.  If included, all edges owned by the player have 0 cost.
     :param sort_paths: Optional boolean to sort the paths.  By default, will sort paths by cost.
-    :return: A list of paths, ordered with sort method.  Paths may not be continuous.
+    :param board: Optional compiled board.  If not included, city_edges will be compiled.
+    :param num_paths: Optional number of paths to combine for every destination.  If included, only the cheapest paths
+    are found, with iter_cheapest_paths.  By default, every path find_paths finds is combined.
+    :param prune_dominated: Optional boolean to only combine the paths that aren't dominated with the paths of the next
+    destination.  See `prune_dominated_paths`.  A dominated path can still combine with a later destination's path
+    into a cheaper one, so this may miss some paths, in exchange for combining far fewer.
+    :param candidate_mask: Optional boolean to also return the bitmask of the ids of the edges of every candidate path
+    found for any destination, including the ones left out of the result.  Other players claiming any other edge
+    doesn't take away a candidate, so with num_paths the paths found stay the same.
+    :return: A list of paths, ordered with sort method.  Paths may not be continuous.  With candidate_mask, a tuple of
+    the list and the bitmask.
     """
+    if board is None:
+        board = compile_board(city_edges)
+    claims = board.claims_list(edge_claims)
+    costs, scores = player_edge_values(board, scoring, player, claims)
+
     dest_paths = {}
     all_paths = []
 
     # First step: get candidate paths.
     for dest in destinations:
-        # Perform breadth first search to get all paths below the max_cost.
-        dest_paths[dest] = find_paths(dest.city1, dest.city2, city_edges, max_cost, scoring, player, edge_claims)
+        if num_paths is not None:
+            dest_paths[dest] = list(islice(iter_cheapest_paths(dest.city1, dest.city2, city_edges, scoring, player,
+                                                               claims, board, max_cost), num_paths))
+        else:
+            # Perform breadth first search to get all paths below the max_cost.
+            dest_paths[dest] = find_paths(dest.city1, dest.city2, city_edges, max_cost, scoring, player, claims,
+                                          board)
 
     # Second step: Combine paths to get a list of all possible paths that hit everything for less than the max_cost.
     for dest in dest_paths:
@@ -77,23 +182,150 @@ def find_paths_for_destinations(destinations, city_edges, max_cost, scoring=get_
         # duplicates once in the new path, thus possibly reducing cost.
         else:
             working_paths = all_paths
-            all_paths = []
-            for path1 in working_paths:
-                for path2 in dest_paths[dest]:
-                    # Combine the paths and add them to all_paths if they're still below max_cost.
-                    combined_path = Path(path1.edges.union(path2.edges), scoring, player, edge_claims)
-
-                    if combined_path.cost <= max_cost:
-                        all_paths.append(combined_path)
+            if prune_dominated:
+                working_paths = prune_dominated_paths(working_paths, board, costs)
+            all_paths = combine_paths(working_paths, dest_paths[dest], board, costs, scores, max_cost)
 
     # Third step: Sort by path cost in ascending order.
     if sort_paths:
-        return sorted(all_paths, key=Path.default_sort_method)
+        all_paths = sorted(all_paths, key=Path.default_sort_method)
+
+    if candidate_mask:
+        edge_mask = 0
+        for paths in dest_paths.itervalues():
+            for path in paths:
+                for edge_id in path.edge_ids:
+                    edge_mask |= 1 << edge_id
+
+        return all_paths, edge_mask
+
+    return all_paths
+
+
+def add_destination(paths, destination, city_edges, max_cost, scoring=get_scoring(), player=None, edge_claims=None,
+                    board=None, num_paths=None, prune_dominated=False):
+    """
+    Extend the paths found for some destinations so they also connect another one, like one more step of
+    `find_paths_for_destinations`, without finding paths for the other destinations again.  Edges the paths share with
+    the new destination's paths are only counted once, and edges owned by the player have 0 cost.  Paths with an edge
+    claimed by someone else since they were found are dropped.
+
+    :param paths: A list of the paths found for the other destinations, which must have edge ids.  If it's empty, the
+    paths for the new destination are returned.
+    :param destination: The destination to add.
+    :param city_edges: All of the edges that make up the map.
+    :param max_cost: The maximum cost of all paths returned.
+    :param scoring: The scoring dictionary for the game.
+    :param player: Optional parameter for a player.  If included, all edges owned by the player have 0 cost.
+    :param edge_claims: Optional parameter for edge_claims, either as a dictionary with edges as keys or as a sequence
+    indexed by edge id.  If included, all edges owned by the player have 0 cost.
+    :param board: Optional compiled board.  If not included, city_edges will be compiled.
+    :param num_paths: Optional number of the cheapest paths for the new destination to combine.  By default, every path
+    find_paths finds is combined.
+    :param prune_dominated: Optional boolean to only extend the paths that aren't dominated.
+    :return: A list of paths, not sorted.  Paths may not be continuous.
+    """
+    if board is None:
+        board = compile_board(city_edges)
+    claims = board.claims_list(edge_claims)
+    if player is None or claims is None:
+        player_name = None
+        claims = None
+    else:
+        player_name = player.name
+    costs, scores = player_edge_values(board, scoring, player, claims)
+
+    if num_paths is not None:
+        new_paths = list(islice(iter_cheapest_paths(destination.city1, destination.city2, city_edges, scoring, player,
+                                                    claims, board, max_cost), num_paths))
     else:
-        return all_paths
+        new_paths = find_paths(destination.city1, destination.city2, city_edges, max_cost, scoring, player, claims,
+                               board)
 
+    if not paths:
+        return new_paths
 
-def find_paths(city1, city2, city_edges, max_cost, scoring, player=None, edge_claims=None):
+    # The costs of the paths change as the player claims edges, so they're built again.
+    working_paths = [build_path(board, path.edge_ids, costs, scores) for path in paths
+                     if claims is None or all(claims[edge_id] is None or claims[edge_id] == player_name
+                                              for edge_id in path.edge_ids)]
+    if prune_dominated:
+        working_paths = prune_dominated_paths(working_paths, board, costs)
+
+    return combine_paths(working_paths, new_paths, board, costs, scores, max_cost)
+
+
+def combine_paths(paths1, paths2, board, costs, scores, max_cost):
+    """
+    Combine every path of one list with every path of another, only counting their shared edges once.
+
+    :param paths1: A list of paths, which must have edge ids.
+    :param paths2: Another list of paths, which must have edge ids.
+    :param board: The compiled board.
+    :param costs: The cost of every edge to the player, indexed by edge id.
+    :param scores: The score of every edge to the player, indexed by edge id.
+    :param max_cost: The maximum cost of all paths returned.
+    :return: A list of the combined paths.
+    """
+    result = []
+
+    # Different pairs of paths can combine into the same edges, which are only built once.
+    combined = set()
+    for path1 in paths1:
+        for path2 in paths2:
+            # Combine the paths and add them to the result if they're still below max_cost.
+            combined_ids = path1.edge_ids.union(path2.edge_ids)
+            if combined_ids in combined:
+                continue
+            combined.add(combined_ids)
+
+            if sum(costs[edge_id] for edge_id in combined_ids) <= max_cost:
+                result.append(build_path(board, combined_ids, costs, scores))
+
+    return result
+
+
+def prune_dominated_paths(paths, board, costs):
+    """
+    Remove the paths that are dominated by another path.  A path dominates another if it needs no more cars of any
+    color, gains at least as many points, and is better in one of those.  Since the cost of a path is the sum of the
+    cars it needs, it's never more expensive either.  Paths with the same edges are only kept once.
+
+    :param paths: A list of paths, which must have edge ids.
+    :param board: The compiled board.
+    :param costs: The cost of every edge to the player, indexed by edge id.
+    :return: A list of the paths that aren't dominated, ordered by cost.
+    """
+    edge_color = board.edge_color
+    guards = 0
+    for color in range(Colors.none + 1):
+        guards |= 1 << (DEMAND_BITS * (color + 1) - 1)
+
+    # Sorting by cost and points puts every path after the paths that dominate it.
+    networks = {}
+    for path in paths:
+        if path.edge_ids not in networks:
+            demand = 0
+            for edge_id in path.edge_ids:
+                demand += costs[edge_id] << (DEMAND_BITS * edge_color[edge_id])
+            networks[path.edge_ids] = (path.cost, -path.score, demand, path)
+
+    kept = []
+    kept_paths = []
+    for cost, negative_score, demand, path in sorted(networks.itervalues(), key=lambda network: network[:2]):
+        for other_negative_score, other_demand in kept:
+            # Subtracting from the demand with every guard bit set leaves them all set, if no field is smaller.
+            if other_negative_score <= negative_score and ((demand | guards) - other_demand) & guards == guards and \
+                    (other_negative_score < negative_score or other_demand != demand):
+                break
+        else:
+            kept.append((negative_score, demand))
+            kept_paths.append(path)
+
+    return kept_paths
+
+
+def find_paths(city1, city2, city_edges, max_cost, scoring, player=None, edge_claims=None, board=None):
     """
     Find all paths that connect two cities for less than the max_cost.
 
@@ -103,45 +335,205 @@ def find_paths(city1, city2, city_edges, max_cost, scoring, player=None, edge_cl
     :param max_cost: The maximum cost of all paths returned.
     :param scoring: The scoring dictionary for the game.
     :param player: Optional parameter for a player.  If included, all edges owned by the player have 0 cost.
-    :param edge_claims: Optional parameter for edge_claims.  If included, all edges owned by the player have 0 cost.
+    :param edge_claims: Optional parameter for edge_claims, either as a dictionary with edges as keys or as a sequence
+    indexed by edge id.  If included, all edges owned by the player have 0 cost.
+    :param board: Optional compiled board.  If not included, city_edges will be compiled.
     :return: A list of paths.
     """
-
-    queue = deque()
+    if board is None:
+        board = compile_board(city_edges)
+    claims = board.claims_list(edge_claims)
+    if player is None or claims is None:
+        player_name = None
+        claims = None
+    else:
+        player_name = player.name
+    costs, scores = player_edge_values(board, scoring, player, claims)
+
+    city_edge_ids = board.city_edge_ids
+    edge_cost = board.edge_cost
+    edge_city1 = board.edge_city1
+    edge_city2 = board.edge_city2
+    target = board.city_ids[city2]
+
+    # Edges that can't be used because another player claimed them.
+    blocked = [claims is not None and claims[edge_id] is not None and claims[edge_id] != player_name
+               for edge_id in range(board.num_edges)]
+
+    # Paths are searched as bitmasks of the cities visited and the edges used, with their cost and score, so
+    # extending a path never copies anything.
+    city = board.city_ids[city1]
+    queue = deque([(city, 1 << city, 0, 0, 0)])
     result = []
 
-    # Put the first city into the queue.
-    queue.append((city1, set(city1), Path(set(), scoring, player, edge_claims)))
-
     iteration = 0
 
     while queue and iteration < MAX_PATH_ITER and len(result) < MAX_NUM_PATH:
-        city, visited, path = queue.popleft()
+        city, visited, edge_mask, cost, score = queue.popleft()
         iteration += 1
 
         # Add all neighbors to the queue.
-        for outgoing_edge in city_edges[city]:
-            other_city = outgoing_edge.other_city(city)
-
-            # First line makes sure the edge isn't already in the path and it's below max cost.
-            # Second and third line make sure it's not claimed by another player, if that matters.
-            if other_city not in visited and path.cost + outgoing_edge.cost <= max_cost \
-                    and ((edge_claims is None and player is None)
-                         or edge_claims[outgoing_edge] is None or edge_claims[outgoing_edge] == player.name):
-                # Create a copy of the path thus far with the new edge added.
-                updated_path = deepcopy(path)
-                updated_path.add_edge(outgoing_edge, scoring, player, edge_claims)
-
-                if other_city == city2:
-                    # The updated path is a valid path between the two cities.
-                    result.append(updated_path)
+        for edge_id in city_edge_ids[city]:
+            other_city = edge_city2[edge_id] if edge_city1[edge_id] == city else edge_city1[edge_id]
+
+            # Make sure the city isn't already in the path, it's below max cost and it's not claimed by another
+            # player, if that matters.
+            if not visited & (1 << other_city) and cost + edge_cost[edge_id] <= max_cost and not blocked[edge_id]:
+                if other_city == target:
+                    # The extended path is a valid path between the two cities.
+                    edge_ids = edge_ids_of(edge_mask | (1 << edge_id))
+                    path = Path(set(), None)
+                    path.edges = set(board.edges[path_edge_id] for path_edge_id in edge_ids)
+                    path.edge_ids = frozenset(edge_ids)
+                    path.cost = cost + costs[edge_id]
+                    path.score = score + scores[edge_id]
+                    result.append(path)
                 else:
-                    # Add the updated path and new city to the queue.
-                    queue.append((other_city, visited.union(set(other_city)), updated_path))
+                    # Add the extended path and new city to the queue.
+                    queue.append((other_city, visited | (1 << other_city), edge_mask | (1 << edge_id),
+                                  cost + costs[edge_id], score + scores[edge_id]))
 
     return result
 
 
+def iter_cheapest_paths(city1, city2, city_edges, scoring, player=None, edge_claims=None, board=None, max_cost=None):
+    """
+    Generate the paths that connect two cities in ascending order of cost, with Yen's algorithm.  Paths don't visit a
+    city twice.  Every path costs one search for every edge of the path before it, so only as many paths as are taken
+    from the generator are searched for.
+
+    :param city1: The first city to connect.
+    :param city2: The second city to connect.
+    :param city_edges: All of the edges that make up the map.
+    :param scoring: The scoring dictionary for the game.
+    :param player: Optional parameter for a player.  If included, all edges owned by the player have 0 cost, and edges
+    claimed by anyone else aren't used.
+    :param edge_claims: Optional parameter for edge_claims, either as a dictionary with edges as keys or as a sequence
+    indexed by edge id.
+    :param board: Optional compiled board.  If not included, city_edges will be compiled.
+    :param max_cost: Optional maximum cost of the paths generated.
+    :return: A generator of paths.
+    """
+    if board is None:
+        board = compile_board(city_edges)
+    claims = board.claims_list(edge_claims)
+    if player is None or claims is None:
+        player_name = None
+        claims = None
+    else:
+        player_name = player.name
+    costs, scores = player_edge_values(board, scoring, player, claims)
+    if max_cost is None:
+        max_cost = float("inf")
+
+    # Edges that can't be used because another player claimed them.
+    blocked = [claims is not None and claims[edge_id] is not None and claims[edge_id] != player_name
+               for edge_id in range(board.num_edges)]
+
+    source = board.city_ids[city1]
+    target = board.city_ids[city2]
+
+    path = _cheapest_path(board, costs, blocked, source, target, set(), 0)
+    if path is None or path[0] > max_cost:
+        return
+
+    # Paths are tuples of their cost, cities and edge ids, in order.  Candidates are kept in a heap, with a counter so
+    # ties never compare their cities.
+    found = [path]
+    candidates = []
+    seen = {path[2]}
+    counter = 0
+
+    while True:
+        cost, cities, edge_ids = path
+        yield build_path(board, edge_ids, costs, scores)
+
+        # Branch off from every city of the last path, without using any edge that a path found before takes from the
+        # same root, or going back through the root.
+        root_cost = 0
+        for index in range(len(edge_ids)):
+            root_edges = edge_ids[:index]
+            removed_edges = []
+            for other_cost, other_cities, other_edges in found:
+                if len(other_edges) > index and other_edges[:index] == root_edges and not blocked[other_edges[index]]:
+                    blocked[other_edges[index]] = True
+                    removed_edges.append(other_edges[index])
+
+            spur = _cheapest_path(board, costs, blocked, cities[index], target, set(cities[:index]), root_cost)
+
+            for edge_id in removed_edges:
+                blocked[edge_id] = False
+
+            if spur is not None and spur[0] <= max_cost:
+                candidate = (spur[0], cities[:index] + spur[1], root_edges + spur[2])
+                if candidate[2] not in seen:
+                    seen.add(candidate[2])
+                    counter += 1
+                    heappush(candidates, (candidate[0], counter, candidate))
+
+            root_cost += costs[edge_ids[index]]
+
+        if not candidates:
+            return
+
+        path = heappop(candidates)[2]
+        found.append(path)
+
+
+def _cheapest_path(board, costs, blocked, source, target, removed_cities, start_cost):
+    """
+    Find the cheapest path between two cities with Dijkstra's algorithm.
+
+    :param board: The compiled board.
+    :param costs: The cost of every edge, indexed by edge id.
+    :param blocked: Whether every edge can't be used, indexed by edge id.
+    :param source: The id of the city to start from.
+    :param target: The id of the city to reach.
+    :param removed_cities: A set of the ids of cities that can't be visited.
+    :param start_cost: The cost added to the path.
+    :return: A tuple of the cost of the path, a tuple of the ids of its cities and a tuple of the ids of its edges, or
+    None if there is no path.
+    """
+    city_edge_ids = board.city_edge_ids
+    edge_city1 = board.edge_city1
+    edge_city2 = board.edge_city2
+
+    distances = {source: start_cost}
+    last_edges = {}
+    done = set()
+    queue = [(start_cost, source)]
+
+    while queue:
+        distance, city = heappop(queue)
+        if city in done:
+            continue
+        done.add(city)
+
+        if city == target:
+            edge_ids = []
+            cities = [target]
+            while city != source:
+                edge_id = last_edges[city]
+                edge_ids.append(edge_id)
+                city = edge_city2[edge_id] if edge_city1[edge_id] == city else edge_city1[edge_id]
+                cities.append(city)
+
+            return distance, tuple(reversed(cities)), tuple(reversed(edge_ids))
+
+        for edge_id in city_edge_ids[city]:
+            if blocked[edge_id]:
+                continue
+
+            other_city = edge_city2[edge_id] if edge_city1[edge_id] == city else edge_city1[edge_id]
+            if other_city in removed_cities or other_city in done:
+                continue
+
+            if distance + costs[edge_id] < distances.get(other_city, float("inf")):
+                distances[other_city] = distance + costs[edge_id]
+                last_edges[other_city] = edge_id
+                heappush(queue, (distance + costs[edge_id], other_city))
+
+    return None
 
 
 def get_adjacent_cities(city, routes, player):
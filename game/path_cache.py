@@ -0,0 +1,115 @@
+from collections import OrderedDict
+
+
+class PathCache:
+    """
+    Remembers the paths found for sets of destinations, keyed by the destinations, the player they were found for and
+    the maximum cost.  Every entry depends on the edges of every candidate path its paths were chosen from, since
+    paths are capped or pruned, and taking away a candidate that was left out can still change which paths are found.
+
+    Claims by other players only take edges away, so when an edge is claimed only the entries that depend on that edge
+    or its double are dropped.  Edges claimed by the player an entry is for become free, which can make any path
+    cheaper, so all of that player's entries are dropped.  Claims undone with `Game.undo` give edges back, which can
+    make any path cheaper for anyone, so every entry is dropped.
+
+    Once there are more than `max_entries` entries, the least recently used ones are dropped.  Subscribe `edge_claimed`
+    and `edge_unclaimed` to a game's EventType.edge_claimed and EventType.edge_unclaimed events to keep the cache up
+    to date.
+    """
+
+    def __init__(self, max_entries=128):
+        """
+        :param max_entries: The most entries kept.
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        # Tuples of the paths and the bitmask of the edge ids they depend on, from least to most recently used.
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, destinations, player_name, max_cost):
+        """
+        :param destinations: The destinations.
+        :param player_name: The name of the player the paths are for.
+        :param max_cost: The maximum cost of the paths.
+        :return: A new list of the paths remembered for the destinations, or None if there aren't any.
+        """
+        key = (frozenset(destinations), player_name, max_cost)
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries[key] = entry
+
+        return list(entry[0])
+
+    def put(self, destinations, player_name, max_cost, paths, edge_mask=None):
+        """
+        Remember the paths found for destinations.
+
+        :param destinations: The destinations.
+        :param player_name: The name of the player the paths are for.
+        :param max_cost: The maximum cost of the paths.
+        :param paths: A list of the paths, which must have edge ids.
+        :param edge_mask: Optional bitmask of the ids of the edges of every candidate path the paths were chosen from,
+        like the one `find_paths_for_destinations` returns with candidate_mask.  By default, only the edges of the
+        paths are used, which is only right if no candidate was left out.
+        """
+        if edge_mask is None:
+            edge_mask = 0
+            for path in paths:
+                for edge_id in path.edge_ids:
+                    edge_mask |= 1 << edge_id
+
+        key = (frozenset(destinations), player_name, max_cost)
+        self._entries.pop(key, None)
+        self._entries[key] = (list(paths), edge_mask)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, player_name, edge_id, double_edge_id=None):
+        """
+        Drop the entries that a claim may have changed.
+
+        :param player_name: The name of the player who claimed the edge.
+        :param edge_id: The id of the edge in the compiled board.
+        :param double_edge_id: The id of the double edge claimed with it, if any.
+        """
+        claimed_mask = 1 << edge_id
+        if double_edge_id is not None:
+            claimed_mask |= 1 << double_edge_id
+
+        for key, (paths, edge_mask) in self._entries.items():
+            if key[1] == player_name or edge_mask & claimed_mask:
+                del self._entries[key]
+
+    def clear(self):
+        """
+        Drop every entry.
+        """
+        self._entries.clear()
+
+    def edge_claimed(self, game, event):
+        """
+        Handles EventType.edge_claimed events.
+
+        :param game: The game.
+        :param event: The EdgeClaimedEvent.
+        """
+        self.invalidate(event.player_name, event.edge_id, event.double_edge_id)
+
+    def edge_unclaimed(self, game, event):
+        """
+        Handles EventType.edge_unclaimed events.
+
+        :param game: The game.
+        :param event: The EdgeUnclaimedEvent.
+        """
+        self.clear()
@@ -1,16 +1,32 @@
+from random import Random
+
+
 class Player:
     """
     A player.  In addition to being a token that allows moves to happen, also has events that trigger on certain game
     states.
+
+    Players should make random choices with `self.rng`, which the game reseeds before it starts, so that a game can be
+    played again from its seed.
     """
 
-    def __init__(self, name, print_debug=False):
+    def __init__(self, name, print_debug=False, seed=None):
         self.name = name
         self.print_debug = print_debug
+        self.seed = seed
+        self.rng = Random(seed)
 
     def __str__(self):
         return self.name
 
+    def reset_rng(self, seed):
+        """
+        Reset the random number generator before a game starts.
+
+        :param seed: The seed the game derived for this player, which is used if the player has no seed of its own.
+        """
+        self.rng = Random(self.seed if getattr(self, "seed", None) is not None else seed)
+
     def initialize_game(self,game):
         pass
 
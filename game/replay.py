@@ -0,0 +1,138 @@
+from action_log import RecordType, NONE, decode_header, iter_records, record_cards
+from game import Game
+from player import Player
+
+
+class ReplayPlayer(Player):
+    """
+    Stands in for a player in a replayed game.  It never takes a turn, and selects the destinations the action log says
+    were kept.
+    """
+
+    def __init__(self, name, replay):
+        Player.__init__(self, name)
+        self._replay = replay
+
+    def select_starting_destinations(self, game, destinations):
+        return self._replay.kept_destinations(destinations, RecordType.starting_destinations)
+
+    def select_destinations(self, game, destinations):
+        return self._replay.kept_destinations(destinations, RecordType.draw_destinations)
+
+
+class Replay:
+    """
+    Plays a game again from its seeds and action log, without asking any players for their decisions.  The actions are
+    performed by the rules of Game, so the replayed game is in exactly the state the original one was, and can be
+    stopped after any turn.
+    """
+
+    def __init__(self, seeds, log, player_names=None, maximum_rounds=None):
+        """
+        :param seeds: The seeds of the game, as returned by Game.get_seeds.
+        :param log: The action log of the game, as returned by Game.get_action_log.
+        :param player_names: The names of the players, in turn order.  By default, "Player 1", "Player 2", etc..
+        :param maximum_rounds: The maximum number of rounds to play the game with.  By default, the one the game was
+        played with, from the log.
+        """
+        if maximum_rounds is None:
+            maximum_rounds = decode_header(log)
+
+        self._records = list(iter_records(log))
+        self._position = 0
+
+        # Every player selects their starting destinations before the first turn.
+        if player_names is None:
+            num_players = 0
+            while num_players < len(self._records) and \
+                    self._records[num_players][1] == RecordType.starting_destinations:
+                num_players += 1
+            player_names = ["Player %d" % (i + 1) for i in range(num_players)]
+
+        self.players = [ReplayPlayer(name, self) for name in player_names]
+        self.game = Game(self.players, maximum_rounds, seed=seeds[0], deck_seed=seeds[1],
+                         destinations_seed=seeds[2])
+
+    def kept_destinations(self, destinations, record_type):
+        """
+        Read the destinations kept from the next record of the log.
+
+        :param destinations: The destinations drawn.
+        :param record_type: The type of record expected, from RecordType.
+        :return: The destinations kept.
+        """
+        player_index, actual_type, mask = self._records[self._position][:3]
+        if actual_type != record_type:
+            raise Exception("Expected a %s record, found a %s record" % (RecordType.str(record_type),
+                                                                       RecordType.str(actual_type)))
+        self._position += 1
+
+        return [destination for i, destination in enumerate(destinations) if mask & (1 << i)]
+
+    def is_done(self):
+        """
+        :return: True if every action in the log has been replayed, false otherwise.
+        """
+        return self._position >= len(self._records)
+
+    def step(self):
+        """
+        Replay the next action in the log.
+
+        :return: False if there were no actions left to replay, True otherwise.
+        """
+        if self.is_done():
+            return False
+
+        player_index, record_type, target, counts = self._records[self._position]
+        game = self.game
+
+        # Drawing destinations reads its own record when the player selects destinations.  Destinations are drawn
+        # whether or not it's the player's turn, so they can't be skipped.
+        if record_type == RecordType.draw_destinations:
+            if player_index == NONE:
+                raise Exception("Destinations were drawn by a player who isn't in the game")
+            game.draw_destination_cards(self.players[player_index])
+            return True
+
+        self._position += 1
+
+        # Actions by anyone but the current player, or after the game is over, failed without changing anything.
+        if player_index == NONE or game.is_game_over()[0] or \
+                self.players[player_index] is not game.get_current_player():
+            return True
+
+        player = self.players[player_index]
+        if record_type == RecordType.draw_deck:
+            game.draw_from_deck(player)
+        elif record_type == RecordType.draw_face_up:
+            game.draw_face_up_card(player, target)
+        elif record_type == RecordType.connect:
+            edges = game.get_board().edges
+            game.connect_cities(player, edges[target] if target < len(edges) else None, record_cards(counts))
+
+        return True
+
+    def play_to_turn(self, turn):
+        """
+        Replay actions until a number of turns have been played.  The game is left in the state the player of the next
+        turn saw when deciding on its action.
+
+        :param turn: The number of turns to play.
+        :return: The game.
+        """
+        while self.game.get_rounds_played() < turn and self.step():
+            pass
+
+        return self.game
+
+    def play_to_end(self):
+        """
+        Replay every action in the log.
+
+        :return: The game.
+        """
+        while self.step():
+            pass
+
+        return self.game
@@ -0,0 +1,160 @@
+from heapq import heappush, heappop
+
+INFINITY = float("inf")
+
+
+class ShortestPaths:
+    """
+    The cheapest number of cars between every pair of cities, as seen by one player.  Edges the player has claimed cost
+    nothing, and edges claimed by anyone else can't be used.
+
+    Every row of the table is the tree of shortest paths from one city, so distances are looked up in constant time and
+    paths are reconstructed by walking back along the tree.  When an edge changes owner, only the rows it can change
+    are searched again: rows that reach either city of the edge more cheaply through it when it gets cheaper, and rows
+    whose tree uses it when it gets dearer or is removed.  Every change can be rolled back, like Connectivity.
+    """
+
+    def __init__(self, board, player_name, claims):
+        """
+        :param board: The compiled board.
+        :param player_name: The name of the player the distances are for.
+        :param claims: The owner of every edge, indexed by edge id.
+        """
+        self._board = board
+        self._player_name = player_name
+        self._weights = [self._weight(edge_id, owner) for edge_id, owner in enumerate(claims)]
+
+        num_cities = len(board.cities)
+        self._distances = [None] * num_cities
+        self._last_edges = [None] * num_cities
+        for city in range(num_cities):
+            self._search(city)
+
+        # Tuples of (edge id, old weight, list of (city, old distances, old last edges)) for every change made.
+        self._changes = []
+
+    def _weight(self, edge_id, owner):
+        if owner is None:
+            return self._board.edge_cost[edge_id]
+        if owner == self._player_name:
+            return 0
+        return None
+
+    def _search(self, source):
+        """
+        Find the shortest paths from a city to every other city with Dijkstra's algorithm, replacing its row.
+
+        :param source: The id of the city.
+        """
+        board = self._board
+        weights = self._weights
+        city_edge_ids = board.city_edge_ids
+        edge_city1 = board.edge_city1
+        edge_city2 = board.edge_city2
+
+        distances = [INFINITY] * len(board.cities)
+        last_edges = [None] * len(board.cities)
+        distances[source] = 0
+        done = [False] * len(board.cities)
+
+        queue = [(0, source)]
+        while queue:
+            distance, city = heappop(queue)
+            if done[city]:
+                continue
+            done[city] = True
+
+            for edge_id in city_edge_ids[city]:
+                weight = weights[edge_id]
+                if weight is None:
+                    continue
+
+                other = edge_city2[edge_id] if edge_city1[edge_id] == city else edge_city1[edge_id]
+                if distance + weight < distances[other]:
+                    distances[other] = distance + weight
+                    last_edges[other] = edge_id
+                    heappush(queue, (distance + weight, other))
+
+        self._distances[source] = distances
+        self._last_edges[source] = last_edges
+
+    def set_owner(self, edge_id, owner):
+        """
+        Update the table after an edge has been claimed.
+
+        :param edge_id: The id of the edge in the compiled board.
+        :param owner: The name of the new owner of the edge, or None if it isn't claimed anymore.
+        """
+        old_weight = self._weights[edge_id]
+        weight = self._weight(edge_id, owner)
+        if weight == old_weight:
+            return
+
+        city1 = self._board.edge_city1[edge_id]
+        city2 = self._board.edge_city2[edge_id]
+
+        if weight is not None and (old_weight is None or weight < old_weight):
+            # The edge got cheaper, which only shortens paths that reach one of its cities through the other.
+            affected = [city for city, distances in enumerate(self._distances)
+                        if distances[city1] + weight < distances[city2] or
+                        distances[city2] + weight < distances[city1]]
+        else:
+            # Trees that don't use the edge are still shortest paths.
+            affected = [city for city, last_edges in enumerate(self._last_edges)
+                        if last_edges[city1] == edge_id or last_edges[city2] == edge_id]
+
+        self._weights[edge_id] = weight
+        rows = [(city, self._distances[city], self._last_edges[city]) for city in affected]
+        self._changes.append((edge_id, old_weight, rows))
+
+        for city in affected:
+            self._search(city)
+
+    def mark(self):
+        """
+        :return: A marker for the current state, which can be passed to `rollback`.
+        """
+        return len(self._changes)
+
+    def rollback(self, mark):
+        """
+        Undo every change made since a marker was taken.
+
+        :param mark: The marker returned by `mark`.
+        """
+        changes = self._changes
+        while len(changes) > mark:
+            edge_id, old_weight, rows = changes.pop()
+            self._weights[edge_id] = old_weight
+            for city, distances, last_edges in rows:
+                self._distances[city] = distances
+                self._last_edges[city] = last_edges
+
+    def distance(self, city1, city2):
+        """
+        :param city1: The id of the first city.
+        :param city2: The id of the second city.
+        :return: The fewest cars the player still needs to connect the cities, or infinity if they can't be connected.
+        """
+        return self._distances[city1][city2]
+
+    def path(self, city1, city2):
+        """
+        :param city1: The id of the first city.
+        :param city2: The id of the second city.
+        :return: A list of the ids of the edges on a shortest path from the first city to the second, in order, or None
+        if the cities can't be connected.
+        """
+        last_edges = self._last_edges[city1]
+        if self._distances[city1][city2] == INFINITY:
+            return None
+
+        path = []
+        city = city2
+        while city != city1:
+            edge_id = last_edges[city]
+            path.append(edge_id)
+            city = self._board.other_city(edge_id, city)
+
+        path.reverse()
+        return path
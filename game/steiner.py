@@ -0,0 +1,280 @@
+from heapq import heapify, heappush, heappop
+
+from board import get_scoring, compile_board
+from methods import build_path, edge_ids_of, player_edge_values
+
+# The most cities the destinations can have.
+MAX_TERMINALS = 8
+
+
+def find_steiner_networks(destinations, city_edges, max_cost, scoring=get_scoring(), player=None, edge_claims=None,
+                          board=None, num_networks=5, candidate_mask=False):
+    """
+    Find the cheapest networks of edges that connect every destination, with the Dreyfus-Wagner dynamic program for
+    Steiner trees.  Networks are built up from the cheapest trees connecting every subset of the destinations' cities,
+    and trees for destinations that don't need to be connected to each other are combined in every way, so a network
+    may be disconnected.
+
+    The cheapest network is exact.  Every step keeps the `num_networks` cheapest networks it finds rather than just
+    the cheapest one, and the rest of the networks returned are the cheapest of those.  The work grows with the square
+    of `num_networks`, and by a factor of 3 for every city.
+
+    :param destinations: A list of the destinations to connect.
+    :param city_edges: All of the edges that make up the map.
+    :param max_cost: The maximum cost of all networks returned.
+    :param scoring: The scoring dictionary for the game.
+    :param player: Optional parameter for a player.  If included, all edges owned by the player have 0 cost, and edges
+    claimed by anyone else aren't used.
+    :param edge_claims: Optional parameter for edge_claims, either as a dictionary with edges as keys or as a sequence
+    indexed by edge id.
+    :param board: Optional compiled board.  If not included, city_edges will be compiled.
+    :param num_networks: The number of networks to return.
+    :param candidate_mask: Optional boolean to also return the bitmask of the ids of the edges of every tree kept along
+    the way.  The networks are only built from those trees, so other players claiming any other edge doesn't change
+    them.
+    :return: A list of up to `num_networks` paths, ordered by cost.  With candidate_mask, a tuple of the list and the
+    bitmask.
+    """
+    if board is None:
+        board = compile_board(city_edges)
+    claims = board.claims_list(edge_claims)
+    if player is None or claims is None:
+        player_name = None
+        claims = None
+    else:
+        player_name = player.name
+    costs, scores = player_edge_values(board, scoring, player, claims)
+
+    # Edges that can't be used because another player claimed them.
+    blocked = [claims is not None and claims[edge_id] is not None and claims[edge_id] != player_name
+               for edge_id in range(board.num_edges)]
+
+    city_ids = board.city_ids
+    terminals = sorted(set(city_ids[city] for destination in destinations
+                           for city in (destination.city1, destination.city2)))
+    if len(terminals) > MAX_TERMINALS:
+        raise ValueError("Can't connect more than %d cities, got %d" % (MAX_TERMINALS, len(terminals)))
+
+    # Every destination is the bitmask of its 2 cities' indices in terminals.
+    terminal_bits = {city: 1 << index for index, city in enumerate(terminals)}
+    pairs = [terminal_bits[city_ids[destination.city1]] | terminal_bits[city_ids[destination.city2]]
+             for destination in destinations]
+
+    city_masks = _city_masks(board)
+    shared_costs = {}
+    trees, kept_mask = _steiner_trees(board, terminals, costs, blocked, max_cost, num_networks, city_masks,
+                                      shared_costs)
+
+    # A network is a tree for every group of destinations that share one.
+    networks = {}
+    for groups in _partitions(pairs):
+        labels = [(0, 0)]
+        for group in groups:
+            subset = 0
+            for pair in group:
+                subset |= pair
+            labels = _combine(labels, trees[subset], costs, max_cost, num_networks, shared_costs)
+
+        for cost, edge_mask in labels:
+            edge_mask = _trim(edge_mask, terminals, city_masks)
+            networks[edge_mask] = sum(costs[edge_id] for edge_id in edge_ids_of(edge_mask))
+
+    best = sorted(networks.iteritems(), key=lambda network: network[1])[:num_networks]
+    paths = [build_path(board, edge_ids_of(edge_mask), costs, scores) for edge_mask, cost in best]
+
+    if candidate_mask:
+        return paths, kept_mask
+
+    return paths
+
+
+def _city_masks(board):
+    """
+    :return: A list of the bitmasks of the edges of every city, indexed by city id.
+    """
+    city_masks = []
+    for edge_ids in board.city_edge_ids:
+        city_mask = 0
+        for edge_id in edge_ids:
+            city_mask |= 1 << edge_id
+        city_masks.append(city_mask)
+
+    return city_masks
+
+
+def _trim(edge_mask, terminals, city_masks):
+    """
+    Remove the edges of a network that only lead to cities that aren't terminals.  Trees reach such cities when
+    they're spread, and keep the edges when they're spread back.
+
+    :return: The bitmask of the remaining edges.
+    """
+    leaves = [city for city in range(len(city_masks)) if city not in terminals]
+    trimmed = True
+    while trimmed:
+        trimmed = False
+        for city in leaves:
+            city_edges = edge_mask & city_masks[city]
+            # A single edge is the only bit set.
+            if city_edges and not city_edges & (city_edges - 1):
+                edge_mask ^= city_edges
+                trimmed = True
+
+    return edge_mask
+
+
+def _steiner_trees(board, terminals, costs, blocked, max_cost, num_trees, city_masks, shared_costs):
+    """
+    :return: A tuple of a dictionary and a bitmask.  The dictionary has every nonempty bitmask of terminals as keys,
+    and a list of up to `num_trees` tuples of the cost and edge bitmask of the cheapest trees connecting those
+    terminals as values.  The bitmask has the edges of every tree kept at any city.
+    """
+    num_cities = len(board.cities)
+    trees = {}
+    kept_mask = 0
+
+    # labels[subset][city] holds the cheapest trees connecting the terminals in subset and the city.  Proper subsets
+    # are numerically smaller, so they're always done first.
+    labels = {}
+    for subset in range(1, 1 << len(terminals)):
+        lowest = subset & -subset
+        if subset == lowest:
+            start = [[] for city in range(num_cities)]
+            start[terminals[lowest.bit_length() - 1]] = [(0, 0)]
+        else:
+            # Join the trees of 2 complementary subsets at every city.  The subset with the lowest terminal is
+            # always the first, so every split is only joined once.
+            start = [[] for city in range(num_cities)]
+            rest = subset ^ lowest
+            other = rest
+            while other:
+                subset1 = subset ^ other
+                subset2 = other
+                labels1 = labels[subset1]
+                labels2 = labels[subset2]
+                for city in range(num_cities):
+                    if labels1[city] and labels2[city]:
+                        # Only joins cheaper than the ones the city already has can be kept.
+                        best = start[city]
+                        limit = best[-1][0] if len(best) >= num_trees else max_cost
+                        joined = _combine(labels1[city], labels2[city], costs, limit, num_trees, shared_costs)
+                        if joined:
+                            start[city] = _merge(best, joined, num_trees)
+                other = (other - 1) & rest
+
+        labels[subset] = _spread(board, start, costs, blocked, max_cost, num_trees, city_masks)
+        trees[subset] = labels[subset][terminals[lowest.bit_length() - 1]]
+        for city_trees in labels[subset]:
+            for cost, edge_mask in city_trees:
+                kept_mask |= edge_mask
+
+    return trees, kept_mask
+
+
+def _spread(board, start, costs, blocked, max_cost, num_trees, city_masks):
+    """
+    Extend trees along edges with Dijkstra's algorithm, where every city keeps up to `num_trees` different trees.
+
+    :param start: A list of the tuples of cost and edge bitmask of the trees at every city to start from, indexed by
+    city id.
+    :return: A list of the tuples of cost and edge bitmask of the cheapest trees at every city, indexed by city id.
+    """
+    city_edge_ids = board.city_edge_ids
+    edge_city1 = board.edge_city1
+    edge_city2 = board.edge_city2
+
+    queue = [(cost, city, edge_mask) for city, trees in enumerate(start) for cost, edge_mask in trees]
+    heapify(queue)
+    result = [[] for trees in start]
+    seen = [set() for trees in start]
+
+    while queue:
+        cost, city, edge_mask = heappop(queue)
+        if len(result[city]) >= num_trees or edge_mask in seen[city]:
+            continue
+        seen[city].add(edge_mask)
+        result[city].append((cost, edge_mask))
+
+        for edge_id in city_edge_ids[city]:
+            if blocked[edge_id]:
+                continue
+
+            other_city = edge_city2[edge_id] if edge_city1[edge_id] == city else edge_city1[edge_id]
+            if len(result[other_city]) >= num_trees:
+                continue
+
+            if edge_mask & city_masks[other_city]:
+                # The tree already reaches the other city.
+                heappush(queue, (cost, other_city, edge_mask))
+            elif cost + costs[edge_id] <= max_cost:
+                heappush(queue, (cost + costs[edge_id], other_city, edge_mask | (1 << edge_id)))
+
+    return result
+
+
+def _combine(labels1, labels2, costs, max_cost, num_networks, shared_costs):
+    """
+    Join every network of one list with every network of another, counting shared edges once.  Both lists must be
+    ordered by cost.  A joined network costs at least as much as either of its parts, so once enough networks have
+    been found, parts that cost more than the most expensive of them are skipped.
+
+    :param shared_costs: A dictionary caching the cost of bitmasks of shared edges.
+    :return: A list of up to `num_networks` tuples of the cost and edge bitmask of the cheapest different networks,
+    ordered by cost.
+    """
+    networks = {}
+    limit = max_cost
+    for cost1, edge_mask1 in labels1:
+        if cost1 > limit:
+            break
+
+        for cost2, edge_mask2 in labels2:
+            if cost2 > limit:
+                break
+
+            edge_mask = edge_mask1 | edge_mask2
+            if edge_mask in networks:
+                continue
+
+            cost = cost1 + cost2
+            shared = edge_mask1 & edge_mask2
+            if shared:
+                shared_cost = shared_costs.get(shared)
+                if shared_cost is None:
+                    shared_cost = shared_costs[shared] = sum(costs[edge_id] for edge_id in edge_ids_of(shared))
+                cost -= shared_cost
+
+            if cost <= limit:
+                networks[edge_mask] = cost
+
+        if len(networks) >= num_networks:
+            limit = sorted(networks.itervalues())[num_networks - 1]
+
+    return sorted((cost, edge_mask) for edge_mask, cost in networks.iteritems())[:num_networks]
+
+
+def _merge(labels1, labels2, num_networks):
+    """
+    :return: A list of up to `num_networks` tuples of the cost and edge bitmask of the cheapest different networks in
+    either list, ordered by cost.
+    """
+    networks = dict((edge_mask, cost) for cost, edge_mask in labels1)
+    networks.update((edge_mask, cost) for cost, edge_mask in labels2)
+
+    return sorted((cost, edge_mask) for edge_mask, cost in networks.iteritems())[:num_networks]
+
+
+def _partitions(items):
+    """
+    :param items: A list.
+    :return: A generator of every way to split the list into groups, as lists of lists.
+    """
+    if not items:
+        yield []
+        return
+
+    first = items[0]
+    for partition in _partitions(items[1:]):
+        yield [[first]] + partition
+        for index in range(len(partition)):
+            yield partition[:index] + [[first] + partition[index]] + partition[index + 1:]
@@ -0,0 +1,147 @@
+from classes import PlayerInfo, Hand, FrozenCardCounts
+
+
+class FrozenDict(dict):
+    """
+    A dictionary that can't be modified.  Reading is as fast as with a normal dictionary, and `copy` returns a normal,
+    mutable dictionary.
+    """
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("%s is read-only" % type(self).__name__)
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
+
+
+def freeze_player_info(player_info):
+    """
+    Create an immutable snapshot of a player's info.
+
+    :param player_info: The PlayerInfo to take a snapshot of.
+    :return: A new PlayerInfo whose destinations are tuples and whose hand can't be modified.
+    """
+    snapshot = PlayerInfo()
+    snapshot.score = player_info.score
+    snapshot.destinations = tuple(player_info.destinations) if player_info.destinations is not None else None
+    snapshot.completed_destinations = tuple(player_info.completed_destinations)
+    snapshot.num_cars = player_info.num_cars
+    snapshot.draws = player_info.draws
+    snapshot.connects = player_info.connects
+
+    if player_info.hand is not None:
+        snapshot.hand = Hand([])
+        snapshot.hand.cards = FrozenCardCounts(player_info.hand.cards)
+
+    return snapshot
+
+
+class GameView:
+    """
+    A read-only snapshot of the observable state of a game.
+
+    The game hands out the same view to every caller until its state changes, so taking a view costs nothing beyond
+    the first call after each action.  Everything a view returns is immutable and keeps describing the game as it was
+    when the view was taken, just like the copies returned by the getters on Game.
+    """
+
+    def __init__(self, game):
+        """
+        Takes a snapshot of a game.
+
+        :param game: The game.
+        """
+        self._board = game.get_board()
+        self._claims = game.get_claims()
+        self._double_edges = game.get_double_edges_dict()
+        self._history = tuple(game._history)
+        self._edge_claims = None
+
+        self._player_info = {player: freeze_player_info(player_info)
+                             for player, player_info in game._player_info.iteritems()}
+        self._face_up_cards = tuple(game._face_up_cards)
+        self._visible_scores = FrozenDict(game._visible_scores)
+        self._current_player = game._players[game._current_player_index]
+        self._num_actions_remaining = game._num_actions_remaining
+        self._rounds_count = game._rounds_count
+        self._game_over = game.is_game_over()
+
+    def get_board(self):
+        """
+        :return: The compiled board.
+        """
+        return self._board
+
+    def get_claims(self):
+        """
+        :return: A tuple with the claims of all edges, indexed by edge id.
+        """
+        return self._claims
+
+    def get_edge_claims(self):
+        """
+        :return: A read-only dictionary with all edge claims.
+        """
+        if self._edge_claims is None:
+            self._edge_claims = FrozenDict(zip(self._board.edges, self._claims))
+
+        return self._edge_claims
+
+    def get_double_edges_dict(self):
+        """
+        :return: A read-only dictionary of double edges.
+        """
+        return self._double_edges
+
+    def get_player_info(self, player):
+        """
+        :param player: The player.
+        :return: A read-only snapshot of the player's game info.
+        """
+        return self._player_info[player]
+
+    def get_history(self):
+        """
+        :return: A tuple of history events, with the first event played this game at index 0.
+        """
+        return self._history
+
+    def get_face_up_cards(self):
+        """
+        :return: A tuple of the face up cards.
+        """
+        return self._face_up_cards
+
+    def get_visible_scores(self):
+        """
+        :return: A read-only dictionary of all players by name and their visible scores.
+        """
+        return self._visible_scores
+
+    def get_remaining_actions(self, player):
+        """
+        :param player: The player.
+        :return: The number of actions or 0 if it is the wrong turn.
+        """
+        return self._num_actions_remaining if self.is_turn(player) else 0
+
+    def get_rounds_played(self):
+        """
+        :return: rounds play count number
+        """
+        return self._rounds_count
+
+    def is_turn(self, player):
+        """
+        :param player: The player.
+        :return: True if it is this player's turn, false otherwise.
+        """
+        return player == self._current_player
+
+    def is_game_over(self):
+        """
+        :return: A tuple with a boolean and a string, as returned by Game.is_game_over.
+        """
+        return self._game_over
@@ -264,19 +264,20 @@ class GUI:
 
     def update_display(self, game):
         scores = game.get_visible_scores()
+        view = game.get_view()
 
         # print scores
         for player in game._players:
-            cards = game.get_player_info(player).hand.cards
-            for card in cards:
+            cards = view.get_player_info(player).hand.cards
+            for card in range(9):
                 if (player.name == self.player_1):
                     self.player_1_cards[str(card)].set_text(str(cards[card]))
                     self.p1_score.set_text(str(scores[player.name]))
-                    self.p1_cars.set_text(str(game.get_player_info(player).num_cars))
+                    self.p1_cars.set_text(str(view.get_player_info(player).num_cars))
                 elif (player.name == self.player_2):
                     self.player_2_cards[str(card)].set_text(str(cards[card]))
                     self.p2_score.set_text(str(scores[player.name]))
-                    self.p2_cars.set_text(str(game.get_player_info(player).num_cars))
+                    self.p2_cars.set_text(str(view.get_player_info(player).num_cars))
 
     def update_edges(self, game):
         edges = game.get_edge_claims()
@@ -1,22 +1,42 @@
+import csv
 import datetime
 import os
 
 
 class CSVLog:
     """
-    Creates a log object that can append data to a cvs file.  When a new log is written to file, it is located in
-    'log/{name}-{creation time}.csv'.
+    Creates a log object that streams data to a cvs file.  The file is created when the log is, in
+    'log/{name}-{creation time}.csv', and rows are written through a buffer as they are appended, so memory use doesn't
+    grow with the size of the log and a crash only loses the rows that weren't flushed yet.
     """
-    def __init__(self, name, *titles):
+    def __init__(self, name, *titles, **kwargs):
         """
         Creates a new CSVLog, which will save to a given name.
 
         :param name: The name which will be used when the log is saved.
         :param titles: An optional list of strings to use as titles for the columns in the log.
+        :param flush_every: A keyword argument with the number of rows to append between flushes to disk.  Defaults to
+        100.  With 0, rows are only flushed when the buffer fills up or the log is closed.
+        :param buffer_size: A keyword argument with the size of the file buffer in bytes.  Defaults to 64KB.
         :return: The new CSVLog.
         """
         self.name = name
-        self.content = ",".join(titles)
+        self.flush_every = kwargs.pop("flush_every", 100)
+        buffer_size = kwargs.pop("buffer_size", 1 << 16)
+        if kwargs:
+            raise TypeError("Unexpected keyword arguments: %s" % ", ".join(kwargs))
+
+        # Make sure the directory for output exists
+        if not os.path.exists('log'):
+            os.makedirs('log')
+
+        self.path = 'log/%s-%s.csv' % (self.name, datetime.datetime.now().strftime('%m-%d-%y-%H-%M'))
+        self._file = open(self.path, 'wb', buffer_size)
+        self._writer = csv.writer(self._file, lineterminator='\n')
+        self._unflushed_rows = 0
+
+        if titles:
+            self._writer.writerow(titles)
 
     def append(self, *args):
         """
@@ -25,24 +45,28 @@ class CSVLog:
         :param args: The data to append to the log.  Will ultimately manifest as a line a csv file.
         """
         # Turn all arguments into strings
-        data = []
-        for arg in args:
-            data.append(str(arg))
+        self._writer.writerow([str(arg) for arg in args])
 
-        # Add a new line if content already exists in the file.
-        self.content += '\n' if self.content != '' else ''
+        self._unflushed_rows += 1
+        if self.flush_every and self._unflushed_rows >= self.flush_every:
+            self.flush()
 
-        # Add the new data.
-        self.content += ",".join(data)
-
-    def write(self):
+    def flush(self):
         """
-        Writes the current log to a csv file.  The file will be saved in 'log/{name}-{creation time}.csv'.
+        Writes every row appended so far to disk.
         """
-        # Make sure the directory for output exists
-        if not os.path.exists('log'):
-            os.makedirs('log')
+        self._file.flush()
+        self._unflushed_rows = 0
 
-        f = open('log/%s-%s.csv' % (self.name, datetime.datetime.now().strftime('%m-%d-%y-%H-%M')), 'w+')
+    def close(self):
+        """
+        Flushes and closes the file.  Nothing can be appended afterwards.
+        """
+        if not self._file.closed:
+            self._file.close()
 
-        f.write(self.content)
\ No newline at end of file
+    def write(self):
+        """
+        Finishes the log.  The file is saved in 'log/{name}-{creation time}.csv'.
+        """
+        self.close()
@@ -0,0 +1,115 @@
+import datetime
+import os
+
+import numpy as np
+
+
+class NpyLog:
+    """
+    Creates a log object that stores rows of numbers in columns, instead of text.  Every column is kept in a NumPy array
+    of a fixed number of rows, and when those fill up they're saved as shards in 'log/{name}-{creation time}/', one
+    '{column}-{shard}.npy' file per column.  The shards can be memory-mapped when they're read back with `read_shards`.
+    """
+    def __init__(self, name, chunk_size=10000, **columns):
+        """
+        Creates a new NpyLog, which will save to a given name.
+
+        :param name: The name which will be used when the log is saved.
+        :param chunk_size: The number of rows in every shard.
+        :param columns: The columns of the log, each a tuple of the NumPy dtype and the shape of the column in one row,
+        e.g. scores=(np.int32, (2,)).
+        :return: The new NpyLog.
+        """
+        self.name = name
+        self.chunk_size = chunk_size
+        self.columns = {column: (np.dtype(dtype), tuple(shape)) for column, (dtype, shape) in columns.iteritems()}
+
+        self.path = 'log/%s-%s' % (self.name, datetime.datetime.now().strftime('%m-%d-%y-%H-%M'))
+
+        # Make sure the directory for output exists
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+
+        self._chunks = {column: np.zeros((chunk_size,) + shape, dtype=dtype)
+                        for column, (dtype, shape) in self.columns.iteritems()}
+        self._num_rows = 0
+        self._num_shards = 0
+
+    def append(self, **values):
+        """
+        Appends a new row to the log.
+
+        :param values: The value of every column in the row.
+        """
+        row = self._num_rows
+        for column, chunk in self._chunks.iteritems():
+            chunk[row] = values[column]
+
+        self._num_rows += 1
+        if self._num_rows == self.chunk_size:
+            self.flush()
+
+    def save_array(self, name, array):
+        """
+        Saves an array that isn't a column next to the shards, e.g. the names of the players the columns refer to.
+
+        :param name: The name of the array.
+        :param array: The array.
+        """
+        np.save(os.path.join(self.path, '%s.npy' % name), np.asarray(array))
+
+    def flush(self):
+        """
+        Saves the rows appended since the last shard as a new shard.
+        """
+        if self._num_rows == 0:
+            return
+
+        for column, chunk in self._chunks.iteritems():
+            np.save(os.path.join(self.path, '%s-%05d.npy' % (column, self._num_shards)), chunk[:self._num_rows])
+
+        self._num_rows = 0
+        self._num_shards += 1
+
+    def write(self):
+        """
+        Saves the last shard.  The log is saved in 'log/{name}-{creation time}/'.
+        """
+        self.flush()
+
+
+def read_shards(path, mmap_mode='r'):
+    """
+    Reads the shards of a log saved by an NpyLog, in the order they were saved.
+
+    :param path: The directory of the log.
+    :param mmap_mode: The memory-map mode passed to np.load, or None to read the shards into memory.
+    :return: An iterator over dictionaries with each column as a key and the column's array in the shard as a value.
+    """
+    shards = {}
+    for file_name in os.listdir(path):
+        column, _, shard = os.path.splitext(file_name)[0].rpartition('-')
+        if column and shard.isdigit():
+            shards.setdefault(int(shard), {})[column] = os.path.join(path, file_name)
+
+    for shard in sorted(shards):
+        yield {column: np.load(file_path, mmap_mode=mmap_mode) for column, file_path in shards[shard].iteritems()}
+
+
+def load(path):
+    """
+    Reads a log saved by an NpyLog into memory.
+
+    :param path: The directory of the log.
+    :return: A dictionary with each column as a key and the whole column as a value, and every other saved array by its
+    name.
+    """
+    shards = list(read_shards(path, mmap_mode=None))
+    result = {column: np.concatenate([shard[column] for shard in shards]) for column in shards[0]} if shards else {}
+
+    for file_name in os.listdir(path):
+        name = os.path.splitext(file_name)[0]
+        if '-' not in name:
+            result[name] = np.load(os.path.join(path, file_name))
+
+    return result
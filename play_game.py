@@ -12,9 +12,13 @@ from game import Game
 from game.classes import FailureCause, Colors
 from human_player.console_player import ConsolePlayer
 
-# you can chose the player you want by change this two line with other constructor
-p1 = CFActionEvalAI("CFAE")
-p2 = CFCombinedAI("CF Combined")
+
+def create_players():
+    # you can chose the player you want by change this two line with other constructor
+    p1 = CFActionEvalAI("CFAE")
+    p2 = CFCombinedAI("CF Combined")
+    return [p1, p2]
+
 
 # For example 
 # p2 = CFBaseAI("CF Base AI")
@@ -25,12 +29,14 @@ p2 = CFCombinedAI("CF Combined")
 ## you can use Console Player to play with AI, be sure to enable GUI
 # p2 = ConsolePlayer("Human")
 
-players = [p1, p2]
+players = create_players()
 use_gui = False
 iterations = 1
+# With more than 1 process, the games are played in parallel and every process builds its players with create_players.
+processes = 1
 
 # To have multiple tests run at once, create multiple log drivers with different combinations of players, then run each
 # one.
 driver = LogDriver(use_gui = use_gui, players=players, print_debug=False, iterations=iterations, switch_order=True,
-                   replay_deck=True, replay_destinations=True)
+                   replay_deck=True, replay_destinations=True, processes=processes, player_factory=create_players)
 driver.run_game()
@@ -0,0 +1,98 @@
+import unittest
+
+import numpy as np
+
+from game import Game
+from game.batch import BatchGame, UNCLAIMED, BLOCKED, OUTSTANDING, COMPLETED
+from game.classes import FailureCause
+from game.player import Player
+
+
+class TestBatchGame(unittest.TestCase):
+    def setUp(self):
+        self.seeds = range(10)
+        self.batch = BatchGame(self.seeds, maximum_rounds=90)
+        self.games = [Game([Player("Player 1"), Player("Player 2")], maximum_rounds=90, seed=seed)
+                      for seed in self.seeds]
+
+    def check_state(self, g):
+        game = self.games[g]
+        batch = self.batch
+        players = game._players
+        names = {player.name: i for i, player in enumerate(players)}
+        names[None] = UNCLAIMED
+        names["game_rules"] = BLOCKED
+
+        self.assertListEqual(batch.claims[g].tolist(), [names[owner] for owner in game._edge_claims])
+        self.assertListEqual(batch.face_up[g].tolist(), game._face_up_cards)
+        self.assertListEqual(batch.deck[g, :batch.deck_size[g]].tolist(), game._deck)
+        self.assertListEqual(batch.discards[g, :batch.discards_size[g]].tolist(), game._discards)
+        self.assertListEqual([batch.destination_list[d] for d in
+                              batch.destination_deck[g, :batch.destination_deck_size[g]]], game._destinations)
+        self.assertEqual(batch.current[g], game._current_player_index)
+        self.assertEqual(batch.remaining[g], game._num_actions_remaining)
+        self.assertEqual(batch.rounds[g], game._rounds_count)
+        self.assertEqual(batch.over[g], game.is_game_over()[0])
+
+        for p, player in enumerate(players):
+            info = game._player_info[player]
+            self.assertListEqual(batch.hands[g, p].tolist(), info.hand.cards.counts)
+            self.assertEqual(batch.cars[g, p], info.num_cars)
+            self.assertEqual(batch.scores[g, p], info.score)
+            self.assertEqual(batch.visible_scores[g, p], game._visible_scores[player.name])
+            self.assertEqual(batch.draws[g, p], info.draws)
+            self.assertEqual(batch.connects[g, p], info.connects)
+
+            held = batch.destinations[g, p, :batch.destination_counts[g, p]]
+            states = batch.destination_states[g, p, :batch.destination_counts[g, p]]
+            self.assertListEqual(sorted(batch.destination_list[d] for d in held[states == OUTSTANDING]),
+                                 sorted(info.destinations))
+            self.assertListEqual(sorted(batch.destination_list[d] for d in held[states == COMPLETED]),
+                                 sorted(info.completed_destinations))
+
+    def expected_moves(self, g):
+        # The distinct valid actions the game offers.
+        game = self.games[g]
+        actions = game.get_available_actions(game.get_current_player())
+        return set(self.batch.encode(action) for action in actions
+                   if not action.is_connect() or min(action.cards.values()) >= 0)
+
+    def test_matches_game(self):
+        random_state = np.random.RandomState(0)
+
+        for g in range(len(self.games)):
+            self.check_state(g)
+
+        while not self.batch.over.all():
+            moves = self.batch.legal_moves()
+            actions = self.batch.random_actions(random_state, moves)
+
+            # Sometimes try any action at all, to compare failures too.
+            anything = random_state.random_sample(len(self.games)) < 0.1
+            actions[anything] = random_state.randint(0, moves.shape[1], anything.sum())
+
+            expected = []
+            for g, game in enumerate(self.games):
+                if self.batch.over[g]:
+                    expected.append(FailureCause.game_over)
+                    continue
+
+                self.assertSetEqual(set(np.flatnonzero(moves[g])), self.expected_moves(g))
+                result = game.perform_action(game.get_current_player(), self.batch.decode(g, actions[g]))
+                expected.append(result[1])
+
+            self.assertListEqual(self.batch.step(actions).tolist(), expected)
+
+            for g in range(len(self.games)):
+                self.check_state(g)
+
+    def test_play_random(self):
+        self.batch.play_random(np.random.RandomState(1))
+
+        self.assertTrue(self.batch.over.all())
+        self.assertTrue((self.batch.rounds <= 91).all())
+        self.assertEqual(self.batch.winners().shape, (len(self.seeds),))
+
+
+if __name__ == '__main__':
+    unittest.main()
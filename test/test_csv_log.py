@@ -0,0 +1,67 @@
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+
+from logging.csv_log import CSVLog
+
+
+class TestCSVLog(unittest.TestCase):
+    def setUp(self):
+        # Logs are saved relative to the working directory.
+        self.cwd = os.getcwd()
+        self.directory = tempfile.mkdtemp()
+        os.chdir(self.directory)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.directory)
+
+    def read_rows(self, path):
+        with open(path, 'rb') as csv_file:
+            return list(csv.reader(csv_file))
+
+    def test_rows_are_streamed(self):
+        log = CSVLog("test", "Name", "Score", flush_every=2)
+        self.assertTrue(os.path.exists(log.path))
+
+        # Rows stay in the buffer until enough of them are appended.
+        log.append("a", 1)
+        self.assertListEqual(self.read_rows(log.path), [])
+        log.append("b", 2)
+        self.assertListEqual(self.read_rows(log.path), [["Name", "Score"], ["a", "1"], ["b", "2"]])
+
+        log.append("c", 3)
+        self.assertEqual(len(self.read_rows(log.path)), 3)
+        log.flush()
+        self.assertListEqual(self.read_rows(log.path)[-1], ["c", "3"])
+
+    def test_only_flush_when_closed(self):
+        log = CSVLog("test", "Name", flush_every=0)
+        for i in range(10):
+            log.append(i)
+        self.assertListEqual(self.read_rows(log.path), [])
+
+        log.write()
+        self.assertListEqual(self.read_rows(log.path), [["Name"]] + [[str(i)] for i in range(10)])
+
+    def test_close(self):
+        log = CSVLog("test", "Name")
+        log.append("a")
+        log.close()
+
+        # Closing again does nothing, and nothing can be appended anymore.
+        log.close()
+        self.assertRaises(ValueError, log.append, "b")
+
+        # The closed file can be reopened and read like any other CSV file.
+        with open(log.path, 'rb') as csv_file:
+            self.assertEqual(csv_file.read(), "Name\na\n")
+
+    def test_unexpected_keyword_argument(self):
+        self.assertRaises(TypeError, CSVLog, "test", "Name", flush_every=1, rows=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
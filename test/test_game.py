@@ -1,10 +1,17 @@
 import unittest
 from game import Game
+from game.action_log import RecordType, decode, decode_actions
+from game.actions import DrawDeckAction, ConnectAction
 from game.classes import *
+from game.events import EventType, EdgeClaimedEvent, TurnEndedEvent
+from game.latency import LatencyHistogram, LatencyRecorder, Phase
 from game.player import Player
-from game.board import create_city_edges, get_scoring
+from game.board import create_board, create_city_edges, get_scoring, compile_board, CompiledBoard
 from game.game import FailureCause
-from game.methods import connected, find_paths, find_paths_for_destinations
+from game.methods import add_destination, connected, find_paths, find_paths_for_destinations, iter_cheapest_paths, \
+    player_edge_values, prune_dominated_paths
+from game.path_cache import PathCache
+from game.steiner import find_steiner_networks
 
 
 class TestGame(unittest.TestCase):
@@ -62,8 +69,8 @@ class TestGame(unittest.TestCase):
         hand1 = self.game.get_player_info(self.player1).hand
         hand2 = self.game.get_player_info(self.player2).hand
 
-        self.assertDictEqual(hand1.cards, Counter([Colors.red] * 4), "Player 1 should have 4 red cards.")
-        self.assertDictEqual(hand2.cards, Counter([Colors.blue] * 4), "Player 2 should have 4 blue cards.")
+        self.assertEqual(hand1.cards, Counter([Colors.red] * 4), "Player 1 should have 4 red cards.")
+        self.assertEqual(hand2.cards, Counter([Colors.blue] * 4), "Player 2 should have 4 blue cards.")
 
     def test_starting_scores(self):
         score1 = self.game.get_player_info(self.player1).score
@@ -110,7 +117,7 @@ class TestGame(unittest.TestCase):
         hand = self.game.get_player_info(self.player1).hand
 
         # Should have drawn a wild card
-        self.assertDictEqual(hand.cards, Counter(([Colors.red] * 4) + [Colors.none]))
+        self.assertEqual(hand.cards, Counter(([Colors.red] * 4) + [Colors.none]))
         self.assertEqual(self.game.cards_in_deck(), 7)
 
     def test_draw_face_up(self):
@@ -128,7 +135,7 @@ class TestGame(unittest.TestCase):
         self.assertListEqual(self.game.get_face_up_cards(), [Colors.green] * 2 + [Colors.none] * 3)
 
         # Should have drawn a green card
-        self.assertDictEqual(hand.cards, Counter(([Colors.red] * 4) + [Colors.green]))
+        self.assertEqual(hand.cards, Counter(([Colors.red] * 4) + [Colors.green]))
         self.assertEqual(self.game.cards_in_deck(), 7)
 
     def test_draw_deck_ends_turn(self):
@@ -186,6 +193,23 @@ class TestGame(unittest.TestCase):
         hand = self.game.get_player_info(self.player1).hand
         self.assertEqual(str(hand), "(Red, Red, Red, Red)")
 
+    def test_card_counts(self):
+        hand = Hand([Colors.red, Colors.red, Colors.none])
+
+        self.assertEqual(hand.cards, Counter({Colors.red: 2, Colors.none: 1}))
+        self.assertEqual(Counter(hand.cards), Counter({Colors.red: 2, Colors.none: 1}))
+        self.assertEqual(len(hand), 3)
+        self.assertTrue(hand.contains_cards(Counter({Colors.red: 2})))
+        self.assertFalse(hand.contains_cards(Counter({Colors.blue: 1})))
+
+        self.assertTrue(hand.can_afford(Edge("A", "B", 3, Colors.red)))
+        self.assertTrue(hand.can_afford(Edge("A", "B", 3, Colors.none)))
+        self.assertFalse(hand.can_afford(Edge("A", "B", 2, Colors.blue)))
+
+        hand.remove_card(Colors.red)
+        self.assertEqual(sorted(hand.cards.elements()), [Colors.red, Colors.none])
+        self.assertEqual(hand.cards + Counter([Colors.blue]), Counter([Colors.red, Colors.none, Colors.blue]))
+
     def test_color_str(self):
         self.assertEqual(str(Colors.str(Colors.green)), "Green")
         self.assertEqual(str(Colors.str(Colors.none)), "None")
@@ -301,6 +325,324 @@ class TestGame(unittest.TestCase):
 
         self.assertTrue(self.game.is_turn(self.player1))
 
+    def test_compiled_board_ids(self):
+        board = self.game.get_board()
+
+        self.assertEqual(board.cities, ("A", "B", "C", "D", "E"))
+        self.assertEqual(board.edges, tuple(sorted(self.edges)))
+
+        edge_id = board.edge_ids[Edge("B", "D", 2, Colors.red)]
+        self.assertEqual(board.edge_cost[edge_id], 2)
+        self.assertEqual(board.edge_color[edge_id], Colors.red)
+        self.assertEqual(board.edge_score[edge_id], 2)
+        self.assertEqual(board.other_city(edge_id, board.city_ids["D"]), board.city_ids["B"])
+
+    def test_compiled_board_double_edges(self):
+        city_edges, edges = create_board()
+        board = CompiledBoard(city_edges)
+
+        # Identical edges share an id, so they are not double edges of each other.
+        self.assertEqual(len(board.edges), len(set(edges)))
+        self.assertIsNone(board.double_edges[board.edge_ids[Edge("Boston", "Montreal", 2, Colors.none)]])
+
+        red = board.edge_ids[Edge("Boston", "New York", 2, Colors.red)]
+        yellow = board.edge_ids[Edge("Boston", "New York", 2, Colors.yellow)]
+        self.assertEqual(board.double_edges[red], yellow)
+        self.assertEqual(board.double_edges[yellow], red)
+
+    def test_claims_facade(self):
+        edge = Edge("A", "B", 3, Colors.blue)
+        self.game.connect_cities(self.player1, edge, Counter([Colors.blue] * 3))
+
+        claims = self.game.get_claims()
+        self.assertEqual(claims[self.game.get_board().edge_ids[edge]], self.player1.name)
+        self.assertEqual(self.game.get_edge_claims()[edge], self.player1.name)
+        self.assertSetEqual(self.game.get_edges_for_player(self.player1), {edge})
+
+    def test_view_is_read_only(self):
+        view = self.game.get_view()
+        info = view.get_player_info(self.player1)
+
+        self.assertRaises(TypeError, info.hand.cards.__setitem__, Colors.red, 10)
+        self.assertRaises(TypeError, view.get_edge_claims().__setitem__, Edge("A", "B", 3, Colors.blue), "x")
+        self.assertIsInstance(info.destinations, tuple)
+
+    def test_view_is_shared_until_state_changes(self):
+        view = self.game.get_view()
+        self.assertIs(self.game.get_view(), view)
+
+        self.game.draw_from_deck(self.player1)
+
+        # A new view describes the new state, the old one still describes the old state.
+        self.assertIsNot(self.game.get_view(), view)
+        self.assertEqual(view.get_remaining_actions(self.player1), 2)
+        self.assertEqual(self.game.get_view().get_remaining_actions(self.player1), 1)
+        self.assertEqual(len(view.get_history()), 0)
+        self.assertEqual(len(self.game.get_view().get_history()), 1)
+
+    def test_view_history_is_a_snapshot(self):
+        edge = Edge("A", "B", 3, Colors.blue)
+        cards = Counter([Colors.blue] * 3)
+        record = self.game.apply(ConnectAction(edge, cards))
+        view = self.game.get_view()
+
+        # Actions taken after undoing don't show up in older views.
+        self.game.undo(record)
+        self.game.apply(DrawDeckAction())
+        history = view.get_history()
+        self.assertEqual(len(history), 1)
+        self.assertTrue(history[0].action.is_connect())
+
+        # The cards in the history can't be changed, and don't change with the cards the player passed in.
+        cards[Colors.blue] = 0
+        self.assertEqual(history[0].action.cards[Colors.blue], 3)
+        self.assertRaises(TypeError, history[0].action.cards.__setitem__, Colors.blue, 0)
+
+    def test_iter_available_actions(self):
+        actions = self.game.get_available_actions(self.player1)
+
+        self.assertListEqual([str(action) for action in self.game.iter_available_actions(self.player1)],
+                             [str(action) for action in actions])
+        self.assertListEqual(list(self.game.iter_available_actions(self.player2)), [])
+
+    def test_connection_actions_cached(self):
+        connect1 = [action for action in self.game.get_available_actions(self.player1) if action.is_connect()]
+        connect2 = [action for action in self.game.get_available_actions(self.player1) if action.is_connect()]
+
+        # The hand didn't change, so the same actions are reused.
+        self.assertTrue(connect1)
+        self.assertListEqual(connect1, connect2)
+
+        # Shared actions can't be changed by one of their callers.
+        self.assertRaises(TypeError, connect1[0].cards.__setitem__, Colors.none, 10)
+
+        # Claiming an edge clears the cache.
+        self.game.connect_cities(self.player1, Edge("A", "B", 3, Colors.blue), Counter([Colors.blue] * 3))
+        self.assertEqual(len(self.game._connection_actions_cache), 0)
+
+    def test_apply_undo_draw(self):
+        old_info = self.game.get_player_info(self.player1)
+        deck_size = self.game.cards_in_deck()
+
+        record = self.game.apply(DrawDeckAction())
+        self.assertEqual(record.result, (True, FailureCause.none))
+        self.assertEqual(self.game.cards_in_deck(), deck_size - 1)
+
+        self.game.undo(record)
+
+        self.assertEqual(self.game.cards_in_deck(), deck_size)
+        self.assertEqual(self.game.get_player_info(self.player1).hand.cards, old_info.hand.cards)
+        self.assertEqual(self.game.get_remaining_actions(self.player1), 2)
+
+    def test_apply_undo_connect(self):
+        edge = Edge("A", "B", 3, Colors.blue)
+        old_info = self.game.get_player_info(self.player1)
+
+        record = self.game.apply(ConnectAction(edge, Counter([Colors.blue] * 3)))
+        self.assertEqual(record.result, (True, FailureCause.none))
+        self.assertEqual(self.game.get_edge_claims()[edge], self.player1.name)
+
+        self.game.undo(record)
+
+        info = self.game.get_player_info(self.player1)
+        self.assertEqual(self.game.get_edge_claims()[edge], None)
+        self.assertEqual(info.hand.cards, old_info.hand.cards)
+        self.assertEqual(info.num_cars, old_info.num_cars)
+        self.assertEqual(self.game.get_visible_scores()[self.player1.name], 0)
+        self.assertEqual(self.game.cards_in_discard(), 0)
+        self.assertTrue(self.game.is_turn(self.player1))
+
+    def test_connectivity(self):
+        board = self.game.get_board()
+        city_ids = board.city_ids
+        connectivity = self.game.get_connectivity(self.player1)
+        bd = board.edge_ids[Edge("B", "D", 2, Colors.red)]
+
+        self.assertFalse(connectivity.connected(city_ids["A"], city_ids["B"]))
+
+        record = self.game.apply(ConnectAction(Edge("A", "B", 3, Colors.blue), Counter([Colors.blue] * 3)))
+        self.assertTrue(connectivity.connected(city_ids["A"], city_ids["B"]))
+        self.assertFalse(self.game.get_connectivity(self.player2).connected(city_ids["A"], city_ids["B"]))
+
+        # Hypothetical claims don't change the structure.
+        self.assertTrue(connectivity.connected_with(city_ids["A"], city_ids["D"], [bd]))
+        self.assertFalse(connectivity.connected(city_ids["A"], city_ids["D"]))
+
+        self.game.undo(record)
+        self.assertFalse(connectivity.connected(city_ids["A"], city_ids["B"]))
+
+    def test_shortest_paths(self):
+        board = self.game.get_board()
+        city_ids = board.city_ids
+        shortest_paths = self.game.get_shortest_paths(self.player1)
+        other_paths = self.game.get_shortest_paths(self.player2)
+        ab = board.edge_ids[Edge("A", "B", 3, Colors.blue)]
+        ac = board.edge_ids[Edge("A", "C", 4, Colors.red)]
+        bd = board.edge_ids[Edge("B", "D", 2, Colors.red)]
+
+        self.assertEqual(shortest_paths.distance(city_ids["A"], city_ids["D"]), 5)
+        self.assertEqual(shortest_paths.path(city_ids["A"], city_ids["D"]), [ab, bd])
+
+        record = self.game.apply(ConnectAction(Edge("A", "B", 3, Colors.blue), Counter([Colors.blue] * 3)))
+
+        # The player's own edges are free, and other players can't use them.
+        self.assertEqual(shortest_paths.distance(city_ids["A"], city_ids["D"]), 2)
+        self.assertEqual(shortest_paths.distance(city_ids["C"], city_ids["D"]), 6)
+        self.assertEqual(other_paths.distance(city_ids["A"], city_ids["D"]), 12)
+        self.assertEqual(other_paths.path(city_ids["A"], city_ids["B"]), [ac, board.edge_ids[Edge("B", "C", 6,
+                                                                                                 Colors.none)]])
+
+        self.game.undo(record)
+        self.assertEqual(shortest_paths.distance(city_ids["A"], city_ids["D"]), 5)
+        self.assertEqual(other_paths.path(city_ids["A"], city_ids["D"]), [ab, bd])
+
+    def test_path_cache(self):
+        cache = PathCache()
+        self.game.subscribe(EventType.edge_claimed, cache.edge_claimed)
+        to_b = [Destination("A", "B", 5)]
+        to_e = [Destination("D", "E", 5)]
+
+        cache.put(to_b, self.player2.name, 12, find_paths_for_destinations(to_b, self.city_edges, 12))
+        cache.put(to_e, self.player2.name, 12, find_paths_for_destinations(to_e, self.city_edges, 12))
+        cache.put(to_e, self.player1.name, 12, find_paths_for_destinations(to_e, self.city_edges, 12))
+        self.assertEqual(len(cache.get(to_b, self.player2.name, 12)), 2)
+        self.assertIsNone(cache.get(to_b, self.player2.name, 10))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        # Only the other player's paths through the edge, and the claiming player's paths, are dropped.
+        self.game.connect_cities(self.player1, Edge("A", "B", 3, Colors.blue), Counter([Colors.blue] * 3))
+        self.assertIsNone(cache.get(to_b, self.player2.name, 12))
+        self.assertIsNone(cache.get(to_e, self.player1.name, 12))
+        self.assertIsNotNone(cache.get(to_e, self.player2.name, 12))
+
+        # The least recently used entries are dropped.
+        cache.max_entries = 2
+        cache.put(to_b, self.player1.name, 12, [])
+        cache.put(to_b, self.player2.name, 12, [])
+        self.assertIsNone(cache.get(to_e, self.player2.name, 12))
+        self.assertEqual(len(cache), 2)
+
+    def test_path_cache_candidates(self):
+        cache = PathCache()
+        self.game.subscribe(EventType.edge_claimed, cache.edge_claimed)
+        self.game.subscribe(EventType.edge_unclaimed, cache.edge_unclaimed)
+        destinations = [Destination("A", "C", 5), Destination("D", "B", 4)]
+        to_e = [Destination("D", "E", 5)]
+
+        # A-B-C is a candidate for A to C, but it's too expensive to be part of a path.
+        paths, candidate_mask = find_paths_for_destinations(destinations, self.city_edges, 9, num_paths=2,
+                                                            candidate_mask=True)
+        self.assertEqual(len(paths), 1)
+        cache.put(destinations, self.player2.name, 9, paths, candidate_mask)
+        cache.put(to_e, self.player2.name, 12, find_paths_for_destinations(to_e, self.city_edges, 12))
+
+        # Claiming an edge of a candidate that was left out still drops the entry.
+        record = self.game.apply(ConnectAction(Edge("A", "B", 3, Colors.blue), Counter([Colors.blue] * 3)))
+        self.assertIsNone(cache.get(destinations, self.player2.name, 9))
+        self.assertIsNotNone(cache.get(to_e, self.player2.name, 12))
+
+        # Undoing a claim gives an edge back, which can make any path cheaper.
+        self.game.undo(record)
+        self.assertEqual(len(cache), 0)
+
+    def test_seeded_games_repeat(self):
+        game1 = Game([self.player1, self.player2], seed=7)
+        value1 = self.player1.rng.random()
+        game2 = Game([self.player1, self.player2], seed=7)
+        value2 = self.player1.rng.random()
+
+        self.assertEqual(game1.get_seeds(), game2.get_seeds())
+        self.assertEqual(game1.get_face_up_cards(), game2.get_face_up_cards())
+        self.assertEqual(game1._deck, game2._deck)
+        self.assertEqual(game1._destinations, game2._destinations)
+        self.assertEqual(value1, value2)
+
+        # The deck can be replayed on its own.
+        game3 = Game([self.player1, self.player2], seed=8, deck_seed=game1.get_seeds()[1])
+        self.assertEqual(game1._deck, game3._deck)
+        self.assertNotEqual(game1._destinations, game3._destinations)
+
+    def test_turn_ended_events(self):
+        turns = []
+        self.game.add_turn_ended_event(lambda game: turns.append(game.get_current_player()))
+
+        self.game.draw_from_deck(self.player1)
+        self.assertListEqual(turns, [])
+
+        self.game.draw_from_deck(self.player1)
+        self.assertListEqual(turns, [self.player2])
+        self.assertIs(self.game.get_current_player(), self.player2)
+
+    def test_events(self):
+        events = []
+        for event_type in [EventType.card_drawn, EventType.edge_claimed, EventType.turn_ended]:
+            self.game.subscribe(event_type, lambda game, event: events.append(event))
+
+        edge = Edge("A", "B", 3, Colors.blue)
+        self.game.connect_cities(self.player1, edge, Counter([Colors.blue] * 3))
+        self.assertIsInstance(events[0], EdgeClaimedEvent)
+        self.assertEqual(events[0].edge, edge)
+        self.assertEqual(events[0].score, 4)
+        self.assertEqual(events[1], TurnEndedEvent(self.player1.name, self.player2.name, 1))
+
+        del events[:]
+        self.game.draw_from_deck(self.player2)
+        self.game.draw_face_up_card(self.player2, 0)
+
+        self.assertEqual(events[0].player_name, self.player2.name)
+        self.assertIsNone(events[0].face_up_index)
+        self.assertEqual(events[1].face_up_index, 0)
+        self.assertEqual(events[1].replacement, self.game.get_face_up_cards()[0])
+        self.assertEqual(events[2], TurnEndedEvent(self.player2.name, self.player1.name, 2))
+
+    def test_action_log(self):
+        edge = Edge("A", "B", 3, Colors.blue)
+        self.game.connect_cities(self.player1, edge, Counter([Colors.blue] * 3))
+        self.game.draw_from_deck(self.player2)
+        self.game.draw_face_up_card(self.player1, 2)
+
+        log = self.game.get_action_log()
+        records = decode(log)
+
+        # Starting destinations for both players, then one record for every action attempted.
+        self.assertEqual(len(records), 5)
+        self.assertListEqual(list(records["type"]), [RecordType.starting_destinations] * 2 +
+                             [RecordType.connect, RecordType.draw_deck, RecordType.draw_face_up])
+        self.assertListEqual(list(records["player"]), [0, 1, 0, 1, 0])
+        self.assertEqual(records["target"][2], self.game.get_board().edge_ids[edge])
+        self.assertListEqual(list(records["cards"][2]), [0, 0, 3, 0, 0, 0, 0, 0, 0])
+
+        player_index, record_type, action = decode_actions(log, self.game.get_board())[2]
+        self.assertEqual(action.edge, edge)
+        self.assertEqual(action.cards, Counter([Colors.blue] * 3))
+
+    def test_apply_undo_action_log(self):
+        log = self.game.get_action_log()
+
+        self.game.undo(self.game.apply(DrawDeckAction()))
+
+        self.assertEqual(self.game.get_action_log(), log)
+
+    def test_latency_histogram(self):
+        histogram = LatencyHistogram()
+        for i in range(1, 101):
+            histogram.record(i / 1000.0)
+
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.max, 0.1)
+        self.assertAlmostEqual(histogram.percentile(50), 0.05, delta=0.05 * 0.1)
+        self.assertAlmostEqual(histogram.percentile(95), 0.095, delta=0.095 * 0.1)
+        self.assertEqual(histogram.percentile(100), 0.1)
+
+    def test_latency_recorded(self):
+        latency = LatencyRecorder()
+        game = Game([self.player1, self.player2], seed=0, latency=latency)
+        game.draw_destination_cards(self.player1)
+
+        self.assertEqual(latency.histograms[(self.player1.name, "select_starting_destinations", Phase.starting)].count,
+                         1)
+        self.assertEqual(latency.histograms[(self.player1.name, "select_destinations", Phase.early)].count, 1)
+
     def test_find_paths(self):
         # There are 2 paths from A to E.
         self.assertEqual("[(10, 16, [(A, B), (B, D), (D, E)]), (17, 34, [(D, E), (B, C), (A, C), (B, D)])]",
@@ -310,6 +652,30 @@ class TestGame(unittest.TestCase):
         # TODO: Check empty deck gets shuffled
         # TODO: Test connection failures
 
+    def test_find_paths_visit_cities_once(self):
+        city_edges, edges = create_board()
+        paths = find_paths("Seattle", "Denver", city_edges, 20, get_scoring())
+
+        self.assertTrue(paths)
+        for path in paths:
+            cities = [city for edge in path.edges for city in (edge.city1, edge.city2)]
+            # A path through distinct cities only has its ends once, and every other city twice.
+            self.assertEqual(sorted(Counter(cities).values()), [1, 1] + [2] * (len(path.edges) - 1))
+            self.assertEqual(path.cost, sum(edge.cost for edge in path.edges))
+
+    def test_iter_cheapest_paths(self):
+        paths = iter_cheapest_paths("A", "E", self.city_edges, get_scoring())
+        self.assertEqual([(path.cost, len(path.edges)) for path in paths], [(10, 3), (17, 4)])
+
+        # Owned edges are free, and edges claimed by anyone else can't be used.
+        edge_claims = {Edge("B", "D", 2, Colors.red): self.player1.name, Edge("A", "B", 3, Colors.blue): "Player 2"}
+        paths = iter_cheapest_paths("A", "E", self.city_edges, get_scoring(), self.player1, edge_claims)
+        self.assertEqual([path.cost for path in paths], [15])
+
+        # Only as many paths as are taken are searched for.
+        paths = iter_cheapest_paths("A", "E", self.city_edges, get_scoring())
+        self.assertEqual(next(paths).edges, {self.edges[0], self.edges[3], self.edges[4]})
+
     def test_find_path_one_destination(self):
         # Make sure that find_paths_for_destination works with a single destination.
         self.assertEqual(str(find_paths_for_destinations([Destination("A", "E", 2)], self.city_edges, 45,
@@ -348,6 +714,81 @@ class TestGame(unittest.TestCase):
                                                          city_edges, 5,
                                                          get_scoring())))
 
+    def test_prune_dominated_paths(self):
+        edges = [
+            Edge("X", "Y", 3, Colors.red),
+            Edge("X", "Z", 1, Colors.red),
+            Edge("Y", "Z", 2, Colors.red),
+            Edge("W", "X", 1, Colors.blue),
+            Edge("W", "Y", 1, Colors.blue),
+        ]
+        city_edges = create_city_edges(edges)
+        board = compile_board(city_edges)
+        costs, scores = player_edge_values(board, get_scoring())
+
+        # Going through Z needs the same cards as the direct route for fewer points.  Going through W is cheaper, but
+        # needs other cards.
+        paths = prune_dominated_paths(find_paths("X", "Y", city_edges, 10, get_scoring()), board, costs)
+        self.assertEqual([path.edges for path in paths], [{edges[3], edges[4]}, {edges[0]}])
+
+    def test_add_destination(self):
+        edges = [
+            Edge("A", "B", 2, Colors.blue),
+            Edge("A", "C", 2, Colors.red),
+            Edge("B", "C", 3, Colors.none),
+            Edge("B", "D", 4, Colors.none),
+        ]
+        city_edges = create_city_edges(edges)
+        paths = find_paths("A", "B", city_edges, 15, get_scoring())
+
+        # Edges shared with the paths already found are only counted once.
+        paths = add_destination(paths, Destination("B", "C", 4), city_edges, 15)
+        paths.sort(key=lambda path: path.cost)
+        self.assertEqual(paths[0].edges, {edges[0], edges[1]})
+        self.assertEqual(paths[0].cost, 4)
+        combined = find_paths_for_destinations([Destination("A", "B", 5), Destination("B", "C", 4)], city_edges, 15,
+                                               get_scoring())
+        self.assertEqual(sorted((path.cost, sorted(path.edges)) for path in paths),
+                         sorted((path.cost, sorted(path.edges)) for path in combined))
+
+        # Owned edges are free, and paths with edges claimed by anyone else are dropped.
+        owned = add_destination(paths, Destination("B", "D", 7), city_edges, 15, player=self.player1,
+                                edge_claims={edges[0]: self.player1.name})
+        self.assertEqual(min(path.cost for path in owned), 6)
+        blocked = add_destination(paths, Destination("B", "D", 7), city_edges, 15, player=self.player1,
+                                  edge_claims={edges[0]: self.player2.name})
+        self.assertTrue(all(edges[0] not in path.edges for path in blocked))
+        self.assertEqual([path.edges for path in blocked], [{edges[1], edges[2], edges[3]}])
+
+    def test_find_steiner_networks(self):
+        edges = [
+            Edge("A", "B", 2, Colors.blue),
+            Edge("A", "C", 2, Colors.red),
+            Edge("B", "C", 3, Colors.none),
+            Edge("B", "D", 4, Colors.none),
+        ]
+        city_edges = create_city_edges(edges)
+        destinations = [Destination("A", "B", 5), Destination("B", "C", 4)]
+
+        networks = find_steiner_networks(destinations, city_edges, 15)
+        self.assertEqual([network.cost for network in networks], [4, 5, 5, 7])
+        self.assertEqual(networks[0].edges, {edges[0], edges[1]})
+
+        # Trees left out of the networks are still candidates.
+        board = compile_board(city_edges)
+        networks, candidate_mask = find_steiner_networks(destinations, city_edges, 15, board=board, num_networks=1,
+                                                         candidate_mask=True)
+        self.assertEqual(networks[0].edges, {edges[0], edges[1]})
+        self.assertEqual(candidate_mask, sum(1 << board.edge_ids[edge] for edge in edges))
+
+        # Owned edges are free, and edges claimed by anyone else can't be used.
+        networks = find_steiner_networks(destinations, city_edges, 15, player=self.player1,
+                                         edge_claims={edges[0]: self.player1.name})
+        self.assertEqual(networks[0].cost, 2)
+        networks = find_steiner_networks(destinations, city_edges, 15, player=self.player1,
+                                         edge_claims={edges[0]: self.player2.name})
+        self.assertEqual([network.edges for network in networks], [{edges[1], edges[2]}])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from ai.random_ai import RandomAI
+from drivers.log_driver import LogDriver
+
+
+def create_players():
+    return [RandomAI("Player 1"), RandomAI("Player 2")]
+
+
+class TestLogDriver(unittest.TestCase):
+    def create_driver(self, players, processes=1, switch_order=True):
+        return LogDriver(players, use_gui=False, iterations=5, switch_order=switch_order, maximum_rounds=30, seed=7,
+                         processes=processes, player_factory=create_players, write_logs=False)
+
+    def test_pool_results_in_game_order(self):
+        driver = self.create_driver(create_players())
+        planned_games = driver.plan_games()
+        results = [driver.play_planned_game(planned) for planned in planned_games]
+
+        # There are more games than shards, so every shard plays games that aren't next to each other.
+        pool_driver = self.create_driver(create_players(), processes=2)
+        self.assertListEqual(pool_driver.plan_games(), planned_games)
+        pool_results = pool_driver.play_games_in_pool(planned_games)
+
+        self.assertListEqual([result for result, turn_rows, memory_rows in pool_results], results)
+
+    def test_same_players_without_switching_order(self):
+        players = create_players()
+        driver = self.create_driver(players, switch_order=False)
+        for planned in driver.plan_games()[:2]:
+            driver.play_planned_game(planned)
+            self.assertListEqual(driver.players, players)
+
+        # Games in a process pool, and rotated games, get copies of the players.
+        driver.copy_players = True
+        driver.play_planned_game(driver.plan_games()[0])
+        self.assertNotIn(driver.players[0], players)
+
+
+if __name__ == '__main__':
+    unittest.main()
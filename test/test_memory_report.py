@@ -0,0 +1,70 @@
+import unittest
+from copy import deepcopy
+
+from drivers import memory_report
+from drivers.memory_report import MemoryReport
+
+
+class Marker:
+    pass
+
+
+def copy_twice(value):
+    for i in range(2):
+        deepcopy(value)
+
+
+class TestMemoryReport(unittest.TestCase):
+    def setUp(self):
+        self.tracemalloc = memory_report.tracemalloc
+
+    def tearDown(self):
+        memory_report.tracemalloc = self.tracemalloc
+
+    def test_deepcopy_calls(self):
+        report = MemoryReport()
+        report.start()
+        copy_twice({"a": [1, 2, [3, 4]], "b": Marker()})
+        report.stop()
+
+        # Only the calls from copy_twice are counted, not the ones deepcopy makes itself.
+        sites = [(site, count) for kind, site, count in report.rows() if kind == "Deepcopy Calls"]
+        self.assertEqual(len(sites), 1)
+        self.assertTrue(sites[0][0].startswith("test/test_memory_report.py:"))
+        self.assertEqual(sites[0][1], 2)
+        self.assertEqual(report.deepcopy_calls[sites[0][0]], 2)
+
+        # Calls after stopping aren't counted, and starting again starts over.
+        copy_twice([1])
+        self.assertEqual(sum(report.deepcopy_calls.values()), 2)
+        report.start()
+        report.stop()
+        self.assertEqual(sum(report.deepcopy_calls.values()), 0)
+
+    def test_without_tracemalloc(self):
+        memory_report.tracemalloc = None
+
+        report = MemoryReport()
+        report.start()
+        markers = [Marker() for i in range(5000)]
+        report.stop()
+
+        rows = report.rows()
+        self.assertIn("Peak Resident (KB)", [kind for kind, site, value in rows])
+        self.assertIn(["New Objects", "instance", len(markers)], rows)
+
+    @unittest.skipIf(memory_report.tracemalloc is None, "tracemalloc isn't installed")
+    def test_with_tracemalloc(self):
+        report = MemoryReport()
+        report.start()
+        markers = [Marker() for i in range(5000)]
+        report.stop()
+
+        kinds = [kind for kind, site, value in report.rows()]
+        self.assertEqual(kinds[0], "Peak Traced (KB)")
+        self.assertIn("Allocated (KB)", kinds)
+        self.assertTrue(markers)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from logging.npy_log import NpyLog, read_shards, load
+
+
+class TestNpyLog(unittest.TestCase):
+    def setUp(self):
+        # Logs are saved relative to the working directory.
+        self.cwd = os.getcwd()
+        self.directory = tempfile.mkdtemp()
+        os.chdir(self.directory)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        log = NpyLog("test", chunk_size=4, seed=(np.int64, ()), scores=(np.int32, (2,)))
+        log.save_array("players", ["Player 1", "Player 2"])
+
+        seeds = range(10)
+        scores = [[i, -i] for i in range(10)]
+        for seed, score in zip(seeds, scores):
+            log.append(seed=seed, scores=score)
+        log.write()
+
+        # 2 full shards and the rest of the rows in a third.
+        shards = list(read_shards(log.path))
+        self.assertListEqual([len(shard["seed"]) for shard in shards], [4, 4, 2])
+        self.assertIsInstance(shards[0]["scores"], np.memmap)
+
+        result = load(log.path)
+        self.assertItemsEqual(result.keys(), ["seed", "scores", "players"])
+        self.assertListEqual(result["seed"].tolist(), seeds)
+        self.assertListEqual(result["scores"].tolist(), scores)
+        self.assertEqual(result["seed"].dtype, np.int64)
+        self.assertEqual(result["scores"].dtype, np.int32)
+        self.assertListEqual(result["players"].tolist(), ["Player 1", "Player 2"])
+
+    def test_empty_log(self):
+        log = NpyLog("test", seed=(np.int64, ()))
+        log.write()
+
+        self.assertListEqual(list(read_shards(log.path)), [])
+        self.assertDictEqual(load(log.path), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
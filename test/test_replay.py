@@ -0,0 +1,97 @@
+import unittest
+from collections import Counter
+
+from ai.random_ai import RandomAI
+from game import Game
+from game.classes import Colors, FailureCause
+from game.player import Player
+from game.replay import Replay
+
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        self.game = Game([RandomAI("Player 1"), RandomAI("Player 2")], maximum_rounds=200, seed=7)
+
+        # Keep the state of the game after every turn.
+        self.states = {}
+        self.game.add_turn_ended_event(lambda game: self.states.setdefault(game.get_rounds_played(), self.state(game)))
+
+        while not self.game.is_game_over()[0]:
+            player = self.game.get_current_player()
+            self.game.perform_action(player, player.take_turn(self.game))
+
+    @staticmethod
+    def state(game):
+        return (list(game._edge_claims), game.get_visible_scores(), list(game.get_face_up_cards()), list(game._deck),
+                list(game._destinations), game._current_player_index, game._num_actions_remaining,
+                [(list(info.hand.cards.counts), list(info.destinations), list(info.completed_destinations),
+                  info.score, info.num_cars) for info in (game._player_info[player] for player in game._players)])
+
+    def test_replay_to_end(self):
+        replay = Replay(self.game.get_seeds(), self.game.get_action_log())
+        game = replay.play_to_end()
+
+        self.assertTrue(replay.is_done())
+        self.assertEqual(self.state(game), self.state(self.game))
+        self.assertEqual(game.get_action_log(), self.game.get_action_log())
+        self.assertEqual(game.is_game_over(), self.game.is_game_over())
+
+    def test_replay_to_turn(self):
+        replay = Replay(self.game.get_seeds(), self.game.get_action_log())
+
+        for turn in [1, 5, 37]:
+            game = replay.play_to_turn(turn)
+            self.assertEqual(game.get_rounds_played(), turn)
+            self.assertEqual(self.state(game), self.states[turn])
+
+    def test_replay_mixed_colors(self):
+        # Find a starting hand with 2 cards of one color and 1 of a later color.  The 2 cards alone would claim a gray
+        # edge of 2.
+        for seed in range(100):
+            game = Game([RandomAI("Player 1"), RandomAI("Player 2")], maximum_rounds=200, seed=seed)
+            player = game.get_current_player()
+            hand = game.get_player_info(player).hand.cards
+            colors = [(color1, color2) for color1 in range(Colors.none) for color2 in range(color1 + 1, Colors.none)
+                      if hand[color1] >= 2 and hand[color2] >= 1]
+            if colors:
+                break
+
+        edge = next(edge for edge in game.get_board().edges if edge.color == Colors.none and edge.cost == 2)
+        cards = Counter({colors[0][0]: 2, colors[0][1]: 1})
+        self.assertEqual(game.connect_cities(player, edge, cards), (False, FailureCause.incompatible_cards))
+        game.draw_from_deck(player)
+
+        # The failed connection is replayed with the same cards, so it fails again.
+        replay = Replay(game.get_seeds(), game.get_action_log())
+        replayed = replay.play_to_end()
+        self.assertEqual(self.state(replayed), self.state(game))
+        self.assertIsNone(replayed.get_edge_claims()[edge])
+        self.assertIs(replayed.get_current_player(), replay.players[0])
+
+    def test_replay_round_limit(self):
+        # The game ends by running out of rounds, which the replay reads from the log.
+        game = Game([RandomAI("Player 1"), RandomAI("Player 2")], maximum_rounds=20, seed=7)
+        while not game.is_game_over()[0]:
+            player = game.get_current_player()
+            game.perform_action(player, player.take_turn(game))
+
+        replayed = Replay(game.get_seeds(), game.get_action_log()).play_to_end()
+        self.assertEqual(self.state(replayed), self.state(game))
+        self.assertEqual(replayed.is_game_over(), game.is_game_over())
+
+        # With more rounds, the game wouldn't be over.
+        replayed = Replay(game.get_seeds(), game.get_action_log(), maximum_rounds=1000).play_to_end()
+        self.assertFalse(replayed.is_game_over()[0])
+
+    def test_replay_destinations_drawn_by_unknown_player(self):
+        game = Game([RandomAI("Player 1"), RandomAI("Player 2")], maximum_rounds=200, seed=7)
+
+        # The destinations are drawn before the player is found to not be in the game.
+        self.assertRaises(KeyError, game.draw_destination_cards, Player("Player 3"))
+
+        replay = Replay(game.get_seeds(), game.get_action_log())
+        self.assertRaises(Exception, replay.play_to_end)
+
+
+if __name__ == '__main__':
+    unittest.main()